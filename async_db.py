@@ -0,0 +1,479 @@
+# Асинхронный слой доступа к данным (asyncio) — аналог db.py
+import asyncio
+import time
+from datetime import datetime
+
+import aiomysql
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.write_concern import WriteConcern
+
+from cache import genre_key, normalize_text
+from logger import logger
+from settings import settings
+
+# Глобальные переменные для кэширования пулов соединений
+_mysql_pool = None
+_mongo_client = None
+_mongo_db = None
+_init_lock = None
+
+# Логи поиска, ожидающие записи пачкой (как BufferedLogWriter в db.py), и задача записи
+_log_buffer = []
+_log_flush_task = None
+_log_flush_now = None
+_log_dropped = 0
+
+# Канонические названия жанров: genre_key -> название из category, время загрузки
+_genre_names = None
+_genre_names_loaded_at = 0.0
+
+
+def _get_init_lock() -> asyncio.Lock:
+    """
+    Блокировка инициализации пулов (создаётся внутри работающего цикла событий).
+    :return: asyncio.Lock
+    """
+    global _init_lock
+    if _init_lock is None:
+        _init_lock = asyncio.Lock()
+    return _init_lock
+
+
+async def initialize_mysql() -> aiomysql.Pool:
+    """
+    Инициализация асинхронного пула соединений с MySQL (создаётся один раз).
+    :return: пул соединений aiomysql
+    """
+    global _mysql_pool
+    if _mysql_pool is None:
+        async with _get_init_lock():
+            if _mysql_pool is None:
+                config = settings.get_mysql_config()
+                _mysql_pool = await aiomysql.create_pool(
+                    host=config['host'],
+                    port=config['port'],
+                    user=config['user'],
+                    password=config['password'],
+                    db=config['database'],
+                    charset=config['charset'],
+                    autocommit=config['autocommit'],
+                    minsize=settings.MYSQL_POOL_MIN_SIZE,
+                    maxsize=settings.MYSQL_POOL_MAX_SIZE,
+                    pool_recycle=int(settings.MYSQL_POOL_IDLE_TIMEOUT)
+                )
+    return _mysql_pool
+
+
+def initialize_mongo() -> object:
+    """
+    Инициализация асинхронного клиента MongoDB (создаётся один раз, без ping).
+    :return: объект базы данных MongoDB (motor)
+    """
+    global _mongo_client, _mongo_db
+    if _mongo_db is None:
+        _mongo_client = AsyncIOMotorClient(
+            settings.get_mongo_connection_string(), **settings.get_mongo_client_options()
+        )
+        _mongo_db = _mongo_client[settings.MONGO_DB_NAME]
+    return _mongo_db
+
+
+async def close_all_connections() -> None:
+    """
+    Закрыть асинхронные пулы соединений с базами данных.
+    :return: None
+    """
+    global _mysql_pool, _mongo_client, _mongo_db
+    await flush_search_log()
+    if _mysql_pool is not None:
+        _mysql_pool.close()
+        await _mysql_pool.wait_closed()
+        _mysql_pool = None
+    if _mongo_client is not None:
+        _mongo_client.close()
+        _mongo_client = None
+        _mongo_db = None
+
+
+async def _fetch_all(sql: str, params: tuple = (), dict_rows: bool = True) -> list:
+    """
+    Выполнить запрос на соединении из пула и вернуть все строки.
+    :param sql: SQL-запрос
+    :param params: Параметры запроса
+    :param dict_rows: Возвращать строки как словари
+    :return: Список строк
+    """
+    pool = await initialize_mysql()
+    async with pool.acquire() as connection:
+        cursor_class = aiomysql.DictCursor if dict_rows else aiomysql.Cursor
+        async with connection.cursor(cursor_class) as cursor:
+            await cursor.execute(sql, params)
+            return list(await cursor.fetchall())
+
+# =====================================================
+# ФУНКЦИИ ДЛЯ MONGODB (Логи и статистика)
+# =====================================================
+
+def _popular_operations(entries: list[dict]) -> list[UpdateOne]:
+    """
+    Операции обновления счётчиков популярных запросов для пачки логов:
+    записи сворачиваются, чтобы на каждый запрос приходилась одна операция.
+    :param entries: Список записей лога
+    :return: Список UpdateOne
+    """
+    totals = {}
+    for entry in entries:
+        total = totals.setdefault(entry['query'], {
+            'count': 0, 'search_type': entry['search_type'], 'last_searched': entry['timestamp']
+        })
+        total['count'] += 1
+        total['last_searched'] = max(total['last_searched'], entry['timestamp'])
+    return [
+        UpdateOne(
+            {'_id': query},
+            {
+                '$inc': {'count': total['count']},
+                '$max': {'last_searched': total['last_searched']},
+                '$setOnInsert': {'search_type': total['search_type']}
+            },
+            upsert=True
+        )
+        for query, total in totals.items()
+    ]
+
+
+async def _write_log_entries(entries: list[dict]) -> None:
+    """
+    Записать пачку логов одним insert_many и обновить счётчики популярных запросов.
+    :param entries: Список записей лога
+    :return: None
+    """
+    try:
+        mongo_db = initialize_mongo()
+        write_concern = WriteConcern(w=settings.MONGO_LOG_WRITE_CONCERN)
+        collection = mongo_db.get_collection(settings.MONGO_COLLECTION_NAME, write_concern=write_concern)
+        await collection.insert_many(entries, ordered=False)
+        popular = mongo_db.get_collection(settings.get_popular_collection_name(), write_concern=write_concern)
+        await popular.bulk_write(_popular_operations(entries), ordered=False)
+    except Exception as e:
+        print(f"Ошибка при логировании запросов ({len(entries)} шт.): {e}")
+        logger.error(f"Ошибка при логировании запросов ({len(entries)} шт.): {e}")
+
+
+async def _flush_log_buffer() -> None:
+    """
+    Записать все накопленные логи пачками по LOG_BATCH_SIZE.
+    :return: None
+    """
+    global _log_buffer
+    while _log_buffer:
+        entries, _log_buffer = _log_buffer[:settings.LOG_BATCH_SIZE], _log_buffer[settings.LOG_BATCH_SIZE:]
+        await _write_log_entries(entries)
+
+
+async def _flush_log_buffer_later(now: asyncio.Event) -> None:
+    """
+    Подождать LOG_FLUSH_INTERVAL (или сигнала now), чтобы собрать пачку, и записать её.
+    :param now: Событие «записать сразу» (набрана пачка или вызван flush_search_log)
+    :return: None
+    """
+    try:
+        await asyncio.wait_for(now.wait(), settings.LOG_FLUSH_INTERVAL)
+    except asyncio.TimeoutError:
+        pass
+    await _flush_log_buffer()
+
+
+def _schedule_log_flush() -> None:
+    """
+    Запланировать запись пачки: сразу, если набран LOG_BATCH_SIZE, иначе через
+    LOG_FLUSH_INTERVAL. Одновременно работает не больше одной задачи записи.
+    :return: None
+    """
+    global _log_flush_task, _log_flush_now
+    if _log_flush_task is None or _log_flush_task.done():
+        _log_flush_now = asyncio.Event()
+        _log_flush_task = asyncio.get_running_loop().create_task(_flush_log_buffer_later(_log_flush_now))
+    if len(_log_buffer) >= settings.LOG_BATCH_SIZE:
+        _log_flush_now.set()
+
+
+async def flush_search_log() -> None:
+    """
+    Дождаться записи в MongoDB всех накопленных логов.
+    :return: None
+    """
+    task = _log_flush_task
+    if task is not None and not task.done():
+        _log_flush_now.set()
+        await task
+    await _flush_log_buffer()
+
+
+async def log_search_query(query: str, search_type: str, results_count: int) -> None:
+    """
+    Логировать поисковый запрос в MongoDB и обновить счётчик популярности.
+    При включённом LOG_BUFFER_ENABLED запись, как и в db.py, откладывается и
+    сохраняется пачкой фоновой задачей, не задерживая сам поиск; при
+    переполнении буфера (LOG_QUEUE_MAX_SIZE) запись отбрасывается.
+    :param query: Поисковый текст запроса
+    :param search_type: Тип поиска (ключевое слово, жанр_год)
+    :param results_count: Количество найденных результатов
+    :return: None
+    """
+    global _log_dropped
+    entry = {
+        'query': query,
+        'search_type': search_type,
+        'timestamp': datetime.utcnow(),
+        'results_count': results_count
+    }
+    if not settings.LOG_BUFFER_ENABLED:
+        await _write_log_entries([entry])
+        return
+    if len(_log_buffer) >= settings.LOG_QUEUE_MAX_SIZE:
+        _log_dropped += 1
+        logger.warning(f"Буфер логов поиска переполнен, запись отброшена (всего {_log_dropped})")
+        return
+    _log_buffer.append(entry)
+    _schedule_log_flush()
+
+
+async def get_popular_queries(limit: int = 5) -> list:
+    """
+    Получить самые популярные поисковые запросы из MongoDB.
+    :param limit: Максимальное количество запросов для возврата
+    :return: Список популярных запросов с количеством
+    """
+    try:
+        mongo_db = initialize_mongo()
+        popular = mongo_db[settings.get_popular_collection_name()]
+        results = await popular.find().sort('count', -1).limit(limit).to_list(length=limit)
+        if results:
+            return results
+        collection = mongo_db[settings.MONGO_COLLECTION_NAME]
+        pipeline = [
+            {
+                '$group': {
+                    '_id': '$query',
+                    'count': {'$sum': 1},
+                    'search_type': {'$first': '$search_type'},
+                    'last_searched': {'$max': '$timestamp'}
+                }
+            },
+            {
+                '$sort': {'count': -1}
+            },
+            {
+                '$limit': limit
+            }
+        ]
+        return await collection.aggregate(pipeline).to_list(length=limit)
+    except Exception as e:
+        print(f"Ошибка при получении популярных запросов: {e}")
+        logger.error(f"Ошибка при получении популярных запросов: {e}")
+        return []
+
+
+async def get_recent_queries(limit: int = 5) -> list:
+    """
+    Получить последние поисковые запросы из MongoDB.
+    :param limit: Максимальное количество запросов для возврата
+    :return: Список последних запросов
+    """
+    try:
+        mongo_db = initialize_mongo()
+        collection = mongo_db[settings.MONGO_COLLECTION_NAME]
+        return await collection.find().sort('timestamp', -1).limit(limit).to_list(length=limit)
+    except Exception as e:
+        print(f"Ошибка при получении последних запросов: {e}")
+        logger.error(f"Ошибка при получении последних запросов: {e}")
+        return []
+
+# =====================================================
+# ФУНКЦИИ ДЛЯ MYSQL (Данные о фильмах)
+# =====================================================
+
+def _escape_like(value: str) -> str:
+    """
+    Экранировать спецсимволы шаблона LIKE во вводе пользователя (как db._escape_like).
+    :param value: Строка
+    :return: Строка, в которой %, _ и \\ совпадают буквально
+    """
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+async def find_films_by_keyword(keyword: str, limit: int = 10, skip: int = 0) -> list[dict]:
+    """
+    Найти фильмы по ключевому слову в MySQL.
+    :param keyword: Ключевое слово для поиска
+    :param limit: Максимальное количество результатов
+    :param skip: Количество результатов для пропуска (для пагинации)
+    :return: Список словарей с фильмами
+    """
+    try:
+        sql = (
+            """
+            SELECT title, description
+            FROM film_text
+            WHERE title LIKE %s
+            ORDER BY title, film_id
+            LIMIT %s OFFSET %s
+            """
+        )
+        keyword = normalize_text(keyword)
+        if not keyword:
+            return []
+        results = await _fetch_all(sql, (f"%{_escape_like(keyword)}%", limit, skip))
+        await log_search_query(keyword, 'keyword', len(results))
+        return results
+    except Exception as e:
+        print(f"Ошибка поиска фильмов по ключевому слову '{keyword}': {e}")
+        logger.error(f"Ошибка поиска фильмов по ключевому слову '{keyword}': {e}")
+        return []
+
+
+async def _canonical_genres(genres: list[str]) -> list[str]:
+    """
+    Привести написание жанров к названиям из таблицы category, как db._canonical_genre
+    ("comedy" -> "Comedy"). Названия перечитываются раз в METADATA_REFRESH_INTERVAL секунд.
+    :param genres: Жанры в произвольном написании
+    :return: Отсортированный список канонических названий без повторов
+    """
+    global _genre_names, _genre_names_loaded_at
+    if _genre_names is None or time.monotonic() - _genre_names_loaded_at >= settings.METADATA_REFRESH_INTERVAL:
+        try:
+            rows = await _fetch_all("SELECT name FROM category", dict_rows=False)
+            _genre_names = {genre_key(row[0]): row[0] for row in rows}
+            _genre_names_loaded_at = time.monotonic()
+        except Exception as e:
+            logger.error(f"Ошибка загрузки справочных данных: {e}")
+    names = _genre_names or {}
+    return sorted({names.get(genre_key(genre), normalize_text(genre)) for genre in genres if genre and genre.strip()})
+
+
+def _criteria_sql(genres: list[str], year_ranges: list[tuple[int, int]]) -> tuple[str, list]:
+    """
+    SQL-запрос поиска по критериям (как db._criteria_sql): строка на фильм,
+    все жанры фильма собираются GROUP_CONCAT.
+    :param genres: Названия жанров (любой из)
+    :param year_ranges: Диапазоны годов (любой из)
+    :return: Кортеж (SQL без LIMIT, параметры)
+    """
+    conditions, params = [], []
+    if genres:
+        conditions.append(
+            "f.film_id IN (SELECT fc2.film_id FROM film_category fc2"
+            " JOIN category c2 ON c2.category_id = fc2.category_id"
+            f" WHERE c2.name IN ({', '.join(['%s'] * len(genres))}))"
+        )
+        params.extend(genres)
+    if year_ranges:
+        conditions.append('(' + ' OR '.join(['f.release_year BETWEEN %s AND %s'] * len(year_ranges)) + ')')
+        for year_range in year_ranges:
+            params.extend(year_range)
+    sql = (
+        f"""
+        SELECT f.film_id, f.title, f.release_year,
+               GROUP_CONCAT(c.name ORDER BY c.name SEPARATOR ', ') AS genre
+        FROM film f
+        LEFT JOIN film_category fc ON fc.film_id = f.film_id
+        LEFT JOIN category c ON c.category_id = fc.category_id
+        WHERE {' AND '.join(conditions)}
+        GROUP BY f.film_id
+        ORDER BY f.film_id
+        """
+    )
+    return sql, params
+
+
+async def find_films_by_criteria(genre: str | list[str] = None, year_from: int = None, year_to: int = None, limit: int = 10, skip: int = 0,
+                                 year_ranges: list[tuple[int, int]] = None) -> list[dict]:
+    """
+    Найти фильмы по жанрам и/или диапазонам годов в MySQL (как db.find_films_by_criteria).
+    Жанры объединяются по ИЛИ, диапазоны годов — по ИЛИ, жанры и годы — по И;
+    у каждого фильма в поле genre перечислены все его жанры.
+    :param genre: Жанр или список жанров
+    :param year_from: Минимальный год
+    :param year_to: Максимальный год
+    :param limit: Максимальное количество результатов
+    :param skip: Количество результатов для пропуска (для пагинации)
+    :param year_ranges: Дополнительные диапазоны годов [(year_from, year_to), ...]
+    :return: Список словарей с фильмами
+    """
+    try:
+        genres = await _canonical_genres([genre] if isinstance(genre, str) else list(genre or []))
+        ranges = [tuple(year_range) for year_range in (year_ranges or [])]
+        if year_from and year_to:
+            ranges.append((year_from, year_to))
+        ranges = sorted({(int(low), int(high)) for low, high in ranges if low and high})
+        if not (genres or ranges):
+            return []
+        sql, params = _criteria_sql(genres, ranges)
+        results = await _fetch_all(sql + " LIMIT %s OFFSET %s", (*params, limit, skip))
+        years = '|'.join(f"{low}-{high}" for low, high in ranges) or 'None-None'
+        search_criteria = f"genre:{'|'.join(genres) or None}, years:{years}"
+        await log_search_query(search_criteria, 'genre_year', len(results))
+        return results
+    except Exception as e:
+        print(f"Ошибка поиска фильмов по критериям: {e}")
+        logger.error(f"Ошибка поиска фильмов по критериям: {e}")
+        return []
+
+
+async def find_films_by_first_letter(letter: str, limit: int = 20, skip: int = 0) -> list[dict]:
+    """
+    Найти фильмы, название которых начинается с заданной буквы.
+    :param letter: Первая буква названия
+    :param limit: Максимальное количество результатов
+    :param skip: Количество результатов для пропуска
+    :return: Список фильмов
+    """
+    try:
+        sql = (
+            """
+            SELECT title, description
+            FROM film_text
+            WHERE title LIKE %s
+            LIMIT %s OFFSET %s
+            """
+        )
+        return await _fetch_all(sql, (f"{letter.upper()}%", limit, skip))
+    except Exception as e:
+        print(f"Ошибка поиска фильмов по первой букве: {e}")
+        logger.error(f"Ошибка поиска фильмов по первой букве: {e}")
+        return []
+
+
+async def get_all_genres() -> list[str]:
+    """
+    Получить все уникальные жанры из таблицы MySQL.
+    :return: Список уникальных жанров
+    """
+    try:
+        rows = await _fetch_all("SELECT name AS genre FROM category", dict_rows=False)
+        return [row[0] for row in rows]
+    except Exception as e:
+        print(f"Ошибка получения жанров: {e}")
+        logger.error(f"Ошибка получения жанров: {e}")
+        return []
+
+
+async def get_year_range() -> dict:
+    """
+    Получить минимальный и максимальный год из таблицы фильмов MySQL.
+    :return: Словарь с 'min_year' и 'max_year'
+    """
+    try:
+        rows = await _fetch_all(
+            "SELECT MIN(release_year) AS min_year, MAX(release_year) AS max_year FROM film",
+            dict_rows=False
+        )
+        if rows:
+            return {'min_year': rows[0][0], 'max_year': rows[0][1]}
+        return {'min_year': None, 'max_year': None}
+    except Exception as e:
+        print(f"Ошибка получения диапазона лет: {e}")
+        logger.error(f"Ошибка получения диапазона лет: {e}")
+        return {'min_year': None, 'max_year': None}
@@ -0,0 +1,111 @@
+# Сравнение пропускной способности синхронного (db.py) и асинхронного (async_db.py) слоёв
+#
+# Запуск из корня проекта:
+#     python benchmarks/async_concurrency.py --requests 200 --concurrency 20
+#     python benchmarks/async_concurrency.py --no-log-buffer
+#
+# Кэш результатов и in-memory индекс отключаются, чтобы каждый запрос шёл в MySQL.
+# Оба слоя логируют запросы одинаково: по умолчанию пачками в фоне
+# (LOG_BUFFER_ENABLED), с --no-log-buffer — синхронной записью каждого запроса.
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from settings import Settings  # noqa: E402
+
+Settings.SEARCH_CACHE_ENABLED = False
+Settings.SEARCH_INDEX_ENABLED = False
+
+import async_db  # noqa: E402
+import db  # noqa: E402
+
+KEYWORDS = ['ACE', 'LOVE', 'DINOSAUR', 'MAN', 'GOLD', 'STAR', 'WAR', 'DAY', 'CITY', 'ROAD']
+
+
+def _report(label: str, count: int, seconds: float) -> None:
+    """
+    Вывести пропускную способность режима.
+    :param label: Название режима
+    :param count: Количество запросов
+    :param seconds: Общее время в секундах
+    :return: None
+    """
+    print(f"{label:<28} {count} запросов за {seconds:.3f} с — {count / seconds:.1f} запросов/с")
+
+
+def bench_sync_sequential(keywords: list[str]) -> float:
+    """
+    Синхронный слой, запросы по одному.
+    :param keywords: Ключевые слова
+    :return: Время в секундах
+    """
+    started = time.perf_counter()
+    for keyword in keywords:
+        db.find_films_by_keyword(keyword)
+    return time.perf_counter() - started
+
+
+def bench_sync_threads(keywords: list[str], concurrency: int) -> float:
+    """
+    Синхронный слой на пуле потоков (search_many).
+    :param keywords: Ключевые слова
+    :param concurrency: Количество потоков
+    :return: Время в секундах
+    """
+    specs = [{'type': 'keyword', 'keyword': keyword} for keyword in keywords]
+    started = time.perf_counter()
+    db.search_many(specs, max_workers=concurrency)
+    return time.perf_counter() - started
+
+
+async def bench_async(keywords: list[str], concurrency: int) -> float:
+    """
+    Асинхронный слой: одновременные запросы в одном цикле событий.
+    :param keywords: Ключевые слова
+    :param concurrency: Максимальное количество одновременных запросов
+    :return: Время в секундах
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(keyword: str) -> None:
+        async with semaphore:
+            await async_db.find_films_by_keyword(keyword)
+
+    await async_db.initialize_mysql()
+    started = time.perf_counter()
+    await asyncio.gather(*(one(keyword) for keyword in keywords))
+    elapsed = time.perf_counter() - started
+    await async_db.close_all_connections()
+    return elapsed
+
+
+def main() -> None:
+    """
+    Выполнить замеры и вывести результаты.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(description="Синхронный и асинхронный доступ к данным под нагрузкой")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--no-log-buffer', action='store_true',
+                        help="писать лог каждого запроса сразу (в обоих слоях)")
+    args = parser.parse_args()
+
+    Settings.LOG_BUFFER_ENABLED = not args.no_log_buffer
+
+    # Размер пулов должен позволять заявленную параллельность
+    Settings.MYSQL_POOL_MAX_SIZE = max(Settings.MYSQL_POOL_MAX_SIZE, args.concurrency)
+    keywords = [KEYWORDS[i % len(KEYWORDS)] for i in range(args.requests)]
+
+    _report("sync, последовательно", args.requests, bench_sync_sequential(keywords))
+    _report(f"sync, {args.concurrency} потоков", args.requests, bench_sync_threads(keywords, args.concurrency))
+    _report(f"async, {args.concurrency} задач", args.requests, asyncio.run(bench_async(keywords, args.concurrency)))
+    db.close_all_connections()
+
+
+if __name__ == "__main__":
+    main()
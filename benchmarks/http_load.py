@@ -0,0 +1,169 @@
+# Нагрузочный тест HTTP/JSON сервиса (server.py) на локальной подмене баз
+#
+# Запуск из корня проекта:
+#     python benchmarks/http_load.py --films 10000 --seed-data --requests 5000 --concurrency 32
+#     python benchmarks/http_load.py --url http://127.0.0.1:8080 --requests 2000
+#
+# Без --url сервер запускается в этом же процессе на свободном порту поверх stand_in.
+# Каждый клиентский поток держит одно keep-alive соединение и отправляет запросы
+# из смешанного набора (ключевое слово, жанр и годы, префикс, справочники, популярное).
+# Результат — JSON с пропускной способностью (запросов/с) и p50/p95/p99 задержки (мс).
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from settings import Settings  # noqa: E402
+from benchmarks.stand_in import CATEGORIES, WORDS, configure_settings, seed_mysql, seed_search_log  # noqa: E402
+from benchmarks.suite import _percentile  # noqa: E402
+
+
+def build_paths(count: int, seed: int) -> list[str]:
+    """
+    Сгенерировать смешанный набор путей запросов.
+    :param count: Количество запросов
+    :param seed: Зерно генератора
+    :return: Список путей
+    """
+    rng = random.Random(seed)
+    makers = [
+        (40, lambda: f"/films/keyword?q={quote(rng.choice(WORDS).lower())}&limit=10"),
+        (25, lambda: (f"/films/criteria?genre={quote(rng.choice(CATEGORIES))}"
+                      f"&year_from={(year := rng.randint(1990, 2015))}&year_to={year + 5}")),
+        (20, lambda: f"/films/prefix?prefix={quote(rng.choice(WORDS)[:rng.randint(1, 3)].lower())}"),
+        (5, lambda: "/genres"),
+        (5, lambda: "/years"),
+        (5, lambda: "/queries/popular?limit=5"),
+    ]
+    weights = [weight for weight, _ in makers]
+    return [rng.choices(makers, weights)[0][1]() for _ in range(count)]
+
+
+def run_load(host: str, port: int, paths: list[str], concurrency: int, use_gzip: bool) -> dict:
+    """
+    Отправить запросы из concurrency потоков по keep-alive соединениям.
+    :param host: Адрес сервера
+    :param port: Порт сервера
+    :param paths: Пути запросов
+    :param concurrency: Количество клиентских потоков (и соединений)
+    :param use_gzip: Запрашивать сжатые ответы
+    :return: Словарь с пропускной способностью, перцентилями и ошибками
+    """
+    headers = {'Accept-Encoding': 'gzip'} if use_gzip else {}
+    lock = threading.Lock()
+    queue = iter(paths)
+    latencies, errors, received = [], [], [0]
+
+    def client() -> None:
+        connection = http.client.HTTPConnection(host, port, timeout=30)
+        local_latencies, local_bytes = [], 0
+        while True:
+            with lock:
+                path = next(queue, None)
+            if path is None:
+                break
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                with lock:
+                    errors.append(f"{path}: {e}")
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=30)
+                continue
+            local_latencies.append(time.perf_counter() - started)
+            local_bytes += len(body)
+            if response.status != 200:
+                with lock:
+                    errors.append(f"{path}: HTTP {response.status}")
+        connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            received[0] += local_bytes
+
+    threads = [threading.Thread(target=client, name=f'client-{i}') for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return {
+        'requests': len(paths),
+        'concurrency': concurrency,
+        'gzip': use_gzip,
+        'seconds': round(elapsed, 3),
+        'rps': round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(_percentile(ordered, 50) * 1000, 3) if ordered else None,
+        'p95_ms': round(_percentile(ordered, 95) * 1000, 3) if ordered else None,
+        'p99_ms': round(_percentile(ordered, 99) * 1000, 3) if ordered else None,
+        'max_ms': round(ordered[-1] * 1000, 3) if ordered else None,
+        'received_kb': round(received[0] / 1024, 1),
+        'errors': len(errors),
+        'error_samples': errors[:5],
+    }
+
+
+def main() -> None:
+    """
+    Подготовить сервер (или взять внешний по --url), выполнить нагрузку и вывести JSON.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(description="Нагрузочный тест HTTP/JSON сервиса поиска")
+    parser.add_argument('--url', help="адрес уже запущенного сервера (по умолчанию — запуск в процессе)")
+    parser.add_argument('--films', type=int, default=10000)
+    parser.add_argument('--log-entries', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--seed-data', action='store_true', help="пересоздать синтетические данные")
+    parser.add_argument('--mongo', choices=('mock', 'local'), default='mock')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--no-gzip', action='store_true', help="не запрашивать сжатие ответов")
+    parser.add_argument('--with-cache', action='store_true', help="не отключать кэш результатов")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        configure_settings(args.mongo)
+        Settings.SEARCH_CACHE_ENABLED = args.with_cache
+        Settings.MYSQL_POOL_MAX_SIZE = max(Settings.MYSQL_POOL_MAX_SIZE, args.concurrency)
+        import db
+        import server as http_server
+
+        if args.seed_data:
+            seed_mysql(args.films, args.seed)
+        if args.seed_data or args.mongo == 'mock':
+            seed_search_log(args.log_entries, args.seed)
+        db.warm_metadata_cache()
+        server = http_server.create_server('127.0.0.1', 0)
+        host, port = server.server_address[:2]
+        threading.Thread(target=server.serve_forever, name='http-server', daemon=True).start()
+
+    paths = build_paths(args.requests, args.seed)
+    # Прогрев: соединения пула, кэши метаданных и индексы
+    run_load(host, port, paths[:min(50, len(paths))], 1, not args.no_gzip)
+    result = run_load(host, port, paths, args.concurrency, not args.no_gzip)
+
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+        db.close_all_connections()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# Замер накладных расходов логирования поиска в MongoDB: до и после оптимизации
+#
+# Запуск из корня проекта:
+#     python benchmarks/mongo_log_overhead.py --iterations 200
+#
+# Записи пишутся во временную коллекцию '<MONGO_COLLECTION_NAME>_bench',
+# которая удаляется после замера (если не указан --keep).
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import MongoClient  # noqa: E402
+from pymongo.write_concern import WriteConcern  # noqa: E402
+
+import db  # noqa: E402
+from settings import Settings, settings  # noqa: E402
+
+
+def _entry(i: int) -> dict:
+    """
+    Сформировать тестовую запись лога.
+    :param i: Номер итерации
+    :return: dict
+    """
+    return {
+        'query': f"bench-{i % 20}",
+        'search_type': 'keyword',
+        'timestamp': datetime.utcnow(),
+        'results_count': i % 10
+    }
+
+
+def _summary(samples: list[float]) -> dict:
+    """
+    Посчитать сводную статистику задержек в миллисекундах.
+    :param samples: Задержки в секундах
+    :return: dict
+    """
+    ordered = sorted(samples)
+    return {
+        'mean_ms': round(statistics.mean(ordered) * 1000, 3),
+        'p50_ms': round(ordered[len(ordered) // 2] * 1000, 3),
+        'p95_ms': round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 3),
+    }
+
+
+def bench_legacy(collection_name: str, iterations: int) -> list[float]:
+    """
+    Старый путь: ping перед каждой записью и insert_one с подтверждением.
+    :param collection_name: Имя коллекции для замера
+    :param iterations: Количество записей
+    :return: Задержки в секундах
+    """
+    client = MongoClient(settings.get_mongo_connection_string())
+    collection = client[settings.MONGO_DB_NAME][collection_name]
+    samples = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        client.admin.command('ping')
+        collection.insert_one(_entry(i))
+        samples.append(time.perf_counter() - started)
+    client.close()
+    return samples
+
+
+def bench_direct(collection_name: str, iterations: int) -> list[float]:
+    """
+    Новый синхронный путь: общий клиент без ping и write concern из настроек.
+    :param collection_name: Имя коллекции для замера
+    :param iterations: Количество записей
+    :return: Задержки в секундах
+    """
+    mongo_db = db.initialize_mongo()
+    write_concern = WriteConcern(w=settings.MONGO_LOG_WRITE_CONCERN)
+    collection = mongo_db.get_collection(collection_name, write_concern=write_concern)
+    samples = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        collection.insert_one(_entry(i))
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_buffered(collection_name: str, iterations: int) -> tuple[list[float], float]:
+    """
+    Путь log_search_query с фоновой записью: задержка поиска — только постановка в очередь.
+    :param collection_name: Имя коллекции для замера
+    :param iterations: Количество записей
+    :return: Кортеж (задержки в секундах, время финального flush в секундах)
+    """
+    Settings.MONGO_COLLECTION_NAME = collection_name
+    Settings.MONGO_POPULAR_COLLECTION_NAME = f"{collection_name}_popular"
+    samples = []
+    for i in range(iterations):
+        entry = _entry(i)
+        started = time.perf_counter()
+        db.log_search_query(entry['query'], entry['search_type'], entry['results_count'])
+        samples.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    db.flush_search_log()
+    return samples, time.perf_counter() - started
+
+
+def main() -> None:
+    """
+    Выполнить замеры и вывести результаты.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(description="Накладные расходы логирования поиска в MongoDB")
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--keep', action='store_true', help="не удалять коллекцию замера")
+    args = parser.parse_args()
+
+    collection_name = f"{settings.MONGO_COLLECTION_NAME}_bench"
+    print(f"Итераций: {args.iterations}, write concern логов: w={settings.MONGO_LOG_WRITE_CONCERN}")
+    print(f"До (ping + insert_one):          {_summary(bench_legacy(collection_name, args.iterations))}")
+    print(f"После (общий клиент, без ping):  {_summary(bench_direct(collection_name, args.iterations))}")
+    samples, flush_seconds = bench_buffered(collection_name, args.iterations)
+    print(f"После (фоновая запись, очередь): {_summary(samples)}; flush: {flush_seconds * 1000:.1f} ms")
+    print(f"Статистика очереди: {db.get_search_log_stats()}")
+
+    if not args.keep:
+        mongo_db = db.initialize_mongo()
+        mongo_db.drop_collection(collection_name)
+        mongo_db.drop_collection(f"{collection_name}_popular")
+    db.close_all_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Сравнение табличного вывода: прежний PrettyTable и TableRenderer (table_renderer.py)
+#
+# Запуск из корня проекта:
+#     python benchmarks/render_table.py --rows 10000
+#
+# Вывод идёт в память (io.StringIO), поэтому замеряется только форматирование.
+# Строки генерируются в стиле stand_in, длинные описания (до --description-length
+# символов) проверяют расчёт ширины и обрезку/перенос.
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stand_in import DESCRIPTION_WORDS, WORDS  # noqa: E402
+from table_renderer import TableRenderer  # noqa: E402
+
+
+def make_rows(count: int, description_length: int, seed: int) -> list[dict]:
+    """
+    Сгенерировать строки результата поиска по ключевому слову.
+    :param count: Количество строк
+    :param description_length: Максимальная длина описания
+    :param seed: Зерно генератора
+    :return: Список словарей с ключами title и description
+    """
+    rng = random.Random(seed)
+    rows = []
+    for film_id in range(1, count + 1):
+        words = []
+        length = rng.randint(description_length // 4, description_length)
+        while sum(len(word) + 1 for word in words) < length:
+            words.append(rng.choice(DESCRIPTION_WORDS))
+        rows.append({'title': f"{rng.choice(WORDS)} {rng.choice(WORDS)} {film_id}", 'description': ' '.join(words)})
+    return rows
+
+
+def legacy_display_films(films: list[dict], start: int = 1) -> None:
+    """
+    Прежняя реализация ui.display_films: PrettyTable на каждый вызов
+    и проверка формы каждой строки.
+    :param films: Список фильмов
+    :param start: Номер первой строки
+    :return: None
+    """
+    from prettytable import PrettyTable
+    if not films:
+        print("\nФильмы не найдены.")
+        return
+    print(f"\nНайдено {len(films)} фильм(ов):")
+    table = PrettyTable()
+    sample = films[0]
+    if 'title' in sample and 'description' in sample:
+        headers = ['№', 'Название', 'Описание']
+    elif 'title' in sample and 'release_year' in sample and 'genre' in sample:
+        headers = ['№', 'Название', 'Год', 'Жанр']
+    else:
+        headers = ['№'] + list(sample.keys())
+    table.field_names = headers
+    for i, film in enumerate(films, start):
+        if 'title' in film and 'description' in film:
+            table.add_row([i, film.get('title', 'Не указано'), film.get('description', 'Не указано')])
+        elif 'title' in film and 'release_year' in film and 'genre' in film:
+            table.add_row([i, film.get('title', 'Не указано'), film.get('release_year', 'Не указан'), film.get('genre', 'Не указан')])
+        else:
+            table.add_row([i] + [film.get(k, 'Не указано') for k in film.keys()])
+    print(table)
+
+
+def measure(func) -> dict:
+    """
+    Выполнить функцию, перенаправив stdout в память.
+    :param func: Функция без аргументов
+    :return: Словарь с временем (мс), пиковой памятью (КБ) и объёмом вывода (КБ)
+    """
+    buffer = io.StringIO()
+    stdout = sys.stdout
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        sys.stdout = buffer
+        func(buffer)
+    finally:
+        sys.stdout = stdout
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'ms': round(elapsed * 1000, 2),
+        'peak_kb': round(peak / 1024, 1),
+        'output_kb': round(len(buffer.getvalue()) / 1024, 1),
+    }
+
+
+def main() -> None:
+    """
+    Выполнить замеры и вывести JSON.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(description="Скорость табличного вывода результатов")
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--description-length', type=int, default=400)
+    parser.add_argument('--page-size', type=int, default=10, help="размер страницы show_paged")
+    parser.add_argument('--screen', type=int, default=40, help="строк на экран при потоковом выводе")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows, args.description_length, args.seed)
+    pages = [rows[i:i + args.page_size] for i in range(0, len(rows), args.page_size)]
+
+    def renderer(out, **kwargs):
+        return TableRenderer(out=out, terminal_width=120, **kwargs)
+
+    def paged_new(out):
+        table = renderer(out)
+        for number, page in enumerate(pages):
+            table.render(page, start=number * args.page_size + 1)
+
+    def paged_legacy(out):
+        for number, page in enumerate(pages):
+            legacy_display_films(page, start=number * args.page_size + 1)
+
+    cases = {
+        'legacy_prettytable_all_rows': lambda out: legacy_display_films(rows),
+        'renderer_all_rows': lambda out: renderer(out).render(rows),
+        'renderer_all_rows_wrap3': lambda out: renderer(out, wrap_lines=3).render(rows),
+        'legacy_prettytable_paged': paged_legacy,
+        'renderer_paged': paged_new,
+        # Потоковый вывод: время до первого экрана (итератор дальше не читается)
+        'renderer_first_screen': lambda out: renderer(out).render(
+            iter(rows), page_size=args.screen, confirm=lambda: False
+        ),
+    }
+    results = {'rows': args.rows, 'description_length': args.description_length, 'cases': {}}
+    for name, case in cases.items():
+        results['cases'][name] = measure(case)
+        print(f"{name}: {results['cases'][name]}", file=sys.stderr)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
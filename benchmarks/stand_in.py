@@ -0,0 +1,273 @@
+# Локальная подмена баз данных для замеров: синтетические данные в форме Sakila
+#
+# MySQL: отдельная локальная база (по умолчанию 'sakila_bench'), заполняемая
+# таблицами category, film, film_text, film_category и films (для find_film_by_key).
+# Снимок: те же фильмы в колоночном снимке (SEARCH_BACKEND=snapshot) — замеры без MySQL.
+# MongoDB: локальный сервер или mongomock (если установлен) вместо реального кластера.
+import os
+import random
+from datetime import datetime, timedelta
+
+import pymysql
+
+from settings import Settings
+
+CATEGORIES = [
+    'Action', 'Animation', 'Children', 'Classics', 'Comedy', 'Documentary', 'Drama', 'Family',
+    'Foreign', 'Games', 'Horror', 'Music', 'New', 'Sci-Fi', 'Sports', 'Travel'
+]
+
+WORDS = [
+    'ACADEMY', 'ACE', 'ADAPTATION', 'AFFAIR', 'AGENT', 'AIRPORT', 'ALABAMA', 'ALADDIN', 'ALIEN',
+    'AMADEUS', 'ANGELS', 'ANNIE', 'APOLLO', 'ARMAGEDDON', 'ARMY', 'BANG', 'BEAST', 'BED', 'BILL',
+    'BIRDS', 'BLADE', 'BRIDE', 'BROTHERHOOD', 'CAMPUS', 'CASPER', 'CAT', 'CHAMPION', 'CHICKEN',
+    'CITIZEN', 'CITY', 'CLUE', 'CONFIDENTIAL', 'CREATURES', 'CROW', 'DAISY', 'DANCING', 'DAY',
+    'DINOSAUR', 'DOCTOR', 'DRAGON', 'DREAM', 'EAGLES', 'EARTH', 'EGG', 'FAMILY', 'FELLOWSHIP',
+    'FIRE', 'FLASH', 'GATTACA', 'GHOST', 'GOLDFINGER', 'GRAIL', 'HARRY', 'HEAVEN', 'HOLIDAY',
+    'HUNTER', 'ICE', 'JEDI', 'JUNGLE', 'KING', 'LADY', 'LOVE', 'MAN', 'MIDNIGHT', 'MOON', 'NIGHT',
+    'OCEAN', 'PRINCESS', 'RIVER', 'ROAD', 'ROCK', 'SAINTS', 'SHIP', 'STAR', 'STORY', 'SUN',
+    'TITANIC', 'TOWN', 'TREASURE', 'WAR', 'WEST', 'WIND', 'WOMEN', 'ZORRO'
+]
+
+DESCRIPTION_WORDS = [
+    'A', 'Epic', 'Drama', 'Astounding', 'Reflection', 'Fanciful', 'Documentary', 'of', 'a',
+    'Feminist', 'Dentist', 'Monkey', 'Robot', 'Squirrel', 'Boat', 'who', 'must', 'Battle',
+    'Outrace', 'Chase', 'Find', 'Pursue', 'in', 'The', 'Canadian', 'Rockies', 'Gulf', 'Mexico',
+    'Abandoned', 'Mine', 'Shaft', 'Ancient', 'India', 'Sunk', 'U-Boat', 'Moon', 'Station'
+]
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS category (
+        category_id TINYINT UNSIGNED NOT NULL AUTO_INCREMENT,
+        name VARCHAR(25) NOT NULL,
+        last_update TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (category_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS film (
+        film_id INT UNSIGNED NOT NULL AUTO_INCREMENT,
+        title VARCHAR(128) NOT NULL,
+        description TEXT,
+        release_year YEAR,
+        rating VARCHAR(5) DEFAULT 'G',
+        last_update TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (film_id),
+        KEY idx_title (title)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS film_text (
+        film_id INT UNSIGNED NOT NULL,
+        title VARCHAR(255) NOT NULL,
+        description TEXT,
+        PRIMARY KEY (film_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS film_category (
+        film_id INT UNSIGNED NOT NULL,
+        category_id TINYINT UNSIGNED NOT NULL,
+        last_update TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (film_id, category_id),
+        KEY idx_fk_category_id (category_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    # Таблица, к которой обращается find_film_by_key (в Sakila её нет)
+    """
+    CREATE TABLE IF NOT EXISTS films (
+        id INT UNSIGNED NOT NULL,
+        title VARCHAR(255) NOT NULL,
+        PRIMARY KEY (id),
+        KEY idx_title (title)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """
+]
+
+
+def stand_in_mysql_config() -> dict:
+    """
+    Параметры подключения к локальной базе для замеров (переменные BENCH_MYSQL_*).
+    :return: dict
+    """
+    return {
+        'host': os.getenv('BENCH_MYSQL_HOST', 'localhost'),
+        'port': int(os.getenv('BENCH_MYSQL_PORT', '3306')),
+        'user': os.getenv('BENCH_MYSQL_USERNAME', 'root'),
+        'password': os.getenv('BENCH_MYSQL_PASSWORD', ''),
+        'database': os.getenv('BENCH_MYSQL_DB_NAME', 'sakila_bench'),
+    }
+
+
+def configure_settings(mongo_mode: str = 'mock') -> None:
+    """
+    Переключить Settings на локальную подмену баз данных.
+    При mongo_mode='mock' MongoClient в db.py заменяется на mongomock.
+    :param mongo_mode: 'mock' или 'local'
+    :return: None
+    """
+    config = stand_in_mysql_config()
+    Settings.MYSQL_HOST = config['host']
+    Settings.MYSQL_PORT = config['port']
+    Settings.MYSQL_USERNAME = config['user']
+    Settings.MYSQL_PASSWORD = config['password']
+    Settings.MYSQL_DB_NAME = config['database']
+    Settings.MONGO_URI = os.getenv('BENCH_MONGO_URI', 'mongodb://localhost:27017')
+    Settings.MONGO_DB_NAME = os.getenv('BENCH_MONGO_DB_NAME', 'film_logs_bench')
+    Settings.MONGO_COLLECTION_NAME = 'search_log'
+    Settings.MONGO_POPULAR_COLLECTION_NAME = 'search_log_popular'
+    if mongo_mode == 'mock':
+        try:
+            import mongomock
+        except ImportError as e:
+            raise SystemExit("Для --mongo mock установите mongomock: pip install mongomock") from e
+        import db
+        db.MongoClient = mongomock.MongoClient
+
+
+def _title(rng: random.Random, film_id: int) -> str:
+    """
+    Сгенерировать уникальное название фильма в стиле Sakila.
+    :param rng: Генератор случайных чисел
+    :param film_id: Идентификатор фильма
+    :return: str
+    """
+    return f"{rng.choice(WORDS)} {rng.choice(WORDS)} {film_id}"
+
+
+def _description(rng: random.Random) -> str:
+    """
+    Сгенерировать описание фильма.
+    :param rng: Генератор случайных чисел
+    :return: str
+    """
+    return ' '.join(rng.choice(DESCRIPTION_WORDS) for _ in range(rng.randint(10, 18)))
+
+
+def generate_films(films: int, seed: int = 42):
+    """
+    Синтетические фильмы: одинаковые для MySQL и снимка при одинаковом seed.
+    :param films: Количество фильмов
+    :param seed: Зерно генератора для воспроизводимости
+    :return: Генератор кортежей (film_id, title, description, release_year, category_ids)
+    """
+    rng = random.Random(seed)
+    for film_id in range(1, films + 1):
+        title = _title(rng, film_id)
+        description = _description(rng)
+        release_year = rng.randint(1990, 2024)
+        category_ids = rng.sample(range(1, len(CATEGORIES) + 1), rng.choice((1, 1, 1, 2)))
+        yield film_id, title, description, release_year, category_ids
+
+
+def seed_mysql(films: int, seed: int = 42, chunk_size: int = 5000) -> None:
+    """
+    Создать и заполнить локальную базу синтетическими фильмами.
+    Существующие данные таблиц удаляются.
+    :param films: Количество фильмов (от 1k до 1M)
+    :param seed: Зерно генератора для воспроизводимости
+    :param chunk_size: Размер пачки вставки
+    :return: None
+    """
+    config = stand_in_mysql_config()
+    database = config.pop('database')
+    connection = pymysql.connect(charset='utf8mb4', autocommit=True, **config)
+    cursor = connection.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{database}` CHARACTER SET utf8mb4")
+    cursor.execute(f"USE `{database}`")
+    for ddl in SCHEMA:
+        cursor.execute(ddl)
+    for table in ('film_category', 'film_text', 'film', 'films', 'category'):
+        cursor.execute(f"TRUNCATE TABLE {table}")
+    cursor.executemany("INSERT INTO category (name) VALUES (%s)", [(name,) for name in CATEGORIES])
+
+    film_rows, text_rows, category_rows = [], [], []
+
+    def insert() -> None:
+        cursor.executemany(
+            "INSERT INTO film (film_id, title, description, release_year) VALUES (%s, %s, %s, %s)",
+            film_rows
+        )
+        cursor.executemany("INSERT INTO film_text (film_id, title, description) VALUES (%s, %s, %s)", text_rows)
+        cursor.executemany("INSERT INTO films (id, title) VALUES (%s, %s)", [row[:2] for row in text_rows])
+        cursor.executemany("INSERT INTO film_category (film_id, category_id) VALUES (%s, %s)", category_rows)
+
+    for film_id, title, description, release_year, category_ids in generate_films(films, seed):
+        film_rows.append((film_id, title, description, release_year))
+        text_rows.append((film_id, title, description))
+        category_rows.extend((film_id, category_id) for category_id in category_ids)
+        if len(film_rows) >= chunk_size:
+            insert()
+            film_rows, text_rows, category_rows = [], [], []
+    if film_rows:
+        insert()
+    cursor.close()
+    connection.close()
+
+
+def build_snapshot(films: int, directory: str, seed: int = 42) -> dict:
+    """
+    Записать колоночный снимок (SEARCH_BACKEND=snapshot) из тех же синтетических
+    фильмов, что и seed_mysql, без обращения к MySQL.
+    :param films: Количество фильмов
+    :param directory: Каталог снимка
+    :param seed: Зерно генератора для воспроизводимости
+    :return: Содержимое meta.json снимка
+    """
+    from snapshot import export_snapshot
+
+    rows, film_categories = [], []
+    for film_id, title, description, release_year, category_ids in generate_films(films, seed):
+        rows.append((film_id, title, description, release_year))
+        film_categories.extend((film_id, category_id) for category_id in category_ids)
+    categories = list(enumerate(CATEGORIES, 1))
+    return export_snapshot(rows, film_categories, categories, directory, f"stand_in:{films}:{seed}")
+
+
+def use_snapshot_backend(directory: str) -> None:
+    """
+    Переключить поиск на снимок: фильмы и справочные данные (жанры, годы) берутся
+    из него, поэтому замеры идут без сервера MySQL. Вызывать после configure_settings.
+    :param directory: Каталог снимка, записанного build_snapshot
+    :return: None
+    """
+    Settings.SEARCH_BACKEND = 'snapshot'
+    Settings.SNAPSHOT_DIR = directory
+    # Индексы строятся по film_text из MySQL
+    Settings.SEARCH_INDEX_ENABLED = False
+    Settings.PREFIX_INDEX_ENABLED = False
+    Settings.FUZZY_SEARCH_ENABLED = False
+
+
+def seed_search_log(entries: int, seed: int = 42) -> None:
+    """
+    Заполнить коллекцию логов поиска (и счётчики популярности) синтетическими записями.
+    Вызывать после configure_settings.
+    :param entries: Количество записей лога
+    :param seed: Зерно генератора для воспроизводимости
+    :return: None
+    """
+    import db
+    rng = random.Random(seed)
+    mongo_db = db.initialize_mongo()
+    mongo_db.drop_collection(Settings.MONGO_COLLECTION_NAME)
+    mongo_db.drop_collection(Settings.get_popular_collection_name())
+    now = datetime.utcnow()
+    # Распределение запросов с «длинным хвостом», как в реальном логе
+    queries = [word.lower() for word in WORDS]
+    weights = [1 / (rank + 1) for rank in range(len(queries))]
+    batch = []
+    for _ in range(entries):
+        batch.append({
+            'query': rng.choices(queries, weights)[0],
+            'search_type': 'keyword',
+            'timestamp': now - timedelta(seconds=rng.randint(0, 30 * 24 * 3600)),
+            'results_count': rng.randint(0, 10)
+        })
+        if len(batch) >= 5000:
+            mongo_db[Settings.MONGO_COLLECTION_NAME].insert_many(batch)
+            batch = []
+    if batch:
+        mongo_db[Settings.MONGO_COLLECTION_NAME].insert_many(batch)
+    db.rebuild_popular_queries()
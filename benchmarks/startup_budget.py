@@ -0,0 +1,121 @@
+# Проверка бюджета времени запуска: импорт main и холодный старт до появления меню
+#
+# Запуск из корня проекта:
+#     python benchmarks/startup_budget.py
+#     python benchmarks/startup_budget.py --import-budget-ms 80 --menu-budget-ms 250 --runs 7
+#
+# Команда завершается с кодом 1, если медиана времени импорта или времени
+# до появления меню превышает бюджет, либо если при импорте main загружаются
+# модули, которые должны загружаться только при первом использовании.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Модули, которые не должны загружаться при запуске
+LAZY_MODULES = ('pymysql', 'pymongo', 'dotenv', 'prettytable', 'numpy', 'aiomysql', 'motor')
+
+MENU_MARKER = "Выберите действие"
+
+# Бюджет по умолчанию (медиана, миллисекунды)
+IMPORT_BUDGET_MS = 100.0
+MENU_BUDGET_MS = 300.0
+
+
+def measure_import_ms() -> float:
+    """
+    Время импорта main по данным python -X importtime (суммарное, в миллисекундах).
+    :return: float
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    for line in reversed(completed.stderr.splitlines()):
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) == 3 and parts[2] == 'main':
+            return int(parts[1]) / 1000
+    raise RuntimeError("в выводе -X importtime нет строки для main")
+
+
+def eagerly_loaded_modules() -> list[str]:
+    """
+    Модули из LAZY_MODULES, загруженные при импорте main.
+    :return: Список имён модулей
+    """
+    code = (
+        "import sys, main; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    completed = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return [name for name in completed.stdout.strip().split(',') if name]
+
+
+def measure_menu_ms() -> float:
+    """
+    Время от запуска процесса main.py до вывода меню (в миллисекундах).
+    После появления меню процесс завершается пунктом «9. Выход».
+    :return: float
+    """
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-u', 'main.py'], cwd=ROOT,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    elapsed = None
+    for line in process.stdout:
+        if MENU_MARKER in line:
+            elapsed = (time.perf_counter() - started) * 1000
+            break
+    try:
+        process.communicate('9\n', timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
+    if elapsed is None:
+        raise RuntimeError("main.py завершился, не показав меню")
+    return elapsed
+
+
+def main() -> None:
+    """
+    Выполнить замеры, сравнить медианы с бюджетом и вывести JSON.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(description="Бюджет времени запуска приложения")
+    parser.add_argument('--import-budget-ms', type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument('--menu-budget-ms', type=float, default=MENU_BUDGET_MS)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    import_samples = [measure_import_ms() for _ in range(args.runs)]
+    menu_samples = [measure_menu_ms() for _ in range(args.runs)]
+    eager = eagerly_loaded_modules()
+    results = {
+        'import_ms': round(statistics.median(import_samples), 1),
+        'menu_ms': round(statistics.median(menu_samples), 1),
+        'eager_modules': eager,
+        'budget': {'import_ms': args.import_budget_ms, 'menu_ms': args.menu_budget_ms},
+    }
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+    violations = []
+    if results['import_ms'] > args.import_budget_ms:
+        violations.append(f"импорт main: {results['import_ms']} мс > {args.import_budget_ms} мс")
+    if results['menu_ms'] > args.menu_budget_ms:
+        violations.append(f"старт до меню: {results['menu_ms']} мс > {args.menu_budget_ms} мс")
+    if eager:
+        violations.append(f"при импорте загружаются: {', '.join(eager)}")
+    for violation in violations:
+        print(f"ПРЕВЫШЕН БЮДЖЕТ: {violation}", file=sys.stderr)
+    if violations:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+# Воспроизводимый набор замеров публичных функций db.py на локальной подмене баз
+#
+# Запуск из корня проекта:
+#     python benchmarks/suite.py --films 10000 --seed-data --output bench.json
+#     python benchmarks/suite.py --films 10000 --baseline
+#     python benchmarks/suite.py --compare bench.json
+#     python benchmarks/suite.py --backend snapshot --log-entries 5000 --iterations 100 --update-baseline
+#
+# Результат — JSON с p50/p95/p99 задержки (мс), пропускной способностью (оп/с)
+# и пиковой памятью Python (КБ) для каждой функции. При сравнении с базовой
+# линией команда завершается с кодом 1, если p95 вырос больше допуска, и с кодом 2
+# без сравнения, если масштаб или настройки прогона отличаются от базовой линии.
+#
+# Базовые линии хранятся отдельно для каждого бэкенда: benchmarks/baseline-<backend>.json.
+# baseline-snapshot.json получен последней командой (снимок и mongomock, масштаб
+# и настройки записаны в файле): такой прогон не требует серверов. Задержки
+# функций лога MongoDB в нём — задержки mongomock. baseline-mysql.json в репозитории
+# нет: он создаётся локально (--backend mysql ... --update-baseline) на той же
+# машине, на которой потом выполняются сравнения.
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from settings import Settings  # noqa: E402
+from benchmarks.stand_in import (  # noqa: E402
+    WORDS, build_snapshot, configure_settings, seed_mysql, seed_search_log, use_snapshot_backend
+)
+
+# Каталог базовых линий (python benchmarks/suite.py --backend ... --update-baseline)
+BASELINE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def baseline_path(backend: str) -> str:
+    """
+    Путь к базовой линии бэкенда.
+    :param backend: 'mysql' или 'snapshot'
+    :return: Путь к файлу
+    """
+    return os.path.join(BASELINE_DIR, f'baseline-{backend}.json')
+
+
+def _percentile(ordered: list[float], percent: float) -> float:
+    """
+    Перцентиль по отсортированному списку (метод ближайшего ранга).
+    :param ordered: Отсортированные значения
+    :param percent: Перцентиль от 0 до 100
+    :return: Значение перцентиля
+    """
+    index = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def measure(func, iterations: int) -> dict:
+    """
+    Замерить задержку, пропускную способность и пиковую память функции.
+    :param func: Функция, принимающая номер итерации
+    :param iterations: Количество вызовов
+    :return: dict
+    """
+    func(0)  # прогрев: соединения, кэш справочных данных
+    samples = []
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    for i in range(iterations):
+        call_started = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - call_started)
+    total = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    samples.sort()
+    return {
+        'iterations': iterations,
+        'p50_ms': round(_percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(_percentile(samples, 95) * 1000, 3),
+        'p99_ms': round(_percentile(samples, 99) * 1000, 3),
+        'throughput_ops': round(iterations / total, 1) if total else None,
+        'peak_memory_kb': round(peak / 1024, 1)
+    }
+
+
+# Сценарии, которым нужен сервер MySQL и при SEARCH_BACKEND=snapshot
+# (--backend snapshot) они не выполняются: таблица films и индекс нечёткого поиска
+MYSQL_ONLY_CASES = ('find_film_by_key', 'find_films_fuzzy')
+
+
+def build_cases(db, films: int) -> dict:
+    """
+    Набор сценариев: по одному или несколько на каждую публичную функцию поиска и статистики.
+    Служебные функции (обслуживание лога, выгрузка снимка, прогрев кэшей) не замеряются.
+    :param db: Модуль db
+    :param films: Количество фильмов в базе (для выбора ключей find_film_by_key)
+    :return: Словарь {имя: функция(i)}
+    """
+    genres = ['Action', 'Comedy', 'Drama', 'Sci-Fi', 'Horror']
+    keywords = [word.lower() for word in WORDS]
+    letters = 'ABCDEFGHIJKLMNOPRSTW'
+    # Опечатка: пропущена вторая буква ("acdemy" вместо "academy")
+    typos = [word[0] + word[2:] for word in keywords if len(word) > 4]
+    week_ago = datetime.utcnow() - timedelta(days=7)
+
+    def keyword(i: int) -> str:
+        return keywords[i % len(keywords)]
+
+    def genre_pair(i: int) -> list[str]:
+        return [genres[i % len(genres)], genres[(i + 1) % len(genres)]]
+
+    def year_ranges(i: int) -> list[tuple[int, int]]:
+        return [(1995 + i % 10, 2000 + i % 10), (2010, 2015)]
+
+    def second_page(find_page, *args) -> None:
+        _, token = find_page(*args)
+        if token:
+            find_page(*args, page_token=token)
+
+    return {
+        'find_film_by_key': lambda i: db.find_film_by_key(str(i % films + 1)),
+        'find_films_by_keyword': lambda i: db.find_films_by_keyword(keyword(i)),
+        'find_films_fuzzy': lambda i: db.find_films_fuzzy(typos[i % len(typos)]),
+        'find_films_by_criteria': lambda i: db.find_films_by_criteria(genres[i % len(genres)], 2000, 2010),
+        'find_films_by_criteria_years_only': lambda i: db.find_films_by_criteria(None, 1995 + i % 10, 2005 + i % 10),
+        'find_films_by_criteria_multi': lambda i: db.find_films_by_criteria(genre_pair(i), year_ranges=year_ranges(i)),
+        'find_films_by_first_letter': lambda i: db.find_films_by_first_letter(letters[i % len(letters)]),
+        'find_films_by_keyword_page': lambda i: db.find_films_by_keyword_page(keyword(i)),
+        'find_films_by_keyword_page_2': lambda i: second_page(db.find_films_by_keyword_page, keyword(i)),
+        'find_films_by_criteria_page': lambda i: db.find_films_by_criteria_page(genres[i % len(genres)]),
+        'find_films_by_criteria_page_multi': lambda i: db.find_films_by_criteria_page(
+            genre_pair(i), year_ranges=year_ranges(i)
+        ),
+        'find_films_by_first_letter_page': lambda i: db.find_films_by_first_letter_page(letters[i % len(letters)]),
+        'find_films_by_prefix': lambda i: db.find_films_by_prefix(keyword(i)[:3]),
+        'find_films_by_prefix_page_2': lambda i: second_page(db.find_films_by_prefix, keyword(i)[:2]),
+        'iter_films_by_keyword': lambda i: sum(1 for _ in db.iter_films_by_keyword(keyword(i))),
+        'iter_films_by_criteria': lambda i: sum(1 for _ in db.iter_films_by_criteria(genre_pair(i), 2000, 2010)),
+        'iter_films_by_first_letter': lambda i: sum(1 for _ in db.iter_films_by_first_letter(letters[i % len(letters)])),
+        'search_many_10': lambda i: db.search_many(
+            [{'type': 'keyword', 'keyword': keyword(i + k)} for k in range(10)]
+        ),
+        'search_many_mixed_10': lambda i: db.search_many(
+            [{'type': 'keyword', 'keyword': keyword(i + k)} for k in range(4)]
+            + [{'type': 'criteria', 'genres': genre_pair(i + k), 'year_ranges': year_ranges(i + k)} for k in range(3)]
+            + [{'type': 'first_letter', 'letter': letters[(i + k) % len(letters)]} for k in range(3)]
+        ),
+        'get_all_genres': lambda i: db.get_all_genres(),
+        'get_year_range': lambda i: db.get_year_range(),
+        'log_search_query': lambda i: db.log_search_query(keyword(i), 'keyword', i % 10),
+        'log_search_queries_10': lambda i: db.log_search_queries(
+            [(keyword(i + k), 'keyword', k) for k in range(10)]
+        ),
+        'get_popular_queries': lambda i: db.get_popular_queries(5),
+        'get_popular_queries_between': lambda i: db.get_popular_queries_between(week_ago, limit=5),
+        'get_recent_queries': lambda i: db.get_recent_queries(5),
+        'get_trending_queries': lambda i: db.get_trending_queries('hour', 5),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Сравнить p95 с базовой линией.
+    :param results: Текущие результаты
+    :param baseline: Результаты базовой линии
+    :param tolerance: Допустимый относительный рост (0.2 = +20%)
+    :return: Список описаний регрессий
+    """
+    regressions = []
+    for name, current in results['functions'].items():
+        previous = baseline.get('functions', {}).get(name)
+        if not previous or not previous.get('p95_ms'):
+            continue
+        limit = previous['p95_ms'] * (1 + tolerance)
+        if current['p95_ms'] > limit:
+            regressions.append(f"{name}: p95 {current['p95_ms']} мс > {previous['p95_ms']} мс (+{tolerance:.0%})")
+    return regressions
+
+
+def incompatibilities(results: dict, baseline: dict) -> list[str]:
+    """
+    Различия масштаба и настроек, при которых сравнение с базовой линией бессмысленно.
+    :param results: Текущие результаты
+    :param baseline: Результаты базовой линии
+    :return: Список описаний различий (пустой — прогоны сравнимы)
+    """
+    return [
+        f"{section}: {results.get(section)} != {baseline.get(section)}"
+        for section in ('scale', 'config')
+        if results.get(section) != baseline.get(section)
+    ]
+
+
+def comparison_report(results: dict, baseline: dict) -> list[str]:
+    """
+    Построчный отчёт об изменении p95 относительно базовой линии, включая
+    сценарии, которых нет в одном из наборов.
+    :param results: Текущие результаты
+    :param baseline: Результаты базовой линии
+    :return: Список строк отчёта
+    """
+    lines = []
+    current, previous = results['functions'], baseline.get('functions', {})
+    for name in sorted(set(current) | set(previous)):
+        if name not in previous:
+            lines.append(f"{name}: нет в базовой линии (p95 {current[name]['p95_ms']} мс)")
+        elif name not in current:
+            lines.append(f"{name}: не замерялся")
+        elif previous[name].get('p95_ms'):
+            change = current[name]['p95_ms'] / previous[name]['p95_ms'] - 1
+            lines.append(f"{name}: p95 {previous[name]['p95_ms']} -> {current[name]['p95_ms']} мс ({change:+.0%})")
+    return lines
+
+
+def run(args: argparse.Namespace) -> dict:
+    """
+    Подготовить данные и выполнить замеры.
+    :param args: Аргументы командной строки
+    :return: Результаты замеров
+    """
+    configure_settings(args.mongo)
+    Settings.SEARCH_CACHE_ENABLED = args.with_cache
+    Settings.SEARCH_INDEX_ENABLED = False
+    Settings.MYSQL_POOL_MAX_SIZE = max(Settings.MYSQL_POOL_MAX_SIZE, Settings.BATCH_MAX_WORKERS)
+    if args.backend == 'snapshot':
+        # Снимок строится из тех же синтетических фильмов, что и seed_mysql
+        build_snapshot(args.films, args.snapshot_dir, args.seed)
+        use_snapshot_backend(args.snapshot_dir)
+    import db
+
+    if args.seed_data and args.backend == 'mysql':
+        seed_mysql(args.films, args.seed)
+    # Коллекция логов живёт в памяти mongomock, поэтому заполняется при каждом запуске
+    if args.seed_data or args.mongo == 'mock':
+        seed_search_log(args.log_entries, args.seed)
+
+    tracemalloc.start()
+    results = {
+        'scale': {'films': args.films, 'log_entries': args.log_entries, 'seed': args.seed},
+        'config': {'backend': args.backend, 'mongo': args.mongo, 'cache': args.with_cache,
+                   'iterations': args.iterations},
+        'functions': {}
+    }
+    for name, case in build_cases(db, args.films).items():
+        if args.backend == 'snapshot' and name in MYSQL_ONLY_CASES:
+            continue
+        results['functions'][name] = measure(case, args.iterations)
+        print(f"{name}: {results['functions'][name]}", file=sys.stderr)
+    tracemalloc.stop()
+    db.close_all_connections()
+    return results
+
+
+def main() -> None:
+    """
+    Выполнить замеры (или взять готовые из --compare), вывести JSON и сравнить с базовой линией.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(description="Замеры публичных функций db.py")
+    parser.add_argument('--films', type=int, default=10000, help="масштаб: количество фильмов (1000..1000000)")
+    parser.add_argument('--log-entries', type=int, default=50000, help="размер коллекции логов поиска")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--seed-data', action='store_true', help="пересоздать синтетические данные в MySQL")
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--backend', choices=('mysql', 'snapshot'), default='mysql',
+                        help="snapshot — поиск по колоночному снимку, сервер MySQL не нужен")
+    parser.add_argument('--snapshot-dir', default=os.path.join('cache', 'bench_snapshot'))
+    parser.add_argument('--mongo', choices=('mock', 'local'), default='mock')
+    parser.add_argument('--with-cache', action='store_true', help="не отключать кэш результатов")
+    parser.add_argument('--output', help="файл для результатов JSON (по умолчанию stdout)")
+    parser.add_argument('--baseline', nargs='?', const='',
+                        help="сравнить с базовой линией (без пути — baseline-<backend>.json для бэкенда прогона)")
+    parser.add_argument('--compare', metavar='RESULTS',
+                        help="не выполнять замеры, а сравнить готовый файл результатов с базовой линией")
+    parser.add_argument('--update-baseline', action='store_true', help="записать результаты в baseline-<backend>.json")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            results = json.load(f)
+        if args.baseline is None:
+            args.baseline = ''
+    else:
+        results = run(args)
+        output = json.dumps(results, ensure_ascii=False, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+        else:
+            print(output)
+        if args.update_baseline:
+            with open(baseline_path(args.backend), 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+
+    if args.baseline is not None:
+        path = args.baseline or baseline_path(results['config']['backend'])
+        if not os.path.exists(path):
+            print(f"Нет базовой линии {path}: создайте её прогоном с --update-baseline", file=sys.stderr)
+            sys.exit(2)
+        with open(path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        differences = incompatibilities(results, baseline)
+        if differences:
+            for difference in differences:
+                print(f"НЕСРАВНИМО с {path}: {difference}", file=sys.stderr)
+            sys.exit(2)
+        for line in comparison_report(results, baseline):
+            print(line, file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"РЕГРЕССИЯ: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# Модуль кэша результатов поиска (TTL + LRU)
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Маркер отсутствующего значения в кэше
+_MISSING = object()
+
+
+def normalize_text(text: str | None) -> str:
+    """
+    Нормализовать поисковый текст: обрезать и схлопнуть пробелы.
+    :param text: Исходный текст
+    :return: Нормализованный текст
+    """
+    if text is None:
+        return ''
+    return ' '.join(text.split())
+
+
+def text_key(text: str | None) -> str:
+    """
+    Ключ кэша для текста: нормализация пробелов без учёта регистра.
+    :param text: Исходный текст
+    :return: Ключ
+    """
+    return normalize_text(text).casefold()
+
+
+def genre_key(genre: str | None) -> str:
+    """
+    Ключ жанра без учёта регистра, пробелов и знаков ("Sci-Fi" == "sci fi" == "SCIFI").
+    :param genre: Название жанра
+    :return: Ключ
+    """
+    if genre is None:
+        return ''
+    return re.sub(r'[\W_]+', '', genre.casefold())
+
+
+class TTLCache:
+    """
+    Потокобезопасный кэш с ограниченным размером, вытеснением по LRU
+    и временем жизни записей. Ведёт счётчики попаданий, промахов и вытеснений.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 300.0):
+        """
+        :param max_size: Максимальное количество записей
+        :param ttl: Время жизни записи в секундах
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0}
+
+    def get(self, key, default=None):
+        """
+        Получить значение по ключу, если оно есть и не устарело.
+        :param key: Ключ
+        :param default: Значение по умолчанию
+        :return: Значение из кэша или default
+        """
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                expires_at, value = item
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return value
+                del self._data[key]
+                self._stats['expired'] += 1
+            self._stats['misses'] += 1
+            return default
+
+    def set(self, key, value) -> None:
+        """
+        Сохранить значение, вытеснив самую давно использованную запись при переполнении.
+        :param key: Ключ
+        :param value: Значение
+        :return: None
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def get_or_load(self, key, loader):
+        """
+        Получить значение из кэша или вычислить его через loader и сохранить.
+        Исключения loader не кэшируются.
+        :param key: Ключ
+        :param loader: Функция без аргументов, возвращающая значение
+        :return: Значение
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, predicate=None) -> int:
+        """
+        Удалить записи из кэша.
+        :param predicate: Функция (key) -> bool; если None, кэш очищается полностью
+        :return: Количество удалённых записей
+        """
+        with self._lock:
+            if predicate is None:
+                removed = len(self._data)
+                self._data.clear()
+                return removed
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def stats(self) -> dict:
+        """
+        Счётчики кэша и доля попаданий.
+        :return: dict
+        """
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            hit_rate = self._stats['hits'] / lookups if lookups else 0.0
+            return dict(self._stats, size=len(self._data), max_size=self.max_size,
+                        ttl=self.ttl, hit_rate=round(hit_rate, 4))
@@ -0,0 +1,142 @@
+# Модуль автоматических выключателей (circuit breaker) для обращений к базам данных
+#
+# Состояния выключателя:
+#   closed    — запросы выполняются; подряд идущие сбои соединения считаются;
+#   open      — после failure_threshold сбоев подряд запросы сразу отклоняются
+#               (CircuitOpenError), не дожидаясь таймаутов драйвера;
+#   half_open — через reset_timeout секунд пропускается один пробный запрос:
+#               успех закрывает выключатель, сбой снова открывает его.
+import threading
+import time
+from contextlib import contextmanager
+
+from logger import logger
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """
+    Сервер считается недоступным: запрос отклонён без обращения к нему.
+    """
+
+
+class CircuitBreaker:
+    """
+    Потокобезопасный выключатель для одного сервера (MySQL или MongoDB).
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        """
+        :param name: Имя сервера (для сообщений и статистики)
+        :param failure_threshold: Сколько сбоев подряд открывают выключатель
+        :param reset_timeout: Через сколько секунд после открытия пропустить пробный запрос
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._last_error = None
+        self._stats = {'rejected': 0, 'failures': 0, 'opened': 0}
+
+    @property
+    def state(self) -> str:
+        """
+        Текущее состояние: 'closed', 'open' или 'half_open'.
+        :return: str
+        """
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def check(self) -> None:
+        """
+        Разрешить запрос или отклонить его, если сервер считается недоступным.
+        :return: None
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            retry_in = self._opened_at + self.reset_timeout - time.monotonic()
+            if self._state == OPEN and retry_in <= 0:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                # Пробный запрос: остальные отклоняются, пока он не завершится
+                self._trial_in_flight = True
+                return
+            self._stats['rejected'] += 1
+        raise CircuitOpenError(
+            f"{self.name} недоступен ({self._last_error}); повторная попытка через {max(0.0, retry_in):.0f} с"
+        )
+
+    def record_success(self) -> None:
+        """
+        Отметить успешное обращение: сбросить счётчик сбоев и закрыть выключатель.
+        :return: None
+        """
+        with self._lock:
+            if self._state != CLOSED:
+                logger.warning(f"{self.name} снова доступен")
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self, error: Exception) -> None:
+        """
+        Отметить сбой соединения; после failure_threshold сбоев подряд (или сбоя
+        пробного запроса) открыть выключатель.
+        :param error: Исключение драйвера
+        :return: None
+        """
+        with self._lock:
+            self._failures += 1
+            self._stats['failures'] += 1
+            self._last_error = error
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._stats['opened'] += 1
+                    logger.error(f"{self.name} недоступен, запросы отклоняются {self.reset_timeout:.0f} с: {error}")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    @contextmanager
+    def guard(self, errors: tuple):
+        """
+        Выполнить блок под защитой выключателя.
+        Исключения из errors считаются сбоями сервера; остальные (ошибка SQL,
+        закрытие генератора) означают, что сервер ответил.
+        :param errors: Классы исключений, означающих недоступность сервера
+        :return: контекстный менеджер
+        """
+        self.check()
+        try:
+            yield
+        except errors as e:
+            self.record_failure(e)
+            raise
+        except BaseException:
+            self.record_success()
+            raise
+        self.record_success()
+
+    def stats(self) -> dict:
+        """
+        Состояние и счётчики выключателя.
+        :return: dict
+        """
+        state = self.state
+        with self._lock:
+            return dict(
+                self._stats,
+                state=state,
+                consecutive_failures=self._failures,
+                last_error=str(self._last_error) if self._last_error else None
+            )
@@ -1,51 +1,250 @@
-import pymysql
-from pymongo import MongoClient
+from lazy import lazy_import
 from settings import settings
-from datetime import datetime
+from datetime import datetime, timedelta
+import base64
 import json
+import threading
+import time
 from logger import logger
+from contextlib import contextmanager
+from cache import TTLCache, genre_key, normalize_text, text_key
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from log_writer import BufferedLogWriter
+from metadata_cache import MetadataCache
+from metrics import instrumented, metrics, timed_execute
+from mysql_pool import ConnectionPool
+from search_index import SearchIndex
+from spill_file import SpillFile
+from fuzzy_index import FuzzyTitleIndex
+from prefix_index import PrefixIndex
+from trending import TrendingTracker
+
+# Драйверы БД загружаются при первом подключении: импорт pymongo и pymysql
+# занимает больше времени, чем весь остальной запуск приложения
+pymysql = lazy_import('pymysql')
+pymongo = lazy_import('pymongo')
+# Класс клиента MongoDB; None — pymongo.MongoClient (замеры подставляют mongomock)
+MongoClient = None
 
 # Глобальные переменные для кэширования соединений
 _mongo_client = None
 _mongo_db = None
-_mysql_connection = None
+_mongo_lock = threading.Lock()
+_mysql_pool = None
+_mysql_pool_lock = threading.Lock()
+_log_writer = None
+_log_writer_lock = threading.Lock()
+_log_spill = None
+# Автоматические выключатели по серверам: имя -> CircuitBreaker
+_breakers = {}
+_popular_indexes_ready = False
+# Приращения популярных запросов, не записанные из-за сбоя: query -> итоги
+_popular_pending = {}
+_popular_pending_lock = threading.Lock()
+
+# Приближённые популярные запросы за последний час и сутки
+_trending = None
+_trending_restored = False
+_trending_saved_at = 0.0
+_trending_lock = threading.Lock()
+
+# Состояние in-memory поискового индекса
+_search_index = None
+_search_index_checked_at = 0.0
+_search_index_lock = threading.Lock()
+_search_index_rebuilding = False
+
+# Индекс нечёткого поиска по названиям
+_fuzzy_index = None
+_fuzzy_index_checked_at = 0.0
+_fuzzy_index_lock = threading.Lock()
+
+# Префиксный индекс по названиям
+_prefix_index = None
+_prefix_index_checked_at = 0.0
+_prefix_index_lock = threading.Lock()
+_prefix_index_refreshing = False
+
+# Колоночный снимок фильмов (SEARCH_BACKEND=snapshot)
+_snapshot_engine = None
+_snapshot_stale = False
+_snapshot_checked_at = None
+_snapshot_lock = threading.Lock()
+
+# Кэш результатов поиска
+_search_cache = None
+# Кэш справочных данных; обновляется при изменении MAX(last_update)
+_metadata_cache = None
+# Кэши и счётчики создаются при первом использовании, чтобы импорт модуля
+# не читал настройки (и .env)
+_lazy_init_lock = threading.Lock()
+
+
+def _get_search_cache() -> TTLCache:
+    """
+    Получить (и при необходимости создать) кэш результатов поиска.
+    :return: TTLCache
+    """
+    global _search_cache
+    if _search_cache is None:
+        with _lazy_init_lock:
+            if _search_cache is None:
+                _search_cache = TTLCache(settings.SEARCH_CACHE_MAX_SIZE, settings.SEARCH_CACHE_TTL)
+    return _search_cache
+
+
+def _get_trending() -> TrendingTracker:
+    """
+    Получить (и при необходимости создать) счётчики трендов запросов.
+    :return: TrendingTracker
+    """
+    global _trending
+    if _trending is None:
+        with _lazy_init_lock:
+            if _trending is None:
+                _trending = TrendingTracker(settings.TRENDING_CAPACITY)
+    return _trending
+
+
+def _get_metadata_cache() -> MetadataCache:
+    """
+    Получить (и при необходимости создать) кэш жанров и диапазона годов.
+    :return: MetadataCache
+    """
+    global _metadata_cache
+    if _metadata_cache is None:
+        with _lazy_init_lock:
+            if _metadata_cache is None:
+                _metadata_cache = MetadataCache(
+                    _load_metadata_version, _load_metadata, settings.METADATA_REFRESH_INTERVAL
+                )
+    return _metadata_cache
+
+
+def _get_breaker(name: str) -> CircuitBreaker:
+    """
+    Получить (и при необходимости создать) выключатель сервера.
+    :param name: Имя сервера ('MySQL' или 'MongoDB')
+    :return: CircuitBreaker
+    """
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _lazy_init_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    name, settings.BREAKER_FAILURE_THRESHOLD, settings.BREAKER_RESET_TIMEOUT
+                )
+                _breakers[name] = breaker
+    return breaker
+
+
+def _mysql_guard():
+    """
+    Защитить обращение к MySQL выключателем: сбои соединения и таймауты
+    считаются, при открытом выключателе сразу бросается CircuitOpenError.
+    :return: контекстный менеджер
+    """
+    return _get_breaker('MySQL').guard((pymysql.err.OperationalError, pymysql.err.InterfaceError, OSError))
+
+
+def _mongo_guard():
+    """
+    Защитить обращение к MongoDB выключателем (без ожидания serverSelectionTimeoutMS,
+    если сервер уже признан недоступным).
+    :return: контекстный менеджер
+    """
+    return _get_breaker('MongoDB').guard((pymongo.errors.ConnectionFailure, OSError))
+
+
+def is_backend_error(error: Exception) -> bool:
+    """
+    Проверить, вызвана ли ошибка недоступностью сервера (MySQL, MongoDB, файлы
+    снимка), а не самим запросом.
+    :param error: Исключение
+    :return: bool
+    """
+    return isinstance(error, (
+        CircuitOpenError, OSError, pymysql.err.OperationalError, pymysql.err.InterfaceError,
+        pymongo.errors.PyMongoError
+    ))
+
+
+def get_backend_status() -> dict:
+    """
+    Состояние выключателей серверов ('closed' — доступен, 'open' — запросы отклоняются).
+    :return: Словарь {имя сервера: статистика выключателя}
+    """
+    return {name: breaker.stats() for name, breaker in _breakers.items()}
 
 
 def initialize_mongo() -> object:
     """
     Инициализация соединения с MongoDB для логов и статистики с кэшированием.
+    Клиент создаётся один раз: пул соединений и мониторинг сервера ведёт сам
+    драйвер, поэтому ping перед каждой операцией не выполняется.
     :return: объект базы данных MongoDB
     """
     global _mongo_client, _mongo_db
-    if _mongo_client is not None and _mongo_db is not None:
-        try:
-            _mongo_client.admin.command('ping')
-            return _mongo_db
-        except Exception:
-            _mongo_client = None
-            _mongo_db = None
-    # Создаём новое соединение
-    connection_string = settings.get_mongo_connection_string()
-    _mongo_client = MongoClient(connection_string)
-    _mongo_db = _mongo_client[settings.MONGO_DB_NAME]
+    if _mongo_db is None:
+        with _mongo_lock:
+            if _mongo_db is None:
+                connection_string = settings.get_mongo_connection_string()
+                client_class = MongoClient or pymongo.MongoClient
+                _mongo_client = client_class(connection_string, **settings.get_mongo_client_options())
+                _mongo_db = _mongo_client[settings.MONGO_DB_NAME]
     return _mongo_db
 
 
-def initialize_mysql() -> object:
+def _get_log_collection():
     """
-    Инициализация соединения с MySQL для фильмов с кэшированием.
-    :return: объект соединения MySQL
+    Коллекция логов поиска с write concern из настроек (w=0 — запись без подтверждения).
+    :return: коллекция MongoDB
     """
-    global _mysql_connection
-    if _mysql_connection is not None:
-        try:
-            _mysql_connection.ping(reconnect=True)
-            return _mysql_connection
-        except Exception:
-            _mysql_connection = None
-    config = settings.get_mysql_config()
-    _mysql_connection = pymysql.connect(**config)
-    return _mysql_connection
+    mongo_db = initialize_mongo()
+    write_concern = pymongo.WriteConcern(w=settings.MONGO_LOG_WRITE_CONCERN)
+    return mongo_db.get_collection(settings.MONGO_COLLECTION_NAME, write_concern=write_concern)
+
+
+def initialize_mysql() -> ConnectionPool:
+    """
+    Инициализация пула соединений с MySQL для фильмов (создаётся один раз).
+    :return: пул соединений MySQL
+    """
+    global _mysql_pool
+    if _mysql_pool is None:
+        with _mysql_pool_lock:
+            if _mysql_pool is None:
+                config = settings.get_mysql_config()
+                pool = ConnectionPool(
+                    lambda: pymysql.connect(**config),
+                    **settings.get_mysql_pool_config()
+                )
+                pool.prefill()
+                _mysql_pool = pool
+    return _mysql_pool
+
+
+@contextmanager
+def mysql_connection():
+    """
+    Взять соединение из пула MySQL на время блока with.
+    Пока MySQL признан недоступным, сразу бросается CircuitOpenError.
+    :return: контекстный менеджер, отдающий соединение
+    """
+    with _mysql_guard():
+        with initialize_mysql().connection() as connection:
+            yield connection
+
+
+def get_mysql_pool_stats() -> dict:
+    """
+    Получить статистику пула соединений MySQL (размер, занятые, время ожидания).
+    :return: dict
+    """
+    if _mysql_pool is None:
+        return {}
+    return _mysql_pool.stats()
 
 
 def close_all_connections() -> None:
@@ -53,119 +252,1173 @@ def close_all_connections() -> None:
     Закрыть все соединения с базами данных и очистить кэш.
     :return: None
     """
-    global _mongo_client, _mongo_db, _mysql_connection
+    global _mongo_client, _mongo_db, _mysql_pool, _log_writer
+    # Сначала дописываем накопленные логи, пока соединение с MongoDB открыто
+    if _log_writer:
+        _log_writer.close()
+        _log_writer = None
+    if _mongo_db is not None:
+        try:
+            with _mongo_guard():
+                _save_trending(_mongo_db, force=True)
+        except Exception as e:
+            logger.error(f"Ошибка сохранения счётчиков трендов: {e}")
     if _mongo_client:
         _mongo_client.close()
         _mongo_client = None
         _mongo_db = None
-    if _mysql_connection:
-        _mysql_connection.close()
-        _mysql_connection = None
+    if _mysql_pool:
+        _mysql_pool.close()
+        _mysql_pool = None
+    if settings.METRICS_PROMETHEUS_FILE:
+        try:
+            metrics.dump_prometheus(settings.METRICS_PROMETHEUS_FILE)
+        except Exception as e:
+            logger.error(f"Ошибка записи метрик: {e}")
 
 # =====================================================
 # ФУНКЦИИ ДЛЯ MONGODB (Логи и статистика)
 # =====================================================
 
+@instrumented()
+def _write_log_entries(entries: list[dict]) -> None:
+    """
+    Записать пачку логов поиска в MongoDB одним запросом и обновить агрегаты.
+    Исключение бросается только при сбое записи самого лога: после сбоя
+    обновления агрегатов записи уже сохранены и повторно не отправляются.
+    :param entries: Список записей лога
+    :return: None
+    """
+    with _mongo_guard():
+        collection = _get_log_collection()
+        collection.insert_many(entries, ordered=False)
+    _update_log_aggregates(collection.database, entries)
+
+
+def _update_log_aggregates(mongo_db, entries: list[dict]) -> None:
+    """
+    Обновить счётчики популярных запросов и снимок трендов после записи пачки.
+    Если инкрементальное обновление счётчиков не удалось, приращения пачки
+    (при BulkWriteError — только не применённые операции) откладываются и
+    повторяются вместе со следующей пачкой.
+    :param mongo_db: База данных MongoDB
+    :param entries: Список записанных записей лога
+    :return: None
+    """
+    global _popular_pending
+    with _popular_pending_lock:
+        totals, _popular_pending = _popular_pending, {}
+    _fold_popular_totals(totals, entries)
+    try:
+        with _mongo_guard():
+            _update_popular_rollup(mongo_db, totals)
+    except Exception as e:
+        failed = _failed_popular_totals(totals, e)
+        with _popular_pending_lock:
+            for query, total in failed.items():
+                _add_popular_total(_popular_pending, query, total)
+        logger.error(f"Ошибка обновления популярных запросов (повтор для {len(failed)} запрос(ов) "
+                     f"со следующей пачкой): {e}")
+    try:
+        with _mongo_guard():
+            _save_trending(mongo_db)
+    except Exception as e:
+        logger.error(f"Ошибка сохранения снимка трендов: {e}")
+
+
+def _get_log_spill() -> SpillFile | None:
+    """
+    Получить spill-файл для логов, не записанных в MongoDB.
+    :return: SpillFile или None, если LOG_SPILL_PATH пуст
+    """
+    global _log_spill
+    if _log_spill is None and settings.LOG_SPILL_PATH:
+        with _lazy_init_lock:
+            if _log_spill is None:
+                _log_spill = SpillFile(settings.LOG_SPILL_PATH, int(settings.LOG_SPILL_MAX_MB * 1024 * 1024))
+    return _log_spill
+
+
+def _persist_log_entries(entries: list[dict]) -> None:
+    """
+    Записать пачку логов в MongoDB, а если она недоступна — в spill-файл.
+    После успешной записи сохранённые ранее записи досылаются в MongoDB.
+    :param entries: Список записей лога
+    :return: None
+    """
+    spill = _get_log_spill()
+    try:
+        _write_log_entries(entries)
+    except Exception as e:
+        if spill is None:
+            raise
+        spill.append(entries)
+        logger.error(f"Логи поиска ({len(entries)} шт.) сохранены в {spill.path}: {e}")
+        return
+    if spill is not None and spill.pending():
+        try:
+            replayed = spill.replay(_write_log_entries, batch_size=max(settings.LOG_BATCH_SIZE, 500))
+            if replayed:
+                logger.warning(f"MongoDB снова доступна, дослано записей лога из {spill.path}: {replayed}")
+        except Exception as e:
+            logger.error(f"Ошибка досылки логов из {spill.path}: {e}")
+
+
+def _ensure_popular_indexes(mongo_db) -> None:
+    """
+    Создать индекс по счётчику в коллекции популярных запросов (один раз за запуск).
+    :param mongo_db: База данных MongoDB
+    :return: None
+    """
+    global _popular_indexes_ready
+    if not _popular_indexes_ready:
+        mongo_db[settings.get_popular_collection_name()].create_index([('count', -1)])
+        _popular_indexes_ready = True
+
+
+def _add_popular_total(totals: dict, query: str, total: dict) -> None:
+    """
+    Прибавить итоги по запросу к словарю итогов.
+    :param totals: Словарь query -> {'count', 'search_type', 'last_searched'}
+    :param query: Текст запроса
+    :param total: Итоги по запросу
+    :return: None
+    """
+    current = totals.get(query)
+    if current is None:
+        totals[query] = dict(total)
+    else:
+        current['count'] += total['count']
+        current['last_searched'] = max(current['last_searched'], total['last_searched'])
+
+
+def _fold_popular_totals(totals: dict, entries: list[dict]) -> dict:
+    """
+    Свернуть записи лога в итоги по запросам, чтобы на каждый запрос
+    приходилась одна операция обновления.
+    :param totals: Словарь итогов, в который добавляются записи
+    :param entries: Список записей лога
+    :return: Тот же словарь totals
+    """
+    for entry in entries:
+        _add_popular_total(totals, entry['query'], {
+            'count': 1,
+            'search_type': entry['search_type'],
+            'last_searched': entry['timestamp']
+        })
+    return totals
+
+
+def _failed_popular_totals(totals: dict, error: Exception) -> dict:
+    """
+    Итоги, которые не были записаны при сбое _update_popular_rollup.
+    Для BulkWriteError это только операции из writeErrors (остальные уже
+    применены, и повтор удвоил бы их счётчики), для прочих ошибок — все.
+    :param totals: Итоги, переданные в _update_popular_rollup
+    :param error: Исключение
+    :return: Словарь query -> итоги
+    """
+    if not isinstance(error, pymongo.errors.BulkWriteError):
+        return totals
+    failed = {item['index'] for item in error.details.get('writeErrors', [])}
+    return {query: total for index, (query, total) in enumerate(totals.items()) if index in failed}
+
+
+def _update_popular_rollup(mongo_db, totals: dict) -> None:
+    """
+    Инкрементально обновить счётчики популярных запросов ($inc с upsert).
+    Операции идут в порядке totals, чтобы индексы writeErrors совпадали с ним.
+    :param mongo_db: База данных MongoDB
+    :param totals: Итоги по запросам (см. _fold_popular_totals)
+    :return: None
+    """
+    operations = [
+        pymongo.UpdateOne(
+            {'_id': query},
+            {
+                '$inc': {'count': total['count']},
+                '$max': {'last_searched': total['last_searched']},
+                '$setOnInsert': {'search_type': total['search_type']}
+            },
+            upsert=True
+        )
+        for query, total in totals.items()
+    ]
+    if operations:
+        _ensure_popular_indexes(mongo_db)
+        write_concern = pymongo.WriteConcern(w=settings.MONGO_LOG_WRITE_CONCERN)
+        popular = mongo_db.get_collection(settings.get_popular_collection_name(), write_concern=write_concern)
+        popular.bulk_write(operations, ordered=False)
+
+
+def _restore_trending(mongo_db) -> None:
+    """
+    Один раз за запуск объединить счётчики трендов с сохранённым в MongoDB снимком.
+    :param mongo_db: База данных MongoDB
+    :return: None
+    """
+    global _trending_restored
+    if _trending_restored:
+        return
+    with _trending_lock:
+        if _trending_restored:
+            return
+        document = mongo_db[settings.get_log_aggregate_collection_name('trending')].find_one({'_id': 'state'})
+        if document:
+            _get_trending().merge_document(document)
+        _trending_restored = True
+
+
+def _save_trending(mongo_db, force: bool = False) -> None:
+    """
+    Сохранить снимок счётчиков трендов в MongoDB не чаще TRENDING_SNAPSHOT_INTERVAL секунд.
+    Вызывается из фонового писателя логов, поэтому не задерживает поиск.
+    :param mongo_db: База данных MongoDB
+    :param force: Сохранить независимо от интервала (при завершении работы)
+    :return: None
+    """
+    global _trending_saved_at
+    now = time.monotonic()
+    if not force and now - _trending_saved_at < settings.TRENDING_SNAPSHOT_INTERVAL:
+        return
+    _restore_trending(mongo_db)
+    _trending_saved_at = now
+    mongo_db[settings.get_log_aggregate_collection_name('trending')].replace_one(
+        {'_id': 'state'}, {'_id': 'state', **_get_trending().to_document()}, upsert=True
+    )
+
+
+@instrumented()
+def get_trending_queries(window: str = 'hour', limit: int = 5) -> dict:
+    """
+    Приближённые самые популярные запросы за последний час или сутки без обращения к логу.
+    Частоты считаются алгоритмом Space-Saving: для каждого запроса указана граница
+    ошибки error (истинная частота в пределах count ± error), а любой запрос,
+    встречавшийся чаще error_bound = total / TRENDING_CAPACITY раз за корзину, не пропускается.
+    :param window: 'hour' или 'day'
+    :param limit: Количество запросов
+    :return: Словарь {'window', 'total', 'error_bound', 'items': [{'query', 'count', 'error'}]}
+    """
+    try:
+        with _mongo_guard():
+            _restore_trending(initialize_mongo())
+    except Exception as e:
+        logger.error(f"Ошибка восстановления счётчиков трендов: {e}")
+    return _get_trending().top(window, limit)
+
+
+def rebuild_popular_queries() -> int:
+    """
+    Перестроить коллекцию популярных запросов по агрегатам и сырому логу (разовый backfill).
+    Во время перестроения новые записи лога могут быть не учтены.
+    :return: Количество запросов в перестроенной коллекции
+    """
+    flush_search_log()
+    return _rebuild_popular_rollup(initialize_mongo())
+
+
+def _rebuild_popular_rollup(mongo_db) -> int:
+    """
+    Пересчитать коллекцию популярных запросов за всё время.
+    Сырой лог хранится LOG_RETENTION_DAYS дней, поэтому до watermark сжатия
+    счётчики берутся из посуточных агрегатов, а из сырого лога — только после
+    него. Результат собирается во временной коллекции и атомарно заменяет
+    популярные запросы (renameCollection), так что читатели не видят
+    частично перестроенную коллекцию.
+    :param mongo_db: База данных MongoDB
+    :return: Количество запросов в перестроенной коллекции
+    """
+    watermark = _get_compaction_watermark(mongo_db)
+    sources = [(mongo_db[settings.MONGO_COLLECTION_NAME], {}, 1, '$timestamp')]
+    if watermark is not None:
+        daily = mongo_db[settings.get_log_aggregate_collection_name('daily')]
+        sources = [
+            (daily, {'day': {'$lt': watermark}}, '$count', '$day'),
+            (sources[0][0], {'timestamp': {'$gte': watermark}}, 1, '$timestamp')
+        ]
+    totals = {}
+    for collection, match, count, last_searched in sources:
+        pipeline = [
+            {'$match': match},
+            {
+                '$group': {
+                    '_id': '$query',
+                    'count': {'$sum': count},
+                    'search_type': {'$first': '$search_type'},
+                    'last_searched': {'$max': last_searched}
+                }
+            }
+        ]
+        for row in collection.aggregate(pipeline, allowDiskUse=True):
+            _add_popular_total(totals, row.pop('_id'), row)
+    popular_name = settings.get_popular_collection_name()
+    staging = mongo_db[f"{popular_name}_rebuild"]
+    staging.drop()
+    documents = [{'_id': query, **total} for query, total in totals.items()]
+    for start in range(0, len(documents), 1000):
+        staging.insert_many(documents[start:start + 1000], ordered=False)
+    if documents:
+        staging.create_index([('count', -1)])
+        staging.rename(popular_name, dropTarget=True)
+    else:
+        mongo_db.drop_collection(popular_name)
+    return len(documents)
+
+
+def _get_log_writer() -> BufferedLogWriter:
+    """
+    Получить (и при необходимости создать) фоновый писатель логов.
+    :return: BufferedLogWriter
+    """
+    global _log_writer
+    if _log_writer is None:
+        with _log_writer_lock:
+            if _log_writer is None:
+                _log_writer = BufferedLogWriter(
+                    _persist_log_entries,
+                    max_queue_size=settings.LOG_QUEUE_MAX_SIZE,
+                    batch_size=settings.LOG_BATCH_SIZE,
+                    flush_interval=settings.LOG_FLUSH_INTERVAL,
+                    put_timeout=settings.LOG_PUT_TIMEOUT
+                )
+    return _log_writer
+
+
+def flush_search_log() -> None:
+    """
+    Дождаться записи в MongoDB всех логов, накопленных в очереди.
+    :return: None
+    """
+    if _log_writer is not None:
+        _log_writer.flush()
+
+
+def get_search_log_stats() -> dict:
+    """
+    Получить счётчики фоновой записи логов (принято, записано, отброшено и т.д.).
+    Пачки, сохранённые в spill-файл, писатель считает записанными; их счётчики — в 'spill'.
+    :return: dict
+    """
+    if _log_writer is None:
+        stats = {'enqueued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0, 'queued': 0}
+    else:
+        stats = _log_writer.stats()
+    spill = _get_log_spill()
+    if spill is not None:
+        stats['spill'] = spill.stats()
+    return stats
+
+
+def _make_log_entry(query: str, search_type: str, results_count: int) -> dict:
+    """
+    Сформировать запись лога поискового запроса.
+    :param query: Поисковый текст запроса
+    :param search_type: Тип поиска
+    :param results_count: Количество найденных результатов
+    :return: dict
+    """
+    return {
+        'query': query,
+        'search_type': search_type,
+        'timestamp': datetime.utcnow(),
+        'results_count': results_count
+    }
+
+
+@instrumented()
+def log_search_queries(entries: list[tuple[str, str, int]]) -> None:
+    """
+    Залогировать несколько поисковых запросов одной записью в MongoDB.
+    :param entries: Список кортежей (запрос, тип поиска, количество результатов)
+    :return: None
+    """
+    if not entries:
+        return
+    try:
+        log_entries = [_make_log_entry(*entry) for entry in entries]
+        for entry in log_entries:
+            _get_trending().offer(entry['query'])
+        if settings.LOG_BUFFER_ENABLED:
+            _get_log_writer().put_many(log_entries)
+            return
+        _persist_log_entries(log_entries)
+    except Exception as e:
+        print(f"Ошибка при логировании запросов: {e}")
+        logger.error(f"Ошибка при логировании запросов: {e}")
+
+
+@instrumented()
 def log_search_query(query: str, search_type: str, results_count: int) -> None:
     """
     Логировать поисковый запрос в MongoDB для сбора статистики.
+    При включённом LOG_BUFFER_ENABLED запись ставится в очередь и сохраняется
+    фоновым потоком пачками, не задерживая сам поиск.
     :param query: Поисковый текст запроса
     :param search_type: Тип поиска (ключевое слово, жанр_год)
     :param results_count: Количество найденных результатов
     :return: None
     """
     try:
-        mongo_db = initialize_mongo()
-        collection = mongo_db[settings.MONGO_COLLECTION_NAME]
-        log_entry = {
-            'query': query,
-            'search_type': search_type,
-            'timestamp': datetime.utcnow(),
-            'results_count': results_count
-        }
-        collection.insert_one(log_entry)
+        log_entry = _make_log_entry(query, search_type, results_count)
+        _get_trending().offer(query)
+        if settings.LOG_BUFFER_ENABLED:
+            _get_log_writer().put(log_entry)
+            return
+        _persist_log_entries([log_entry])
     except Exception as e:
         print(f"Ошибка при логировании запроса: {e}")
         logger.error(f"Ошибка при логировании запроса: {e}")
 
-def get_popular_queries(limit: int = 5) -> list:
+@instrumented()
+def get_popular_queries(limit: int = 5, raise_errors: bool = False) -> list:
     """
     Получить самые популярные поисковые запросы из MongoDB.
+    Читается коллекция счётчиков, которая обновляется при каждой записи лога,
+    поэтому стоимость не зависит от объёма истории.
     :param limit: Максимальное количество запросов для возврата
+    :param raise_errors: Пробросить исключение вместо пустого результата (для HTTP-сервера)
     :return: Список популярных запросов с количеством
     """
     try:
-        mongo_db = initialize_mongo()
-        collection = mongo_db[settings.MONGO_COLLECTION_NAME]
-        pipeline = [
-            {
-                '$group': {
-                    '_id': '$query',
-                    'count': {'$sum': 1},
-                    'search_type': {'$first': '$search_type'},
-                    'last_searched': {'$max': '$timestamp'}
+        flush_search_log()
+        with _mongo_guard():
+            mongo_db = initialize_mongo()
+            popular = mongo_db[settings.get_popular_collection_name()]
+            results = list(popular.find().sort('count', -1).limit(limit))
+            if results:
+                return results
+            # Счётчики ещё не заполнены (до backfill) — считаем по сырому логу
+            collection = mongo_db[settings.MONGO_COLLECTION_NAME]
+            pipeline = [
+                {
+                    '$group': {
+                        '_id': '$query',
+                        'count': {'$sum': 1},
+                        'search_type': {'$first': '$search_type'},
+                        'last_searched': {'$max': '$timestamp'}
+                    }
+                },
+                {
+                    '$sort': {'count': -1}
+                },
+                {
+                    '$limit': limit
                 }
-            },
-            {
-                '$sort': {'count': -1}
-            },
-            {
-                '$limit': limit
-            }
-        ]
-        results = list(collection.aggregate(pipeline))
-        return results
+            ]
+            results = list(collection.aggregate(pipeline))
+            return results
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Ошибка при получении популярных запросов: {e}")
         logger.error(f"Ошибка при получении популярных запросов: {e}")
         return []
 
-def get_recent_queries(limit: int = 5) -> list:
+@instrumented()
+def get_recent_queries(limit: int = 5, raise_errors: bool = False) -> list:
     """
     Получить последние поисковые запросы из MongoDB.
     :param limit: Максимальное количество запросов для возврата
+    :param raise_errors: Пробросить исключение вместо пустого результата (для HTTP-сервера)
     :return: Список последних запросов
     """
-    try:
-        mongo_db = initialize_mongo()
-        collection = mongo_db[settings.MONGO_COLLECTION_NAME]
-        results = list(collection.find()
-                      .sort('timestamp', -1)
-                      .limit(limit))
-        return results
-    except Exception as e:
-        print(f"Ошибка при получении последних запросов: {e}")
-        logger.error(f"Ошибка при получении последних запросов: {e}")
-        return []
+    try:
+        flush_search_log()
+        with _mongo_guard():
+            mongo_db = initialize_mongo()
+            collection = mongo_db[settings.MONGO_COLLECTION_NAME]
+            results = list(collection.find()
+                          .sort('timestamp', -1)
+                          .limit(limit))
+            return results
+    except Exception as e:
+        if raise_errors:
+            raise
+        print(f"Ошибка при получении последних запросов: {e}")
+        logger.error(f"Ошибка при получении последних запросов: {e}")
+        return []
+
+# =====================================================
+# ХРАНЕНИЕ И СЖАТИЕ ЛОГОВ ПОИСКА
+# =====================================================
+
+_COMPACTION_WATERMARK_ID = 'compaction_watermark'
+
+
+def _ensure_ttl_index(collection, field: str, days: int) -> str | None:
+    """
+    Создать (или перенастроить) TTL-индекс по полю даты.
+    Обычный индекс по тому же полю заменяется TTL-индексом.
+    :param collection: Коллекция MongoDB
+    :param field: Поле с датой
+    :param days: Срок хранения в днях (0 — удалить TTL и хранить бессрочно)
+    :return: Имя индекса или None
+    """
+    name = f"{field}_ttl"
+    seconds = days * 24 * 3600
+    for index_name, info in collection.index_information().items():
+        if info['key'] != [(field, -1)]:
+            continue
+        if index_name == name and info.get('expireAfterSeconds') == seconds:
+            return name
+        collection.drop_index(index_name)
+    if not days:
+        collection.create_index([(field, -1)])
+        return None
+    return collection.create_index([(field, -1)], name=name, expireAfterSeconds=seconds)
+
+
+def ensure_log_retention() -> dict:
+    """
+    Настроить сроки хранения логов поиска TTL-индексами по LOG_RETENTION_DAYS
+    и LOG_HOURLY_RETENTION_DAYS; посуточные агрегаты хранятся бессрочно.
+    :return: Словарь {коллекция: имя TTL-индекса или None}
+    """
+    mongo_db = initialize_mongo()
+    raw = mongo_db[settings.MONGO_COLLECTION_NAME]
+    hourly = mongo_db[settings.get_log_aggregate_collection_name('hourly')]
+    daily = mongo_db[settings.get_log_aggregate_collection_name('daily')]
+    hourly.create_index([('query', 1), ('hour', -1)])
+    daily.create_index([('day', -1)])
+    return {
+        raw.name: _ensure_ttl_index(raw, 'timestamp', settings.LOG_RETENTION_DAYS),
+        hourly.name: _ensure_ttl_index(hourly, 'hour', settings.LOG_HOURLY_RETENTION_DAYS),
+    }
+
+
+def _get_compaction_watermark(mongo_db) -> datetime | None:
+    """
+    Граница, до которой сырые логи уже свёрнуты в агрегаты.
+    :param mongo_db: База данных MongoDB
+    :return: datetime или None, если сжатие ещё не выполнялось
+    """
+    meta = mongo_db[settings.get_log_aggregate_collection_name('daily')].find_one({'_id': _COMPACTION_WATERMARK_ID})
+    return meta['until'] if meta else None
+
+
+def _compact_slice(mongo_db, start: datetime, end: datetime) -> int:
+    """
+    Свернуть сырые логи за полные часы [start, end) в почасовые и посуточные агрегаты.
+    Агрегаты записываются через $set, поэтому повторная обработка того же
+    интервала (например, после сбоя до сдвига watermark) не удваивает счётчики.
+    :param mongo_db: База данных MongoDB
+    :param start: Начало интервала (начало часа)
+    :param end: Конец интервала (начало часа)
+    :return: Количество обработанных сырых записей
+    """
+    raw = mongo_db[settings.MONGO_COLLECTION_NAME]
+    hourly = mongo_db[settings.get_log_aggregate_collection_name('hourly')]
+    daily = mongo_db[settings.get_log_aggregate_collection_name('daily')]
+    groups = {}
+    processed = 0
+    cursor = raw.find(
+        {'timestamp': {'$gte': start, '$lt': end}},
+        {'_id': 0, 'query': 1, 'search_type': 1, 'timestamp': 1, 'results_count': 1}
+    )
+    for entry in cursor:
+        processed += 1
+        hour = entry['timestamp'].replace(minute=0, second=0, microsecond=0)
+        key = (hour, entry['query'], entry['search_type'])
+        group = groups.setdefault(key, {'count': 0, 'results_sum': 0, 'zero_results': 0})
+        group['count'] += 1
+        group['results_sum'] += entry.get('results_count') or 0
+        group['zero_results'] += int(not entry.get('results_count'))
+    hourly_operations = [
+        pymongo.UpdateOne(
+            {'_id': {'hour': hour, 'query': query, 'search_type': search_type}},
+            {'$set': {'hour': hour, 'query': query, 'search_type': search_type, **group}},
+            upsert=True
+        )
+        for (hour, query, search_type), group in groups.items()
+    ]
+    if hourly_operations:
+        hourly.bulk_write(hourly_operations, ordered=False)
+
+    # Сутки, затронутые интервалом, пересчитываются целиком по почасовым агрегатам
+    days = sorted({hour.replace(hour=0) for hour, _, _ in groups})
+    daily_operations = []
+    for day in days:
+        totals = {}
+        for doc in hourly.find({'hour': {'$gte': day, '$lt': day + timedelta(days=1)}}):
+            total = totals.setdefault((doc['query'], doc['search_type']),
+                                      {'count': 0, 'results_sum': 0, 'zero_results': 0})
+            for field in total:
+                total[field] += doc.get(field, 0)
+        for (query, search_type), total in totals.items():
+            daily_operations.append(pymongo.UpdateOne(
+                {'_id': {'day': day, 'query': query, 'search_type': search_type}},
+                {'$set': {'day': day, 'query': query, 'search_type': search_type, **total}},
+                upsert=True
+            ))
+    if daily_operations:
+        daily.bulk_write(daily_operations, ordered=False)
+    return processed
+
+
+@instrumented()
+def compact_search_log(now: datetime = None, slice_hours: int = 24) -> dict:
+    """
+    Свернуть сырые логи поиска за завершённые часы в почасовые и посуточные агрегаты.
+    Обработка идёт от watermark порциями по slice_hours часов; watermark сдвигается
+    после каждой порции, поэтому прерванное сжатие продолжается с места остановки.
+    Запускать чаще, чем LOG_RETENTION_DAYS, чтобы записи попадали в агрегаты до удаления TTL.
+    :param now: Текущее время (UTC), для тестового запуска
+    :param slice_hours: Размер порции в часах
+    :return: Словарь {'processed', 'from', 'until'}
+    """
+    flush_search_log()
+    mongo_db = initialize_mongo()
+    ensure_log_retention()
+    now = now or datetime.utcnow()
+    until = now.replace(minute=0, second=0, microsecond=0)
+    start = _get_compaction_watermark(mongo_db)
+    if start is None:
+        oldest = mongo_db[settings.MONGO_COLLECTION_NAME].find_one(sort=[('timestamp', 1)])
+        if oldest is None:
+            return {'processed': 0, 'from': None, 'until': None}
+        start = oldest['timestamp'].replace(minute=0, second=0, microsecond=0)
+    first = start
+    processed = 0
+    meta = mongo_db[settings.get_log_aggregate_collection_name('daily')]
+    while start < until:
+        end = min(start + timedelta(hours=slice_hours), until)
+        processed += _compact_slice(mongo_db, start, end)
+        meta.update_one({'_id': _COMPACTION_WATERMARK_ID}, {'$set': {'until': end}}, upsert=True)
+        start = end
+    return {'processed': processed, 'from': first, 'until': until}
+
+
+@instrumented()
+def get_popular_queries_between(start: datetime, end: datetime = None, limit: int = 5) -> list:
+    """
+    Самые популярные запросы за период.
+    Часть периода до watermark берётся из агрегатов (почасовых, если они ещё
+    хранятся, иначе посуточных — границы тогда округляются до суток),
+    остаток после watermark считается по сырому логу.
+    :param start: Начало периода (UTC)
+    :param end: Конец периода (UTC), по умолчанию — сейчас
+    :param limit: Максимальное количество запросов
+    :return: Список словарей с ключами '_id', 'search_type', 'count'
+    """
+    try:
+        flush_search_log()
+        with _mongo_guard():
+            mongo_db = initialize_mongo()
+            end = end or datetime.utcnow()
+            watermark = _get_compaction_watermark(mongo_db) or start
+            totals = {}
+
+            def add(query: str, search_type: str, count: int) -> None:
+                total = totals.setdefault(query, {'_id': query, 'search_type': search_type, 'count': 0})
+                total['count'] += count
+
+            aggregate_end = min(end, watermark)
+            if start < aggregate_end:
+                hourly_kept = (not settings.LOG_HOURLY_RETENTION_DAYS
+                               or start >= datetime.utcnow() - timedelta(days=settings.LOG_HOURLY_RETENTION_DAYS))
+                if hourly_kept:
+                    collection, field = mongo_db[settings.get_log_aggregate_collection_name('hourly')], 'hour'
+                else:
+                    collection, field = mongo_db[settings.get_log_aggregate_collection_name('daily')], 'day'
+                pipeline = [
+                    {'$match': {field: {'$gte': start, '$lt': aggregate_end}}},
+                    {'$group': {'_id': '$query', 'search_type': {'$first': '$search_type'}, 'count': {'$sum': '$count'}}}
+                ]
+                for row in collection.aggregate(pipeline):
+                    add(row['_id'], row['search_type'], row['count'])
+
+            raw_start = max(start, watermark)
+            if raw_start < end:
+                pipeline = [
+                    {'$match': {'timestamp': {'$gte': raw_start, '$lt': end}}},
+                    {'$group': {'_id': '$query', 'search_type': {'$first': '$search_type'}, 'count': {'$sum': 1}}}
+                ]
+                for row in mongo_db[settings.MONGO_COLLECTION_NAME].aggregate(pipeline):
+                    add(row['_id'], row['search_type'], row['count'])
+
+            return sorted(totals.values(), key=lambda row: (-row['count'], row['_id']))[:limit]
+    except Exception as e:
+        print(f"Ошибка при получении популярных запросов за период: {e}")
+        logger.error(f"Ошибка при получении популярных запросов за период: {e}")
+        return []
+
+# =====================================================
+# IN-MEMORY ПОИСКОВЫЙ ИНДЕКС
+# =====================================================
+
+def _get_film_text_fingerprint() -> str:
+    """
+    Получить дешёвый отпечаток состояния film_text для проверки актуальности индекса.
+    :return: Строка-отпечаток
+    """
+    with mysql_connection() as connection:
+        cursor = connection.cursor()
+        timed_execute(cursor, "SELECT COUNT(*), MAX(film_id) FROM film_text")
+        count, max_id = cursor.fetchone()
+        timed_execute(cursor, "SELECT MAX(last_update) FROM film")
+        last_update = cursor.fetchone()[0]
+        cursor.close()
+    return f"{count}:{max_id}:{last_update}"
+
+
+def _load_film_text_rows() -> list[tuple]:
+    """
+    Прочитать все строки film_text для построения in-memory индексов.
+    :return: Список кортежей (film_id, title, description)
+    """
+    with mysql_connection() as connection:
+        cursor = connection.cursor()
+        timed_execute(cursor, "SELECT film_id, title, description FROM film_text")
+        rows = cursor.fetchall()
+        cursor.close()
+    return list(rows)
+
+
+def _film_text_rows_for(fingerprint: str) -> list[tuple]:
+    """
+    Строки film_text для построения индекса: если загружен поисковый индекс
+    с тем же отпечатком, его строки используются повторно без запроса к MySQL.
+    :param fingerprint: Отпечаток состояния таблицы
+    :return: Список кортежей (film_id, title, description)
+    """
+    search_index = _search_index
+    if search_index is not None and search_index.fingerprint == fingerprint:
+        return search_index.docs
+    return _load_film_text_rows()
+
+
+@instrumented()
+def _build_search_index(fingerprint: str) -> SearchIndex:
+    """
+    Построить поисковый индекс по film_text и сохранить его на диск.
+    :param fingerprint: Отпечаток состояния таблицы
+    :return: SearchIndex
+    """
+    rows = _load_film_text_rows()
+    index = SearchIndex.build(rows, fingerprint)
+    index.save(settings.SEARCH_INDEX_PATH)
+    return index
+
+
+def _rebuild_search_index_in_background(fingerprint: str) -> None:
+    """
+    Пересобрать устаревший индекс в фоне; пока идёт сборка, поиск идёт через MySQL.
+    :param fingerprint: Актуальный отпечаток состояния таблицы
+    :return: None
+    """
+    global _search_index, _search_index_rebuilding
+
+    def rebuild():
+        global _search_index, _search_index_rebuilding
+        try:
+            _search_index = _build_search_index(fingerprint)
+        except Exception as e:
+            logger.error(f"Ошибка перестроения поискового индекса: {e}")
+        finally:
+            _search_index_rebuilding = False
+
+    with _search_index_lock:
+        if _search_index_rebuilding:
+            return
+        _search_index_rebuilding = True
+        _search_index = None
+    threading.Thread(target=rebuild, name='search-index-rebuild', daemon=True).start()
+
+
+def warm_search_index() -> SearchIndex | None:
+    """
+    Загрузить поисковый индекс с диска или построить его заново при запуске.
+    :return: SearchIndex или None, если индекс отключён или недоступен
+    """
+    global _search_index, _search_index_checked_at
+    if not settings.SEARCH_INDEX_ENABLED:
+        return None
+    try:
+        fingerprint = _get_film_text_fingerprint()
+        index = SearchIndex.load(settings.SEARCH_INDEX_PATH)
+        if index is None or index.fingerprint != fingerprint:
+            index = _build_search_index(fingerprint)
+        _search_index = index
+        _search_index_checked_at = time.monotonic()
+        return index
+    except Exception as e:
+        print(f"Ошибка загрузки поискового индекса: {e}")
+        logger.error(f"Ошибка загрузки поискового индекса: {e}")
+        return None
+
+
+def get_search_index() -> SearchIndex | None:
+    """
+    Вернуть актуальный поисковый индекс.
+    Актуальность проверяется не чаще SEARCH_INDEX_CHECK_INTERVAL секунд;
+    если индекс устарел, возвращается None и поиск идёт через MySQL.
+    :return: SearchIndex или None
+    """
+    global _search_index_checked_at
+    if not settings.SEARCH_INDEX_ENABLED:
+        return None
+    if _search_index is None:
+        if _search_index_rebuilding:
+            return None
+        return warm_search_index()
+    now = time.monotonic()
+    if now - _search_index_checked_at < settings.SEARCH_INDEX_CHECK_INTERVAL:
+        return _search_index
+    _search_index_checked_at = now
+    try:
+        fingerprint = _get_film_text_fingerprint()
+    except Exception as e:
+        logger.error(f"Ошибка проверки актуальности поискового индекса: {e}")
+        return None
+    if fingerprint != _search_index.fingerprint:
+        _rebuild_search_index_in_background(fingerprint)
+        return None
+    return _search_index
+
+# =====================================================
+# НЕЧЁТКИЙ ПОИСК ПО НАЗВАНИЯМ
+# =====================================================
+
+@instrumented()
+def _build_fuzzy_index(fingerprint: str) -> FuzzyTitleIndex:
+    """
+    Построить BK-дерево по словам названий фильмов.
+    :param fingerprint: Отпечаток состояния таблицы
+    :return: FuzzyTitleIndex
+    """
+    return FuzzyTitleIndex(_film_text_rows_for(fingerprint), fingerprint)
+
+
+def get_fuzzy_index() -> FuzzyTitleIndex | None:
+    """
+    Вернуть индекс нечёткого поиска, построив его при первом обращении.
+    Актуальность проверяется не чаще SEARCH_INDEX_CHECK_INTERVAL секунд.
+    :return: FuzzyTitleIndex или None, если нечёткий поиск отключён или недоступен
+    """
+    global _fuzzy_index, _fuzzy_index_checked_at
+    if not settings.FUZZY_SEARCH_ENABLED:
+        return None
+    now = time.monotonic()
+    if _fuzzy_index is not None and now - _fuzzy_index_checked_at < settings.SEARCH_INDEX_CHECK_INTERVAL:
+        return _fuzzy_index
+    with _fuzzy_index_lock:
+        if _fuzzy_index is not None and now - _fuzzy_index_checked_at < settings.SEARCH_INDEX_CHECK_INTERVAL:
+            return _fuzzy_index
+        try:
+            fingerprint = _get_film_text_fingerprint()
+            if _fuzzy_index is None or _fuzzy_index.fingerprint != fingerprint:
+                _fuzzy_index = _build_fuzzy_index(fingerprint)
+            _fuzzy_index_checked_at = now
+        except Exception as e:
+            logger.error(f"Ошибка построения индекса нечёткого поиска: {e}")
+    return _fuzzy_index
+
+
+@instrumented('fuzzy')
+def find_films_fuzzy(keyword: str, limit: int = 10, raise_errors: bool = False) -> list[dict]:
+    """
+    Найти фильмы с названиями, похожими на запрос с опечатками.
+    Предлагается, когда точный поиск по ключевому слову ничего не нашёл.
+    :param keyword: Ключевое слово (возможно, с опечатками)
+    :param limit: Максимальное количество результатов
+    :param raise_errors: Пробросить исключение вместо пустого результата (для HTTP-сервера)
+    :return: Список словарей с ключами 'title', 'description' и 'distance'
+    """
+    try:
+        keyword = normalize_text(keyword)
+        index = get_fuzzy_index()
+        if index is None:
+            return []
+        key = ('fuzzy', text_key(keyword), limit)
+        results = _cached_search(key, lambda: index.search(keyword, limit, settings.FUZZY_MAX_DISTANCE))
+        log_search_query(keyword, 'fuzzy', len(results))
+        return results
+    except Exception as e:
+        if raise_errors:
+            raise
+        print(f"Ошибка нечёткого поиска фильмов по запросу '{keyword}': {e}")
+        logger.error(f"Ошибка нечёткого поиска фильмов по запросу '{keyword}': {e}")
+        return []
+
+# =====================================================
+# ПРЕФИКСНЫЙ ИНДЕКС ПО НАЗВАНИЯМ
+# =====================================================
+
+@instrumented()
+def _build_prefix_index(fingerprint: str) -> PrefixIndex:
+    """
+    Построить префиксное дерево по отсортированным названиям фильмов.
+    :param fingerprint: Отпечаток состояния таблицы
+    :return: PrefixIndex
+    """
+    return PrefixIndex(_film_text_rows_for(fingerprint), fingerprint)
+
+
+def _refresh_prefix_index_in_background() -> None:
+    """
+    Проверить актуальность префиксного индекса и при необходимости пересобрать
+    его в фоновом потоке; до замены подсказки отдаются по прежнему индексу.
+    :return: None
+    """
+    global _prefix_index_refreshing
+
+    def refresh():
+        global _prefix_index, _prefix_index_checked_at, _prefix_index_refreshing
+        try:
+            fingerprint = _get_film_text_fingerprint()
+            if _prefix_index is None or _prefix_index.fingerprint != fingerprint:
+                _prefix_index = _build_prefix_index(fingerprint)
+        except Exception as e:
+            logger.error(f"Ошибка проверки актуальности префиксного индекса: {e}")
+        finally:
+            # При ошибке следующая попытка — тоже через SEARCH_INDEX_CHECK_INTERVAL
+            _prefix_index_checked_at = time.monotonic()
+            _prefix_index_refreshing = False
+
+    with _prefix_index_lock:
+        if _prefix_index_refreshing:
+            return
+        _prefix_index_refreshing = True
+    threading.Thread(target=refresh, name='prefix-index-refresh', daemon=True).start()
+
+
+def get_prefix_index() -> PrefixIndex | None:
+    """
+    Вернуть префиксный индекс, построив его при первом обращении.
+    Актуальность проверяется не чаще SEARCH_INDEX_CHECK_INTERVAL секунд в фоновом
+    потоке, поэтому запрос к MySQL не задерживает подсказки при вводе.
+    :return: PrefixIndex или None, если индекс отключён или недоступен
+    """
+    global _prefix_index, _prefix_index_checked_at
+    if not settings.PREFIX_INDEX_ENABLED:
+        return None
+    if _prefix_index is None:
+        with _prefix_index_lock:
+            if _prefix_index is None:
+                try:
+                    _prefix_index = _build_prefix_index(_get_film_text_fingerprint())
+                    _prefix_index_checked_at = time.monotonic()
+                except Exception as e:
+                    logger.error(f"Ошибка построения префиксного индекса: {e}")
+        return _prefix_index
+    if time.monotonic() - _prefix_index_checked_at >= settings.SEARCH_INDEX_CHECK_INTERVAL:
+        _refresh_prefix_index_in_background()
+    return _prefix_index
+
+# =====================================================
+# КОЛОНОЧНЫЙ СНИМОК ФИЛЬМОВ
+# =====================================================
+
+# Запросы выгрузки снимка: фильмы с годом, связи фильм–жанр, жанры
+SNAPSHOT_EXPORT_QUERIES = (
+    """
+    SELECT ft.film_id, ft.title, ft.description, f.release_year
+    FROM film_text ft
+    LEFT JOIN film f ON f.film_id = ft.film_id
+    """,
+    "SELECT film_id, category_id FROM film_category",
+    "SELECT category_id, name FROM category",
+)
+
+
+def export_film_snapshot(directory: str = None) -> dict:
+    """
+    Выгрузить film, film_text и film_category в колоночный снимок на диске.
+    :param directory: Каталог снимка (по умолчанию SNAPSHOT_DIR)
+    :return: Содержимое meta.json снимка
+    """
+    global _snapshot_engine, _snapshot_checked_at
+    from snapshot import export_snapshot
+
+    fingerprint = _get_film_text_fingerprint()
+    with mysql_connection() as connection:
+        cursor = connection.cursor()
+        results = []
+        for sql in SNAPSHOT_EXPORT_QUERIES:
+            timed_execute(cursor, sql)
+            results.append(cursor.fetchall())
+        cursor.close()
+    rows, film_categories, categories = results
+    meta = export_snapshot(rows, film_categories, categories, directory or settings.SNAPSHOT_DIR, fingerprint)
+    with _snapshot_lock:
+        _snapshot_engine = None
+        _snapshot_checked_at = None
+    return meta
+
+
+def _refresh_snapshot_engine(engine):
+    """
+    Открыть снимок (заново, если он заменён новой выгрузкой) и сравнить его
+    отпечаток с текущим состоянием MySQL.
+    :param engine: Открытый ранее SnapshotEngine или None
+    :return: Кортеж (SnapshotEngine или None, устарел ли снимок)
+    """
+    from snapshot import SnapshotEngine
+
+    try:
+        if engine is None or engine.changed_on_disk():
+            engine = SnapshotEngine(settings.SNAPSHOT_DIR)
+    except Exception as e:
+        logger.error(f"Ошибка открытия снимка фильмов '{settings.SNAPSHOT_DIR}' "
+                     f"(повтор через {settings.SNAPSHOT_CHECK_INTERVAL:.0f} с): {e}")
+        return None, False
+    try:
+        fingerprint = _get_film_text_fingerprint()
+    except Exception:
+        # MySQL недоступен — именно для этого случая снимок и нужен
+        return engine, False
+    stale = fingerprint != engine.meta.get('fingerprint')
+    if stale:
+        logger.warning(f"Снимок фильмов '{settings.SNAPSHOT_DIR}' устарел "
+                       f"({engine.meta.get('fingerprint')} != {fingerprint}), поиск идёт через MySQL "
+                       f"до новой выгрузки (manage.py export-snapshot)")
+    return engine, stale
+
+
+def get_snapshot_engine():
+    """
+    Вернуть движок запросов по колоночному снимку, если он выбран в SEARCH_BACKEND.
+    Снимок открывается через mmap при первом обращении. Не чаще SNAPSHOT_CHECK_INTERVAL
+    секунд снимок перепроверяется: новая выгрузка открывается заново, ошибка открытия
+    не повторяется до следующей проверки, а снимок, отстающий от доступного MySQL,
+    не используется. Если снимок недоступен или устарел, возвращается None и поиск
+    идёт через MySQL.
+    :return: SnapshotEngine или None
+    """
+    global _snapshot_engine, _snapshot_stale, _snapshot_checked_at
+    if settings.SEARCH_BACKEND != 'snapshot':
+        return None
+    checked_at = _snapshot_checked_at
+    if checked_at is None or time.monotonic() - checked_at >= settings.SNAPSHOT_CHECK_INTERVAL:
+        with _snapshot_lock:
+            checked_at = _snapshot_checked_at
+            if checked_at is None or time.monotonic() - checked_at >= settings.SNAPSHOT_CHECK_INTERVAL:
+                _snapshot_engine, _snapshot_stale = _refresh_snapshot_engine(_snapshot_engine)
+                _snapshot_checked_at = time.monotonic()
+    return None if _snapshot_stale else _snapshot_engine
+
+
+def _snapshot_page(rows, limit: int, to_dicts, keys: tuple) -> tuple[list[dict], str | None]:
+    """
+    Сформировать страницу из строк снимка вместе с токеном следующей (как _fetch_page).
+    :param rows: Номера строк снимка в порядке сортировки, уже после seek
+    :param limit: Размер страницы
+    :param to_dicts: Функция, превращающая номера строк в словари
+    :param keys: Колонки ключа сортировки для токена
+    :return: Кортеж (строки страницы, токен следующей страницы или None)
+    """
+    results = to_dicts(rows[:limit + 1])
+    if len(results) > limit:
+        results = results[:limit]
+        return results, _encode_page_token(results[-1], keys)
+    return results, None
+
+# =====================================================
+# КЭШ РЕЗУЛЬТАТОВ ПОИСКА
+# =====================================================
+
+def _cached_search(key: tuple, loader):
+    """
+    Вернуть результат поиска из кэша или выполнить запрос и закэшировать его.
+    Возвращается копия строк, чтобы вызывающий код не портил кэш.
+    :param key: Нормализованный ключ запроса
+    :param loader: Функция без аргументов, выполняющая запрос
+    :return: Список фильмов или кортеж (список фильмов, токен страницы)
+    """
+    if not settings.SEARCH_CACHE_ENABLED:
+        return loader()
+    value = _get_search_cache().get_or_load(key, loader)
+    if isinstance(value, tuple):
+        rows, next_token = value
+        return [dict(row) for row in rows], next_token
+    return [dict(row) for row in value]
+
+
+def _canonical_genre(genre: str | None) -> str | None:
+    """
+    Привести написание жанра к названию из таблицы category ("sci fi" -> "Sci-Fi").
+    Используется кэш справочных данных, поэтому запроса к MySQL нет.
+    :param genre: Жанр в произвольном написании
+    :return: Каноническое название жанра или исходная строка, если жанр неизвестен
+    """
+    if not genre:
+        return genre
+    try:
+        genre_names = _get_metadata_cache().get()['genre_names']
+    except Exception as e:
+        logger.error(f"Ошибка загрузки справочных данных: {e}")
+        return normalize_text(genre)
+    return genre_names.get(genre_key(genre), normalize_text(genre))
+
+
+def invalidate_search_cache() -> int:
+    """
+    Очистить кэш результатов поиска (например, после изменения данных о фильмах).
+    :return: Количество удалённых записей
+    """
+    return _get_search_cache().invalidate()
+
+
+def get_search_cache_stats() -> dict:
+    """
+    Получить счётчики кэша поиска: попадания, промахи, вытеснения, размер.
+    :return: dict
+    """
+    return _get_search_cache().stats()
 
 # =====================================================
 # ФУНКЦИИ ДЛЯ MYSQL (Данные о фильмах)
 # =====================================================
 
-def find_films_by_keyword(keyword: str, limit: int = 10, skip: int = 0) -> list[dict]:
+@instrumented('keyword')
+def _query_films_by_keyword(keyword: str, limit: int, skip: int) -> list[dict]:
     """
-    Найти фильмы по ключевому слову в MySQL.
+    Выполнить поиск по ключевому слову (снимок, индекс или MySQL) без логирования и кэша.
+    Во всех трёх случаях ищется подстрока названия, порядок (title, film_id).
     :param keyword: Ключевое слово для поиска
     :param limit: Максимальное количество результатов
-    :param skip: Количество результатов для пропуска (для пагинации)
+    :param skip: Количество результатов для пропуска
     :return: Список словарей с фильмами
     """
-    try:
-        connection = initialize_mysql()
+    if not keyword:
+        return []
+    engine = get_snapshot_engine()
+    if engine is not None:
+        return engine.text_rows(engine.title_rows(substring=keyword)[skip:skip + limit])
+    index = get_search_index()
+    if index is not None:
+        return index.search(keyword, limit, skip)
+    with mysql_connection() as connection:
         cursor = connection.cursor(pymysql.cursors.DictCursor)
         sql = (
             """
             SELECT title, description
             FROM film_text
             WHERE title LIKE %s
+            ORDER BY title, film_id
             LIMIT %s OFFSET %s
             """
         )
-        search_pattern = f"%{keyword}%"
-        cursor.execute(sql, (search_pattern, limit, skip))
+        search_pattern = f"%{_escape_like(keyword)}%"
+        timed_execute(cursor, sql, (search_pattern, limit, skip))
         results = cursor.fetchall()
         cursor.close()
-        # Логируем поиск
+    return results
+
+@instrumented('keyword')
+def find_films_by_keyword(keyword: str, limit: int = 10, skip: int = 0) -> list[dict]:
+    """
+    Найти фильмы, в названии которых встречается ключевое слово.
+    :param keyword: Ключевое слово для поиска
+    :param limit: Максимальное количество результатов
+    :param skip: Количество результатов для пропуска (для пагинации)
+    :return: Список словарей с фильмами
+    """
+    try:
+        keyword = normalize_text(keyword)
+        key = ('keyword', text_key(keyword), limit, skip)
+        results = _cached_search(key, lambda: _query_films_by_keyword(keyword, limit, skip))
+        # Логируем поиск (в том числе попадания в кэш)
         log_search_query(keyword, 'keyword', len(results))
         return results
     except Exception as e:
@@ -173,114 +1426,271 @@ def find_films_by_keyword(keyword: str, limit: int = 10, skip: int = 0) -> list[
         logger.error(f"Ошибка поиска фильмов по ключевому слову '{keyword}': {e}")
         return []
 
-def find_films_by_criteria(genre: str = None, year_from: int = None, year_to: int = None, limit: int = 10, skip: int = 0) -> list[dict]:
+
+def _criteria_filters(genre, year_from: int | None, year_to: int | None,
+                      year_ranges=None) -> tuple[tuple[str, ...], tuple[tuple[int, int], ...]]:
+    """
+    Привести фильтры поиска по критериям к каноническому виду.
+    Жанры объединяются по ИЛИ, диапазоны годов — по ИЛИ, жанры и годы — по И.
+    :param genre: Жанр или список жанров
+    :param year_from: Минимальный год (диапазон year_from–year_to добавляется к year_ranges)
+    :param year_to: Максимальный год
+    :param year_ranges: Список диапазонов (year_from, year_to)
+    :return: Кортеж (отсортированные канонические жанры, отсортированные диапазоны годов)
+    """
+    genres = [genre] if isinstance(genre, str) else list(genre or [])
+    ranges = [tuple(year_range) for year_range in (year_ranges or [])]
+    if year_from and year_to:
+        ranges.append((year_from, year_to))
+    return (
+        tuple(sorted({_canonical_genre(name) for name in genres if name})),
+        tuple(sorted({(int(low), int(high)) for low, high in ranges if low and high}))
+    )
+
+
+def _criteria_label(genres: tuple[str, ...], year_ranges: tuple[tuple[int, int], ...]) -> str:
+    """
+    Текст запроса для лога (для одного жанра и диапазона — прежний формат "genre:X, years:A-B").
+    :param genres: Канонические жанры
+    :param year_ranges: Диапазоны годов
+    :return: str
+    """
+    years = '|'.join(f"{low}-{high}" for low, high in year_ranges) or 'None-None'
+    return f"genre:{'|'.join(genres) or None}, years:{years}"
+
+
+def _criteria_cache_key(kind: str, genres: tuple[str, ...], year_ranges: tuple[tuple[int, int], ...], *rest) -> tuple:
+    """
+    Ключ кэша поиска по критериям.
+    :param kind: Вид запроса ('criteria' или 'criteria_page')
+    :param genres: Канонические жанры
+    :param year_ranges: Диапазоны годов
+    :param rest: Параметры страницы
+    :return: tuple
+    """
+    return (kind, tuple(genre_key(genre) for genre in genres), year_ranges, *rest)
+
+
+def _criteria_sql(genres: tuple[str, ...], year_ranges: tuple[tuple[int, int], ...],
+                  after_id: int | None = None) -> tuple[str, list] | None:
+    """
+    Один SQL-запрос поиска по критериям: строка на фильм, все жанры фильма
+    собираются GROUP_CONCAT. category_id жанров берутся из кэша справочных данных.
+    :param genres: Канонические жанры (любой из)
+    :param year_ranges: Диапазоны годов (любой из)
+    :param after_id: Для seek-пагинации: только фильмы с film_id больше заданного
+    :return: Кортеж (SQL без LIMIT, параметры) или None, если ни один жанр не известен
+    """
+    conditions, params = [], []
+    if genres:
+        category_ids = [_genre_category_id(genre) for genre in genres]
+        category_ids = [category_id for category_id in category_ids if category_id is not None]
+        if not category_ids:
+            # Неизвестные жанры: результат заведомо пуст, запрос к MySQL не нужен
+            return None
+        conditions.append(
+            f"f.film_id IN (SELECT film_id FROM film_category WHERE category_id IN ({', '.join(['%s'] * len(category_ids))}))"
+        )
+        params.extend(category_ids)
+    if year_ranges:
+        conditions.append('(' + ' OR '.join(['f.release_year BETWEEN %s AND %s'] * len(year_ranges)) + ')')
+        for year_range in year_ranges:
+            params.extend(year_range)
+    if after_id is not None:
+        conditions.append('f.film_id > %s')
+        params.append(after_id)
+    sql = (
+        f"""
+        SELECT f.film_id, f.title, f.release_year,
+               GROUP_CONCAT(c.name ORDER BY c.name SEPARATOR ', ') AS genre
+        FROM film f
+        LEFT JOIN film_category fc ON fc.film_id = f.film_id
+        LEFT JOIN category c ON c.category_id = fc.category_id
+        WHERE {' AND '.join(conditions)}
+        GROUP BY f.film_id
+        ORDER BY f.film_id
+        """
+    )
+    return sql, params
+
+
+@instrumented('genre_year')
+def _query_films_by_criteria(genres: tuple[str, ...], year_ranges: tuple[tuple[int, int], ...], limit: int, skip: int) -> list[dict]:
+    """
+    Выполнить поиск по жанрам и/или диапазонам годов в MySQL без логирования и кэша.
+    :param genres: Канонические жанры (любой из)
+    :param year_ranges: Диапазоны годов (любой из)
+    :param limit: Максимальное количество результатов
+    :param skip: Количество результатов для пропуска
+    :return: Список словарей с фильмами
+    """
+    if not (genres or year_ranges):
+        return []
+    engine = get_snapshot_engine()
+    if engine is not None:
+        rows = engine.criteria_rows(genres, year_ranges)
+        return [] if rows is None else engine.criteria_result(rows[skip:skip + limit])
+    query = _criteria_sql(genres, year_ranges)
+    if query is None:
+        return []
+    sql, params = query
+    with mysql_connection() as connection:
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        timed_execute(cursor, sql + " LIMIT %s OFFSET %s", (*params, limit, skip))
+        results = cursor.fetchall()
+        cursor.close()
+    return results
+
+@instrumented('genre_year')
+def find_films_by_criteria(genre: str | list[str] = None, year_from: int = None, year_to: int = None, limit: int = 10, skip: int = 0,
+                           year_ranges: list[tuple[int, int]] = None) -> list[dict]:
     """
-    Найти фильмы по жанру и/или диапазону годов в MySQL.
-    :param genre: Жанр фильма для поиска
+    Найти фильмы по жанрам и/или диапазонам годов в MySQL одним запросом.
+    Каждый фильм возвращается одной строкой, в 'genre' — все его жанры через запятую.
+    :param genre: Жанр или список жанров (любой из)
     :param year_from: Минимальный год
     :param year_to: Максимальный год
     :param limit: Максимальное количество результатов
     :param skip: Количество результатов для пропуска (для пагинации)
+    :param year_ranges: Дополнительные диапазоны годов [(year_from, year_to), ...] (любой из)
     :return: Список словарей с фильмами
     """
     try:
-        connection = initialize_mysql()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-        if genre and year_from and year_to:
-            sql = (
-                """
-                SELECT f.title, f.release_year, c.name AS genre
-                FROM film f
-                JOIN film_category fc ON f.film_id = fc.film_id
-                JOIN category c ON fc.category_id = c.category_id
-                WHERE c.name = %s AND f.release_year BETWEEN %s AND %s
-                LIMIT %s OFFSET %s
-                """
-            )
-            cursor.execute(sql, (genre, year_from, year_to, limit, skip))
-        elif genre:
-            sql = (
-                """
-                SELECT f.title, f.release_year, c.name AS genre
-                FROM film f
-                JOIN film_category fc ON f.film_id = fc.film_id
-                JOIN category c ON fc.category_id = c.category_id
-                WHERE c.name = %s
-                LIMIT %s OFFSET %s
-                """
-            )
-            cursor.execute(sql, (genre, limit, skip))
-        elif year_from and year_to:
-            sql = (
-                """
-                SELECT title, release_year
-                FROM film
-                WHERE release_year BETWEEN %s AND %s
-                LIMIT %s OFFSET %s
-                """
-            )
-            cursor.execute(sql, (year_from, year_to, limit, skip))
-        else:
+        genres, ranges = _criteria_filters(genre, year_from, year_to, year_ranges)
+        if not (genres or ranges):
             return []
-        results = cursor.fetchall()
-        cursor.close()
-        search_criteria = f"genre:{genre}, years:{year_from}-{year_to}"
-        log_search_query(search_criteria, 'genre_year', len(results))
+        key = _criteria_cache_key('criteria', genres, ranges, limit, skip)
+        results = _cached_search(
+            key, lambda: _query_films_by_criteria(genres, ranges, limit, skip)
+        )
+        log_search_query(_criteria_label(genres, ranges), 'genre_year', len(results))
         return results
     except Exception as e:
         print(f"Ошибка поиска фильмов по критериям: {e}")
         logger.error(f"Ошибка поиска фильмов по критериям: {e}")
         return []
 
-def get_all_genres() -> list[str]:
+def _load_metadata_version() -> tuple:
     """
-    Получить все уникальные жанры из таблицы MySQL.
-    :return: Список уникальных жанров
+    Получить дешёвую версию справочных данных: время последних изменений и число жанров
+    (при SEARCH_BACKEND=snapshot — отпечаток и время выгрузки снимка, без MySQL).
+    :return: Кортеж-версия
     """
-    try:
-        connection = initialize_mysql()
+    engine = get_snapshot_engine()
+    if engine is not None:
+        return 'snapshot', engine.meta.get('fingerprint'), engine.meta.get('created_at')
+    with mysql_connection() as connection:
         cursor = connection.cursor()
-        sql = """
-        SELECT name AS genre
-        FROM category
-        """
-        cursor.execute(sql)
-        results = cursor.fetchall()
+        timed_execute(
+            cursor,
+            """
+            SELECT (SELECT MAX(last_update) FROM category),
+                   (SELECT COUNT(*) FROM category),
+                   (SELECT MAX(last_update) FROM film)
+            """
+        )
+        version = cursor.fetchone()
         cursor.close()
-        genres = [row[0] for row in results]
-        return genres
+    return tuple(version)
+
+
+@instrumented()
+def _load_metadata() -> dict:
+    """
+    Загрузить справочные данные: жанры с их id и диапазон годов выпуска
+    (при SEARCH_BACKEND=snapshot — из meta.json снимка, без MySQL).
+    :return: Словарь с ключами 'genres', 'genre_ids', 'genre_names', 'min_year', 'max_year'
+    """
+    engine = get_snapshot_engine()
+    if engine is not None:
+        meta = engine.meta
+        categories = sorted(((int(category_id), name) for category_id, name in meta['categories'].items()),
+                            key=lambda category: category[1])
+        min_year, max_year = meta['min_year'], meta['max_year']
+    else:
+        with mysql_connection() as connection:
+            cursor = connection.cursor()
+            timed_execute(cursor, "SELECT category_id, name FROM category ORDER BY name")
+            categories = cursor.fetchall()
+            timed_execute(cursor, "SELECT MIN(release_year), MAX(release_year) FROM film")
+            min_year, max_year = cursor.fetchone()
+            cursor.close()
+    return {
+        'genres': [name for _, name in categories],
+        'genre_ids': {name: category_id for category_id, name in categories},
+        'genre_names': {genre_key(name): name for _, name in categories},
+        'min_year': min_year,
+        'max_year': max_year
+    }
+
+
+def warm_metadata_cache() -> dict | None:
+    """
+    Загрузить справочные данные при запуске приложения.
+    :return: Справочные данные или None при ошибке
+    """
+    try:
+        return _get_metadata_cache().get()
+    except Exception as e:
+        print(f"Ошибка загрузки справочных данных: {e}")
+        logger.error(f"Ошибка загрузки справочных данных: {e}")
+        return None
+
+
+def get_metadata_cache_stats() -> dict:
+    """
+    Получить счётчики кэша справочных данных.
+    :return: dict
+    """
+    return _get_metadata_cache().stats()
+
+
+def _genre_category_id(genre: str) -> int | None:
+    """
+    Найти category_id жанра по кэшу справочных данных, без запроса к MySQL.
+    :param genre: Каноническое название жанра
+    :return: category_id или None, если жанр неизвестен
+    """
+    return _get_metadata_cache().get()['genre_ids'].get(genre)
+
+
+@instrumented()
+def get_all_genres(raise_errors: bool = False) -> list[str]:
+    """
+    Получить все уникальные жанры (из кэша справочных данных).
+    :param raise_errors: Пробросить исключение вместо пустого результата (для HTTP-сервера)
+    :return: Список уникальных жанров
+    """
+    try:
+        return list(_get_metadata_cache().get()['genres'])
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Ошибка получения жанров: {e}")
         logger.error(f"Ошибка получения жанров: {e}")
         return []
 
-def get_year_range() -> dict:
+@instrumented()
+def get_year_range(raise_errors: bool = False) -> dict:
     """
-    Получить минимальный и максимальный год из таблицы фильмов MySQL.
+    Получить минимальный и максимальный год выпуска (из кэша справочных данных).
+    :param raise_errors: Пробросить исключение вместо пустого результата (для HTTP-сервера)
     :return: Словарь с 'min_year' и 'max_year'
     """
     try:
-        connection = initialize_mysql()
-        cursor = connection.cursor()
-        sql = """
-        SELECT MIN(release_year) AS min_year, MAX(release_year) AS max_year
-        FROM film
-        """
-        cursor.execute(sql)
-        result = cursor.fetchone()
-        cursor.close()
-        if result:
-            return {
-                'min_year': result[0],
-                'max_year': result[1]
-            }
-        else:
-            return {'min_year': None, 'max_year': None}
+        metadata = _get_metadata_cache().get()
+        return {
+            'min_year': metadata['min_year'],
+            'max_year': metadata['max_year']
+        }
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Ошибка получения диапазона лет: {e}")
         logger.error(f"Ошибка получения диапазона лет: {e}")
         return {'min_year': None, 'max_year': None}
 
+@instrumented()
 def find_film_by_key(key: str) -> dict | None:
     """
     Найти фильм по ключу (ID или названию) в MySQL.
@@ -288,28 +1698,31 @@ def find_film_by_key(key: str) -> dict | None:
     :return: Документ фильма если найден, иначе None.
     """
     try:
-        connection = initialize_mysql()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-        sql = "SELECT * FROM films WHERE id = %s OR title = %s LIMIT 1"
-        cursor.execute(sql, (key, key))
-        result = cursor.fetchone()
-        cursor.close()
+        with mysql_connection() as connection:
+            cursor = connection.cursor(pymysql.cursors.DictCursor)
+            sql = "SELECT * FROM films WHERE id = %s OR title = %s LIMIT 1"
+            timed_execute(cursor, sql, (key, key))
+            result = cursor.fetchone()
+            cursor.close()
         return result
     except Exception as e:
         print(f"Ошибка поиска фильма по ключу '{key}': {e}")
         logger.error(f"Ошибка поиска фильма по ключу '{key}': {e}")
         return None
 
-def find_films_by_first_letter(letter: str, limit: int = 20, skip: int = 0) -> list[dict]:
+@instrumented('first_letter')
+def _query_films_by_first_letter(letter: str, limit: int, skip: int) -> list[dict]:
     """
-    Найти фильмы, название которых начинается с заданной буквы.
+    Выполнить поиск по первой букве названия в MySQL без кэша.
     :param letter: Первая буква названия
     :param limit: Максимальное количество результатов
     :param skip: Количество результатов для пропуска
     :return: Список фильмов
     """
-    try:
-        connection = initialize_mysql()
+    engine = get_snapshot_engine()
+    if engine is not None:
+        return engine.text_rows(engine.title_rows(prefix=letter.upper())[skip:skip + limit])
+    with mysql_connection() as connection:
         cursor = connection.cursor(pymysql.cursors.DictCursor)
         sql = (
             """
@@ -319,15 +1732,520 @@ def find_films_by_first_letter(letter: str, limit: int = 20, skip: int = 0) -> l
             LIMIT %s OFFSET %s
             """
         )
-        search_pattern = f"{letter.upper()}%"
-        cursor.execute(sql, (search_pattern, limit, skip))
+        search_pattern = f"{_escape_like(letter.upper())}%"
+        timed_execute(cursor, sql, (search_pattern, limit, skip))
         results = cursor.fetchall()
         cursor.close()
-        return results
+    return results
+
+@instrumented('first_letter')
+def find_films_by_first_letter(letter: str, limit: int = 20, skip: int = 0) -> list[dict]:
+    """
+    Найти фильмы, название которых начинается с заданной буквы.
+    :param letter: Первая буква названия
+    :param limit: Максимальное количество результатов
+    :param skip: Количество результатов для пропуска
+    :return: Список фильмов
+    """
+    try:
+        key = ('first_letter', letter.upper(), limit, skip)
+        return _cached_search(key, lambda: _query_films_by_first_letter(letter, limit, skip))
+    except Exception as e:
+        print(f"Ошибка поиска фильмов по первой букве: {e}")
+        logger.error(f"Ошибка поиска фильмов по первой букве: {e}")
+        return []
+
+# =====================================================
+# ПОСТРАНИЧНЫЙ ПОИСК (keyset / seek-пагинация)
+# =====================================================
+
+def _encode_page_token(row: dict, keys: tuple) -> str:
+    """
+    Упаковать ключ последней строки страницы в непрозрачный токен.
+    :param row: Последняя строка страницы
+    :param keys: Имена колонок, по которым выполняется seek
+    :return: Токен следующей страницы
+    """
+    payload = [row[key] for key in keys]
+    raw = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+class InvalidPageToken(ValueError):
+    """
+    Токен страницы повреждён или получен от другого вида поиска.
+    """
+
+
+# Тип значения в токене страницы для каждой колонки seek-ключа
+_PAGE_KEY_TYPES = {'title': str, 'film_id': int}
+
+
+def _decode_page_token(token: str, keys: tuple = ('title', 'film_id')) -> list:
+    """
+    Распаковать токен страницы, полученный от _encode_page_token.
+    :param token: Токен следующей страницы
+    :param keys: Имена колонок, по которым выполняется seek
+    :return: Список значений ключа последней строки
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+    except ValueError:
+        raise InvalidPageToken(f"некорректный токен страницы: {token!r}")
+    if not (isinstance(payload, list) and len(payload) == len(keys) and all(
+            isinstance(value, _PAGE_KEY_TYPES[key]) and not isinstance(value, bool)
+            for key, value in zip(keys, payload))):
+        raise InvalidPageToken(f"некорректный токен страницы: {token!r}")
+    return payload
+
+
+def _fetch_page(sql: str, params: tuple, limit: int, keys: tuple) -> tuple[list[dict], str | None]:
+    """
+    Выполнить seek-запрос и вернуть страницу вместе с токеном следующей.
+    Запрашивается на одну строку больше, чтобы узнать, есть ли продолжение.
+    :param sql: SQL-запрос, заканчивающийся на LIMIT %s
+    :param params: Параметры запроса без LIMIT
+    :param limit: Размер страницы
+    :param keys: Колонки ключа сортировки для токена
+    :return: Кортеж (строки страницы, токен следующей страницы или None)
+    """
+    with mysql_connection() as connection:
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        timed_execute(cursor, sql, params + (limit + 1,))
+        results = cursor.fetchall()
+        cursor.close()
+    if len(results) > limit:
+        results = results[:limit]
+        return results, _encode_page_token(results[-1], keys)
+    return results, None
+
+
+@instrumented('keyword')
+def _query_films_by_keyword_page(keyword: str, limit: int, page_token: str | None) -> tuple[list[dict], str | None]:
+    """
+    Выполнить seek-запрос страницы поиска по ключевому слову (снимок, индекс
+    или MySQL) без логирования и кэша.
+    :param keyword: Ключевое слово для поиска
+    :param limit: Размер страницы
+    :param page_token: Токен предыдущей страницы или None
+    :return: Кортеж (список фильмов, токен следующей страницы или None)
+    """
+    if not keyword:
+        return [], None
+    engine = get_snapshot_engine()
+    if engine is not None:
+        rows = engine.title_rows(substring=keyword)
+        if page_token is not None:
+            rows = engine.seek_title(rows, *_decode_page_token(page_token))
+        return _snapshot_page(rows, limit, lambda page: engine.text_rows(page, with_id=True), ('title', 'film_id'))
+    index = get_search_index()
+    if index is not None:
+        after = _decode_page_token(page_token) if page_token is not None else None
+        rows = index.search_page(keyword, limit + 1, after)
+        return _snapshot_page(rows, limit, list, ('title', 'film_id'))
+    search_pattern = f"%{_escape_like(keyword)}%"
+    if page_token is None:
+        sql = (
+            """
+            SELECT film_id, title, description
+            FROM film_text
+            WHERE title LIKE %s
+            ORDER BY title, film_id
+            LIMIT %s
+            """
+        )
+        params = (search_pattern,)
+    else:
+        last_title, last_id = _decode_page_token(page_token)
+        sql = (
+            """
+            SELECT film_id, title, description
+            FROM film_text
+            WHERE title LIKE %s
+              AND (title > %s OR (title = %s AND film_id > %s))
+            ORDER BY title, film_id
+            LIMIT %s
+            """
+        )
+        params = (search_pattern, last_title, last_title, last_id)
+    return _fetch_page(sql, params, limit, ('title', 'film_id'))
+
+
+@instrumented('keyword')
+def find_films_by_keyword_page(keyword: str, limit: int = 10, page_token: str = None, raise_errors: bool = False) -> tuple[list[dict], str | None]:
+    """
+    Найти фильмы по ключевому слову постранично (seek по title, film_id).
+    Стоимость каждой страницы не зависит от её номера.
+    :param keyword: Ключевое слово для поиска
+    :param limit: Размер страницы
+    :param page_token: Токен, полученный с предыдущей страницей (None для первой)
+    :param raise_errors: Пробросить исключение вместо пустого результата (для HTTP-сервера)
+    :return: Кортеж (список фильмов, токен следующей страницы или None)
+    """
+    try:
+        keyword = normalize_text(keyword)
+        key = ('keyword_page', text_key(keyword), limit, page_token)
+        results, next_token = _cached_search(
+            key, lambda: _query_films_by_keyword_page(keyword, limit, page_token)
+        )
+        # Логируем только первую страницу, чтобы не искажать статистику
+        if page_token is None:
+            log_search_query(keyword, 'keyword', len(results))
+        return results, next_token
+    except Exception as e:
+        if raise_errors:
+            raise
+        print(f"Ошибка поиска фильмов по ключевому слову '{keyword}': {e}")
+        logger.error(f"Ошибка поиска фильмов по ключевому слову '{keyword}': {e}")
+        return [], None
+
+
+@instrumented('genre_year')
+def _query_films_by_criteria_page(genres: tuple[str, ...], year_ranges: tuple[tuple[int, int], ...], limit: int, page_token: str | None) -> tuple[list[dict], str | None]:
+    """
+    Выполнить seek-запрос страницы поиска по жанрам и/или годам без логирования и кэша.
+    :param genres: Канонические жанры (любой из)
+    :param year_ranges: Диапазоны годов (любой из)
+    :param limit: Размер страницы
+    :param page_token: Токен предыдущей страницы или None
+    :return: Кортеж (список фильмов, токен следующей страницы или None)
+    """
+    if not (genres or year_ranges):
+        return [], None
+    last_id = _decode_page_token(page_token, ('film_id',))[0] if page_token else 0
+    engine = get_snapshot_engine()
+    if engine is not None:
+        rows = engine.criteria_rows(genres, year_ranges)
+        if rows is None:
+            return [], None
+        rows = engine.seek_film_id(rows, last_id)
+        return _snapshot_page(rows, limit, engine.criteria_result, ('film_id',))
+    query = _criteria_sql(genres, year_ranges, after_id=last_id)
+    if query is None:
+        return [], None
+    sql, params = query
+    return _fetch_page(sql + " LIMIT %s", tuple(params), limit, ('film_id',))
+
+
+@instrumented('genre_year')
+def find_films_by_criteria_page(genre: str | list[str] = None, year_from: int = None, year_to: int = None, limit: int = 10, page_token: str = None,
+                                year_ranges: list[tuple[int, int]] = None, raise_errors: bool = False) -> tuple[list[dict], str | None]:
+    """
+    Найти фильмы по жанрам и/или диапазонам годов постранично (seek по film_id).
+    Каждый фильм возвращается одной строкой, в 'genre' — все его жанры через запятую.
+    :param genre: Жанр или список жанров (любой из)
+    :param year_from: Минимальный год
+    :param year_to: Максимальный год
+    :param limit: Размер страницы
+    :param page_token: Токен, полученный с предыдущей страницей (None для первой)
+    :param year_ranges: Дополнительные диапазоны годов [(year_from, year_to), ...] (любой из)
+    :param raise_errors: Пробросить исключение вместо пустого результата (для HTTP-сервера)
+    :return: Кортеж (список фильмов, токен следующей страницы или None)
+    """
+    try:
+        genres, ranges = _criteria_filters(genre, year_from, year_to, year_ranges)
+        if not (genres or ranges):
+            return [], None
+        key = _criteria_cache_key('criteria_page', genres, ranges, limit, page_token)
+        results, next_token = _cached_search(
+            key, lambda: _query_films_by_criteria_page(genres, ranges, limit, page_token)
+        )
+        if page_token is None:
+            log_search_query(_criteria_label(genres, ranges), 'genre_year', len(results))
+        return results, next_token
+    except Exception as e:
+        if raise_errors:
+            raise
+        print(f"Ошибка поиска фильмов по критериям: {e}")
+        logger.error(f"Ошибка поиска фильмов по критериям: {e}")
+        return [], None
+
+
+def _escape_like(value: str) -> str:
+    """
+    Экранировать спецсимволы шаблона LIKE во вводе пользователя.
+    :param value: Строка
+    :return: Строка, в которой %, _ и \\ совпадают буквально
+    """
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+@instrumented('first_letter')
+def _query_films_by_first_letter_page(letter: str, limit: int, page_token: str | None) -> tuple[list[dict], str | None]:
+    """
+    Выполнить seek-запрос страницы поиска по началу названия без кэша.
+    Если доступен префиксный индекс, MySQL не используется.
+    :param letter: Первая буква или префикс названия
+    :param limit: Размер страницы
+    :param page_token: Токен предыдущей страницы или None
+    :return: Кортеж (список фильмов, токен следующей страницы или None)
+    """
+    engine = get_snapshot_engine()
+    if engine is not None:
+        rows = engine.title_rows(prefix=letter.upper())
+        if page_token is not None:
+            rows = engine.seek_title(rows, *_decode_page_token(page_token))
+        return _snapshot_page(rows, limit, lambda page: engine.text_rows(page, with_id=True), ('title', 'film_id'))
+    index = get_prefix_index()
+    if index is not None:
+        after = tuple(_decode_page_token(page_token)) if page_token else None
+        results, has_more = index.page(letter, limit, after)
+        return results, _encode_page_token(results[-1], ('title', 'film_id')) if has_more else None
+    search_pattern = f"{_escape_like(letter.upper())}%"
+    if page_token is None:
+        sql = (
+            """
+            SELECT film_id, title, description
+            FROM film_text
+            WHERE title LIKE %s
+            ORDER BY title, film_id
+            LIMIT %s
+            """
+        )
+        params = (search_pattern,)
+    else:
+        last_title, last_id = _decode_page_token(page_token)
+        sql = (
+            """
+            SELECT film_id, title, description
+            FROM film_text
+            WHERE title LIKE %s
+              AND (title > %s OR (title = %s AND film_id > %s))
+            ORDER BY title, film_id
+            LIMIT %s
+            """
+        )
+        params = (search_pattern, last_title, last_title, last_id)
+    return _fetch_page(sql, params, limit, ('title', 'film_id'))
+
+
+@instrumented('first_letter')
+def find_films_by_first_letter_page(letter: str, limit: int = 20, page_token: str = None) -> tuple[list[dict], str | None]:
+    """
+    Найти фильмы по первой букве названия постранично (seek по title, film_id).
+    Префиксный LIKE и сортировка по title используют индекс по названию.
+    :param letter: Первая буква названия
+    :param limit: Размер страницы
+    :param page_token: Токен, полученный с предыдущей страницей (None для первой)
+    :return: Кортеж (список фильмов, токен следующей страницы или None)
+    """
+    try:
+        key = ('first_letter_page', letter.upper(), limit, page_token)
+        return _cached_search(key, lambda: _query_films_by_first_letter_page(letter, limit, page_token))
     except Exception as e:
         print(f"Ошибка поиска фильмов по первой букве: {e}")
         logger.error(f"Ошибка поиска фильмов по первой букве: {e}")
+        return [], None
+
+@instrumented('prefix')
+def find_films_by_prefix(prefix: str, limit: int = 20, page_token: str = None, raise_errors: bool = False) -> tuple[list[dict], str | None]:
+    """
+    Найти фильмы, название которых начинается с префикса произвольной длины, постранично.
+    Обобщает поиск по первой букве; используется автодополнением на каждое нажатие клавиши,
+    поэтому не логируется и при наличии префиксного индекса не обращается к MySQL.
+    :param prefix: Начало названия
+    :param limit: Размер страницы
+    :param page_token: Токен, полученный с предыдущей страницей (None для первой)
+    :param raise_errors: Пробросить исключение вместо пустого результата (для HTTP-сервера)
+    :return: Кортеж (список фильмов, токен следующей страницы или None)
+    """
+    try:
+        prefix = normalize_text(prefix)
+        if not prefix:
+            return [], None
+        if get_prefix_index() is not None:
+            return _query_films_by_first_letter_page(prefix, limit, page_token)
+        key = ('prefix_page', text_key(prefix), limit, page_token)
+        return _cached_search(key, lambda: _query_films_by_first_letter_page(prefix, limit, page_token))
+    except Exception as e:
+        if raise_errors:
+            raise
+        print(f"Ошибка поиска фильмов по началу названия '{prefix}': {e}")
+        logger.error(f"Ошибка поиска фильмов по началу названия '{prefix}': {e}")
+        return [], None
+
+# =====================================================
+# ПАКЕТНЫЙ ПОИСК (несколько запросов параллельно)
+# =====================================================
+
+def _run_search_spec(spec: dict) -> tuple[list[dict], tuple[str, str] | None]:
+    """
+    Выполнить один запрос пакета через кэш, не логируя его.
+    :param spec: Описание запроса: {'type': 'keyword', 'keyword': ...},
+                 {'type': 'criteria', 'genre': ..., 'year_from': ..., 'year_to': ...}
+                 (или 'genres': [...], 'year_ranges': [[from, to], ...])
+                 или {'type': 'first_letter', 'letter': ...}; необязательно 'limit', 'skip'
+    :return: Кортеж (список фильмов, (запрос, тип поиска) для лога или None)
+    """
+    search_type = spec.get('type')
+    skip = spec.get('skip', 0)
+    if search_type == 'keyword':
+        keyword = normalize_text(spec['keyword'])
+        limit = spec.get('limit', 10)
+        key = ('keyword', text_key(keyword), limit, skip)
+        results = _cached_search(key, lambda: _query_films_by_keyword(keyword, limit, skip))
+        return results, (keyword, 'keyword')
+    if search_type == 'criteria':
+        genres, ranges = _criteria_filters(
+            spec.get('genres') or spec.get('genre'), spec.get('year_from'), spec.get('year_to'),
+            spec.get('year_ranges')
+        )
+        if not (genres or ranges):
+            return [], None
+        limit = spec.get('limit', 10)
+        key = _criteria_cache_key('criteria', genres, ranges, limit, skip)
+        results = _cached_search(key, lambda: _query_films_by_criteria(genres, ranges, limit, skip))
+        return results, (_criteria_label(genres, ranges), 'genre_year')
+    if search_type == 'first_letter':
+        letter = spec['letter']
+        limit = spec.get('limit', 20)
+        key = ('first_letter', letter.upper(), limit, skip)
+        return _cached_search(key, lambda: _query_films_by_first_letter(letter, limit, skip)), None
+    raise ValueError(f"Неизвестный тип поиска: {search_type}")
+
+
+def _timed_search_spec(spec: dict) -> dict:
+    """
+    Выполнить запрос пакета и замерить время его выполнения.
+    :param spec: Описание запроса
+    :return: Словарь с результатами, временем, ошибкой и данными для лога
+    """
+    started = time.perf_counter()
+    try:
+        results, log_key = _run_search_spec(spec)
+        error = None
+    except Exception as e:
+        results, log_key, error = [], None, str(e)
+        logger.error(f"Ошибка пакетного поиска {spec}: {e}")
+    return {
+        'spec': spec,
+        'results': results,
+        'seconds': time.perf_counter() - started,
+        'error': error,
+        'log_key': log_key
+    }
+
+
+@instrumented('batch')
+def search_many(specs: list[dict], max_workers: int = None) -> list[dict]:
+    """
+    Выполнить список поисковых запросов параллельно на пуле потоков
+    (каждый поток берёт своё соединение из пула MySQL).
+    Результаты возвращаются в порядке запросов; логи всего пакета
+    записываются в MongoDB одной операцией.
+    :param specs: Список описаний запросов (см. _run_search_spec)
+    :param max_workers: Количество потоков (по умолчанию BATCH_MAX_WORKERS)
+    :return: Список словарей {'spec', 'results', 'seconds', 'error'}
+    """
+    if not specs:
         return []
+    from concurrent.futures import ThreadPoolExecutor
+    workers = max(1, min(max_workers or settings.BATCH_MAX_WORKERS, len(specs)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='search') as executor:
+        outcomes = list(executor.map(_timed_search_spec, specs))
+    log_search_queries([
+        (*outcome['log_key'], len(outcome['results']))
+        for outcome in outcomes if outcome['log_key'] is not None
+    ])
+    for outcome in outcomes:
+        del outcome['log_key']
+    return outcomes
+
+# =====================================================
+# ПОТОКОВЫЙ ПОИСК (seek-пагинация порциями)
+# =====================================================
+
+def _iter_pages(fetch_page, chunk_size: int, drop_keys: tuple = ()):
+    """
+    Отдавать строки порциями seek-запросов страниц. Соединение берётся из пула
+    только на время запроса порции, поэтому пока вызывающий код ждёт ввода
+    пользователя между порциями, соединение и курсор не заняты.
+    :param fetch_page: Функция (limit, page_token) -> (строки, токен следующей страницы)
+    :param chunk_size: Размер порции
+    :param drop_keys: Служебные колонки ключа сортировки, которые не нужно отдавать
+    :return: Генератор строк-словарей
+    """
+    page_token = None
+    while True:
+        rows, page_token = fetch_page(chunk_size, page_token)
+        for row in rows:
+            yield {key: value for key, value in row.items() if key not in drop_keys} if drop_keys else row
+        if page_token is None:
+            return
+
+
+def _stream_and_log(rows, query: str | None, search_type: str, error_message: str):
+    """
+    Отдавать строки потока и залогировать запрос с итоговым количеством строк.
+    :param rows: Генератор строк
+    :param query: Текст запроса для лога (None — не логировать)
+    :param search_type: Тип поиска
+    :param error_message: Текст сообщения об ошибке
+    :return: Генератор строк-словарей
+    """
+    count = 0
+    try:
+        for row in rows:
+            count += 1
+            yield row
+    except Exception as e:
+        print(f"{error_message}: {e}")
+        logger.error(f"{error_message}: {e}")
+    finally:
+        if query is not None:
+            log_search_query(query, search_type, count)
+
+
+def iter_films_by_keyword(keyword: str, chunk_size: int = 500):
+    """
+    Потоково найти все фильмы по ключевому слову (постоянный объём памяти).
+    :param keyword: Ключевое слово для поиска
+    :param chunk_size: Размер порции (одна страница seek-запроса)
+    :return: Генератор словарей с фильмами
+    """
+    keyword = normalize_text(keyword)
+    rows = _iter_pages(
+        lambda limit, page_token: _query_films_by_keyword_page(keyword, limit, page_token),
+        chunk_size, ('film_id',)
+    )
+    return _stream_and_log(rows, keyword, 'keyword',
+                           f"Ошибка поиска фильмов по ключевому слову '{keyword}'")
+
+
+def iter_films_by_criteria(genre: str | list[str] = None, year_from: int = None, year_to: int = None, chunk_size: int = 500,
+                           year_ranges: list[tuple[int, int]] = None):
+    """
+    Потоково найти все фильмы по жанрам и/или диапазонам годов (строка на фильм).
+    :param genre: Жанр или список жанров (любой из)
+    :param year_from: Минимальный год
+    :param year_to: Максимальный год
+    :param chunk_size: Размер порции (одна страница seek-запроса)
+    :param year_ranges: Дополнительные диапазоны годов [(year_from, year_to), ...] (любой из)
+    :return: Генератор словарей с фильмами
+    """
+    genres, ranges = _criteria_filters(genre, year_from, year_to, year_ranges)
+    if not (genres or ranges):
+        return iter(())
+    rows = _iter_pages(
+        lambda limit, page_token: _query_films_by_criteria_page(genres, ranges, limit, page_token),
+        chunk_size
+    )
+    return _stream_and_log(rows, _criteria_label(genres, ranges), 'genre_year',
+                           "Ошибка поиска фильмов по критериям")
+
+
+def iter_films_by_first_letter(letter: str, chunk_size: int = 500):
+    """
+    Потоково найти все фильмы, название которых начинается с заданной буквы.
+    :param letter: Первая буква названия
+    :param chunk_size: Размер порции (одна страница seek-запроса)
+    :return: Генератор словарей с фильмами
+    """
+    rows = _iter_pages(
+        lambda limit, page_token: _query_films_by_first_letter_page(letter, limit, page_token),
+        chunk_size, ('film_id',)
+    )
+    return _stream_and_log(rows, None, 'first_letter', "Ошибка поиска фильмов по первой букве")
 
 # Синоним для обратной совместимости
 close_db_connection = close_all_connections
@@ -0,0 +1,165 @@
+# Модуль нечёткого поиска по названиям фильмов (BK-дерево по словам названий)
+import sys
+import time
+
+
+def edit_distance(a: str, b: str, max_distance: int | None = None) -> int:
+    """
+    Расстояние Левенштейна между строками с досрочным выходом.
+    :param a: Первая строка
+    :param b: Вторая строка
+    :param max_distance: Если расстояние заведомо больше, вернуть max_distance + 1
+    :return: int
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class BKTree:
+    """
+    BK-дерево для поиска слов в пределах заданного расстояния Левенштейна.
+    Узел — пара (слово, {расстояние: дочерний узел}); неравенство треугольника
+    позволяет обходить только ветви с расстоянием в [d - k, d + k].
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, word: str) -> None:
+        """
+        Добавить слово в дерево (повторы игнорируются).
+        :param word: Слово
+        :return: None
+        """
+        if self.root is None:
+            self.root = (word, {})
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            distance = edit_distance(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                self.size += 1
+                return
+            node = child
+
+    def search(self, word: str, max_distance: int) -> list[tuple[int, str]]:
+        """
+        Найти слова на расстоянии не больше max_distance.
+        :param word: Искомое слово
+        :param max_distance: Максимальное расстояние Левенштейна
+        :return: Список кортежей (расстояние, слово), отсортированный по расстоянию
+        """
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            node_word, children = stack.pop()
+            distance = edit_distance(word, node_word)
+            if distance <= max_distance:
+                found.append((distance, node_word))
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        found.sort()
+        return found
+
+
+class FuzzyTitleIndex:
+    """
+    Индекс нечёткого поиска по film_text.title: BK-дерево по словам названий
+    и списки фильмов для каждого слова.
+    """
+
+    def __init__(self, docs: list[tuple], fingerprint: str):
+        """
+        :param docs: Список кортежей (film_id, title, description)
+        :param fingerprint: Отпечаток состояния таблицы, по которому строился индекс
+        """
+        started = time.perf_counter()
+        self.docs = docs
+        self.fingerprint = fingerprint
+        self._postings: dict[str, list[int]] = {}
+        for doc_id, (_, title, _) in enumerate(docs):
+            for word in set((title or '').lower().split()):
+                self._postings.setdefault(word, []).append(doc_id)
+        self.tree = BKTree()
+        for word in self._postings:
+            self.tree.add(word)
+        self.build_seconds = time.perf_counter() - started
+
+    @staticmethod
+    def default_distance(word: str, max_distance: int) -> int:
+        """
+        Допустимое число опечаток для слова: короткие слова — не больше одной.
+        :param word: Слово запроса
+        :param max_distance: Верхняя граница из настроек
+        :return: int
+        """
+        return min(max_distance, 1 if len(word) <= 4 else 2)
+
+    def search(self, keyword: str, limit: int = 10, max_distance: int = 2) -> list[dict]:
+        """
+        Найти фильмы, в названии которых есть слова, близкие к каждому слову запроса.
+        Результаты упорядочены по суммарному расстоянию, затем по названию.
+        :param keyword: Запрос (возможно, с опечатками)
+        :param limit: Максимальное количество результатов
+        :param max_distance: Максимальное расстояние для одного слова
+        :return: Список словарей с ключами 'title', 'description' и 'distance'
+        """
+        scores = None
+        for word in keyword.lower().split():
+            best: dict[int, int] = {}
+            for distance, match in self.tree.search(word, self.default_distance(word, max_distance)):
+                for doc_id in self._postings[match]:
+                    if distance < best.get(doc_id, distance + 1):
+                        best[doc_id] = distance
+            if scores is None:
+                scores = best
+            else:
+                scores = {doc_id: scores[doc_id] + distance for doc_id, distance in best.items() if doc_id in scores}
+            if not scores:
+                return []
+        if not scores:
+            return []
+        ranked = sorted(scores.items(), key=lambda item: (item[1], self.docs[item[0]][1]))
+        return [
+            {'title': self.docs[doc_id][1], 'description': self.docs[doc_id][2], 'distance': distance}
+            for doc_id, distance in ranked[:limit]
+        ]
+
+    def stats(self) -> dict:
+        """
+        Статистика индекса: число фильмов и слов, примерный объём памяти и время построения.
+        :return: dict
+        """
+        memory = sys.getsizeof(self._postings)
+        for word, posting in self._postings.items():
+            memory += sys.getsizeof(word) + sys.getsizeof(posting)
+        return {
+            'documents': len(self.docs),
+            'words': self.tree.size,
+            'memory_bytes': memory,
+            'build_seconds': round(self.build_seconds, 4),
+        }
@@ -0,0 +1,45 @@
+# Модуль отложенного импорта тяжёлых зависимостей (драйверы БД, рендеринг таблиц)
+import importlib
+import threading
+
+
+class LazyModule:
+    """
+    Заместитель модуля: настоящий импорт выполняется при первом обращении к атрибуту.
+    Потокобезопасен, поэтому первым обращением может быть вызов из пула потоков.
+    """
+
+    def __init__(self, name: str):
+        """
+        :param name: Полное имя модуля, например 'pymongo'
+        """
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """
+        Импортировать модуль, если он ещё не загружен.
+        :return: Модуль
+        """
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self._load(), attribute)
+
+    def __repr__(self) -> str:
+        state = 'загружен' if self._module is not None else 'не загружен'
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    Отложенный импорт модуля.
+    :param name: Полное имя модуля
+    :return: LazyModule
+    """
+    return LazyModule(name)
@@ -0,0 +1,200 @@
+# Модуль фоновой буферизованной записи логов поисковых запросов
+import queue
+import threading
+import time
+from logger import logger
+
+# Маркеры остановки фонового потока и принудительной записи пачки
+_STOP = object()
+_FLUSH = object()
+
+
+class BufferedLogWriter:
+    """
+    Ограниченная очередь записей с фоновым потоком, который пачками
+    передаёт их в sink (например, insert_many в MongoDB).
+    Пачка отправляется при достижении batch_size или по истечении flush_interval.
+    """
+
+    def __init__(self, sink, max_queue_size: int = 1000, batch_size: int = 50,
+                 flush_interval: float = 1.0, put_timeout: float = 0.05):
+        """
+        :param sink: Функция, принимающая список записей и сохраняющая их
+        :param max_queue_size: Максимальное количество записей в очереди
+        :param batch_size: Размер пачки для одной записи в хранилище
+        :param flush_interval: Максимальное время ожидания пачки в секундах
+        :param put_timeout: Сколько ждать места в полной очереди, прежде чем отбросить запись
+        """
+        self._sink = sink
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._put_timeout = put_timeout
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self._stats = {'enqueued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+        # Счётчики меняют потоки поиска и фоновый поток; += не атомарен
+        self._stats_lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        """
+        Запустить фоновый поток при первой записи.
+        :return: None
+        """
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+                self._thread.start()
+
+    def _count(self, **increments: int) -> None:
+        """
+        Увеличить счётчики статистики.
+        :param increments: Имя счётчика -> приращение
+        :return: None
+        """
+        with self._stats_lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def put(self, entry: dict) -> bool:
+        """
+        Поставить запись в очередь. Если очередь заполнена дольше put_timeout,
+        запись отбрасывается и учитывается в счётчике 'dropped'.
+        :param entry: Запись лога
+        :return: True, если запись принята
+        """
+        if self._closed:
+            self._count(dropped=1)
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put(entry, timeout=self._put_timeout)
+        except queue.Full:
+            self._count(dropped=1)
+            return False
+        self._count(enqueued=1)
+        return True
+
+    def put_many(self, entries: list[dict]) -> bool:
+        """
+        Поставить несколько записей в очередь одним элементом,
+        чтобы они гарантированно попали в одну пачку записи.
+        :param entries: Список записей лога
+        :return: True, если записи приняты
+        """
+        if not entries:
+            return True
+        if self._closed:
+            self._count(dropped=len(entries))
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put(list(entries), timeout=self._put_timeout)
+        except queue.Full:
+            self._count(dropped=len(entries))
+            return False
+        self._count(enqueued=len(entries))
+        return True
+
+    def _write(self, batch: list[dict]) -> None:
+        """
+        Передать пачку записей в sink с учётом статистики.
+        :param batch: Список записей
+        :return: None
+        """
+        try:
+            self._sink(batch)
+            self._count(written=len(batch), batches=1)
+        except Exception as e:
+            self._count(failed=len(batch))
+            logger.error(f"Ошибка записи пачки логов ({len(batch)} шт.): {e}")
+
+    def _run(self) -> None:
+        """
+        Цикл фонового потока: собрать пачку по размеру или времени и записать её.
+        :return: None
+        """
+        batch = []
+        items = 0
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP or item is _FLUSH:
+                self._write_and_mark(batch, items + 1)
+                batch = []
+                items = 0
+                deadline = None
+                if item is _STOP:
+                    return
+                continue
+            if item is not None:
+                if isinstance(item, list):
+                    batch.extend(item)
+                else:
+                    batch.append(item)
+                items += 1
+                if deadline is None:
+                    deadline = time.monotonic() + self._flush_interval
+            if batch and (len(batch) >= self._batch_size or time.monotonic() >= deadline):
+                self._write_and_mark(batch, items)
+                batch = []
+                items = 0
+                deadline = None
+
+    def _write_and_mark(self, batch: list[dict], items: int) -> None:
+        """
+        Записать пачку (если она не пуста) и отметить элементы очереди как обработанные.
+        :param batch: Список записей
+        :param items: Количество элементов очереди, из которых собрана пачка
+        :return: None
+        """
+        if batch:
+            self._write(batch)
+        self._mark_done(items)
+
+    def _mark_done(self, count: int) -> None:
+        """
+        Отметить записи очереди как обработанные (для flush).
+        :param count: Количество записей
+        :return: None
+        """
+        for _ in range(count):
+            self._queue.task_done()
+
+    def flush(self) -> None:
+        """
+        Дождаться записи всех записей, уже поставленных в очередь.
+        :return: None
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_FLUSH)
+            self._queue.join()
+
+    def close(self, timeout: float = 10.0) -> None:
+        """
+        Записать оставшиеся записи и остановить фоновый поток.
+        :param timeout: Максимальное время ожидания в секундах
+        :return: None
+        """
+        self._closed = True
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> dict:
+        """
+        Счётчики записи: принято, записано, отброшено, ошибок, пачек, в очереди.
+        :return: dict
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        return dict(stats, queued=self._queue.qsize())
@@ -1,18 +1,39 @@
 import logging
 import os
 
-# Создание директории для логов, если её нет
-os.makedirs('logs', exist_ok=True)
+
+class _LazyFileHandler(logging.FileHandler):
+    """
+    Файловый обработчик, который создаёт директорию и открывает файл
+    только при первой записи (запуск приложения не трогает файловую систему).
+    """
+
+    def __init__(self, filename: str, encoding: str = 'utf-8'):
+        super().__init__(filename, encoding=encoding, delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
 
 # Настройка логгера
 logger = logging.getLogger('project_logger')
-logger.setLevel(logging.ERROR)
+logger.setLevel(logging.WARNING)
 
-# Обработчик для записи ошибок в файл logs/log.fail
-file_handler = logging.FileHandler('logs/log.fail', encoding='utf-8')
-file_handler.setLevel(logging.ERROR)
+# Обработчик для записи ошибок и предупреждений в файл logs/log.fail
+file_handler = _LazyFileHandler('logs/log.fail')
+file_handler.setLevel(logging.WARNING)
 formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 file_handler.setFormatter(formatter)
 
 # Добавляем обработчик к логгеру
 logger.addHandler(file_handler)
+
+
+# Журнал медленных SQL-запросов (logs/slow_queries.log)
+slow_query_logger = logging.getLogger('project_logger.slow_queries')
+slow_query_logger.setLevel(logging.WARNING)
+slow_query_logger.propagate = False
+slow_query_handler = _LazyFileHandler('logs/slow_queries.log')
+slow_query_handler.setFormatter(formatter)
+slow_query_logger.addHandler(slow_query_handler)
@@ -1,21 +1,58 @@
 # Главный модуль приложения
-from ui import (
-    show_menu, get_menu_choice, get_search_keyword, get_genre_and_year_range,
-    display_film, display_films, display_popular_queries, show_exit_message, get_first_letter
-)
+#
+# Интерактивный режим:  python main.py
+# Пакетный режим:       python main.py --batch requests.jsonl --workers 8 > results.jsonl
+#                       cat requests.jsonl | python main.py --batch -
+# HTTP/JSON сервис:     python main.py --serve --port 8080   (см. server.py)
+#
+# В пакетном режиме каждая строка входа — JSON-запрос, например
+#   {"type": "keyword", "keyword": "love", "limit": 5}
+#   {"type": "criteria", "genre": "Comedy", "year_from": 2000, "year_to": 2010}
+#   {"type": "criteria", "genres": ["Comedy", "Drama"], "year_ranges": [[2000, 2005], [2010, 2012]]}
+#   {"type": "first_letter", "letter": "A"}
+# ("type" можно не указывать — он определяется по полям запроса).
+# На каждую строку входа в stdout выводится одна строка JSON с результатами и временем.
+import argparse
+import contextlib
+import json
+import sys
+import threading
+from itertools import islice
+
 from db import (
-    find_films_by_keyword, find_films_by_criteria,
-    close_all_connections, find_films_by_first_letter
+    find_films_by_keyword_page, find_films_by_criteria_page,
+    close_all_connections, find_films_by_first_letter_page, warm_search_index, warm_metadata_cache,
+    iter_films_by_keyword, find_films_fuzzy, find_films_by_prefix, search_many
 )
 from settings import settings
 
 
-def main() -> None:
+def _warm_up() -> None:
+    """
+    Загрузить справочные данные и поисковый индекс до первого поиска.
+    :return: None
+    """
+    warm_metadata_cache()
+    index = warm_search_index()
+    if index is not None and settings.DEBUG:
+        print(f"Поисковый индекс загружен: {index.stats()}")
+
+
+def run_interactive() -> None:
     """
     Основной цикл приложения.
     Управляет меню, обработкой пользовательского ввода и вызовом функций поиска.
     :return: None
     """
+    # UI (и PrettyTable) нужен только в интерактивном режиме
+    from ui import (
+        show_menu, get_menu_choice, get_search_keyword, get_genre_and_year_range,
+        display_popular_queries, show_exit_message, get_first_letter,
+        show_paged, display_films_stream, display_fuzzy_suggestions, autocomplete_title
+    )
+
+    # Кэши прогреваются в фоне: меню появляется сразу, не дожидаясь подключения к БД
+    threading.Thread(target=_warm_up, name='warm-up', daemon=True).start()
     while True:
         show_menu()
         choice = get_menu_choice()
@@ -23,18 +60,20 @@ def main() -> None:
         if choice == "1":
             # Поиск по ключевому слову
             keyword = get_search_keyword()
-            films = find_films_by_keyword(keyword)
-            display_films(films)
+            shown = show_paged(lambda token: find_films_by_keyword_page(keyword, page_token=token))
+            if shown == 0:
+                # Ничего не найдено: вместо повторного ввода предлагаем похожие названия
+                display_fuzzy_suggestions(find_films_fuzzy(keyword))
 
         elif choice == "2":
             # Поиск по жанру и диапазону годов
             criteria = get_genre_and_year_range()
-            films = find_films_by_criteria(
+            show_paged(lambda token: find_films_by_criteria_page(
                 genre=criteria['genre'],
                 year_from=criteria['year_from'],
-                year_to=criteria['year_to']
-            )
-            display_films(films)
+                year_to=criteria['year_to'],
+                page_token=token
+            ))
 
         elif choice == "3":
             # Просмотр популярных запросов
@@ -43,8 +82,20 @@ def main() -> None:
         elif choice == "4":
             # Поиск по первой букве
             letter = get_first_letter()
-            films = find_films_by_first_letter(letter)
-            display_films(films)
+            show_paged(lambda token: find_films_by_first_letter_page(letter, page_token=token))
+
+        elif choice == "5":
+            # Потоковый вывод всех результатов по ключевому слову
+            keyword = get_search_keyword()
+            display_films_stream(iter_films_by_keyword(keyword))
+
+        elif choice == "6":
+            # Автодополнение: подсказки по префиксному индексу на каждое нажатие клавиши
+            prefix = autocomplete_title(
+                lambda text, limit: [film['title'] for film in find_films_by_prefix(text, limit)[0]]
+            )
+            if prefix:
+                show_paged(lambda token: find_films_by_prefix(prefix, page_token=token))
 
         elif choice == "9":
             # Выход
@@ -55,5 +106,114 @@ def main() -> None:
     close_all_connections()
 
 
+def _parse_batch_line(line: str) -> dict:
+    """
+    Разобрать строку пакетного входа в описание запроса для search_many.
+    Если тип не указан, он определяется по полям запроса.
+    :param line: Строка JSON
+    :return: dict
+    """
+    spec = json.loads(line)
+    if not isinstance(spec, dict):
+        raise ValueError("ожидается JSON-объект")
+    if 'type' not in spec:
+        if 'keyword' in spec:
+            spec['type'] = 'keyword'
+        elif 'letter' in spec:
+            spec['type'] = 'first_letter'
+        elif spec.keys() & {'genre', 'genres', 'year_from', 'year_to', 'year_ranges'}:
+            spec['type'] = 'criteria'
+        else:
+            raise ValueError("не удалось определить тип запроса")
+    return spec
+
+
+def run_batch(source, output, workers: int, chunk_size: int = 100) -> int:
+    """
+    Выполнить поисковые запросы из JSONL параллельно и вывести результаты в JSONL.
+    Запросы читаются порциями по chunk_size строк, поэтому вход может быть
+    бесконечным потоком; порядок ответов совпадает с порядком строк входа.
+    :param source: Итератор строк входа
+    :param output: Поток для строк результата
+    :param workers: Количество параллельных потоков
+    :param chunk_size: Размер порции
+    :return: Количество запросов, завершившихся ошибкой
+    """
+    failed = 0
+    line_number = 0
+    lines = iter(source)
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            break
+        records, specs = [], []
+        for line in chunk:
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                spec = _parse_batch_line(line)
+            except ValueError as e:
+                records.append({'line': line_number, 'error': f"некорректный запрос: {e}"})
+                continue
+            records.append({'line': line_number, 'spec': spec})
+            specs.append(spec)
+        outcomes = iter(search_many(specs, max_workers=workers))
+        for record in records:
+            if 'spec' in record:
+                outcome = next(outcomes)
+                record.update(
+                    results=outcome['results'],
+                    count=len(outcome['results']),
+                    ms=round(outcome['seconds'] * 1000, 3),
+                    error=outcome['error']
+                )
+            failed += record.get('error') is not None
+            output.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        output.flush()
+    return failed
+
+
+def main(argv: list[str] = None) -> None:
+    """
+    Точка входа: интерактивное меню, пакетный режим (--batch) или HTTP-сервис (--serve).
+    :param argv: Аргументы командной строки (по умолчанию sys.argv)
+    :return: None
+    """
+    parser = argparse.ArgumentParser(description="Поиск фильмов")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="пакетный режим: файл JSONL с запросами ('-' — stdin)")
+    parser.add_argument('--workers', type=int, default=settings.BATCH_MAX_WORKERS,
+                        help="количество параллельных потоков в пакетном режиме")
+    parser.add_argument('--chunk-size', type=int, default=100, help="размер порции запросов")
+    parser.add_argument('--serve', action='store_true', help="запустить HTTP/JSON сервис поиска")
+    parser.add_argument('--host', help="адрес HTTP-сервиса (по умолчанию HTTP_HOST)")
+    parser.add_argument('--port', type=int, help="порт HTTP-сервиса (по умолчанию HTTP_PORT)")
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        from server import serve
+        serve(args.host, args.port)
+        return
+
+    if args.batch is None:
+        run_interactive()
+        return
+
+    output = sys.stdout
+    source = sys.stdin if args.batch == '-' else open(args.batch, encoding='utf-8')
+    try:
+        # stdout принадлежит JSONL; диагностика функций db.py уходит в stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            failed = run_batch(source, output, args.workers, args.chunk_size)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        with contextlib.redirect_stdout(sys.stderr):
+            close_all_connections()
+    if failed:
+        sys.exit(1)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
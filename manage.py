@@ -0,0 +1,165 @@
+# Служебные команды обслуживания баз данных
+import argparse
+import csv
+import sys
+from db import (
+    close_all_connections, rebuild_popular_queries, mysql_connection, export_film_snapshot,
+    compact_search_log,
+    iter_films_by_keyword, iter_films_by_criteria, iter_films_by_first_letter
+)
+
+
+def backfill_popular(args: argparse.Namespace) -> None:
+    """
+    Построить коллекцию счётчиков популярных запросов по посуточным агрегатам и логу.
+    :param args: Аргументы командной строки
+    :return: None
+    """
+    count = rebuild_popular_queries()
+    print(f"Коллекция популярных запросов перестроена: {count} запрос(ов)")
+
+
+def compact_logs(args: argparse.Namespace) -> None:
+    """
+    Свернуть сырые логи поиска в почасовые и посуточные агрегаты (запускать по cron).
+    :param args: Аргументы командной строки
+    :return: None
+    """
+    result = compact_search_log(slice_hours=args.slice_hours)
+    if result['until'] is None:
+        print("Сырых логов нет, сжимать нечего")
+        return
+    print(f"Свёрнуто записей: {result['processed']} за период {result['from']} — {result['until']}")
+
+
+def export_films(args: argparse.Namespace) -> None:
+    """
+    Выгрузить результаты поиска в CSV потоково, не держа их в памяти.
+    :param args: Аргументы командной строки
+    :return: None
+    """
+    if args.keyword:
+        rows = iter_films_by_keyword(args.keyword)
+    elif args.letter:
+        rows = iter_films_by_first_letter(args.letter)
+    else:
+        rows = iter_films_by_criteria(args.genre, args.year_from, args.year_to)
+    output = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        writer = None
+        count = 0
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(output, fieldnames=list(row.keys()))
+                writer.writeheader()
+            writer.writerow(row)
+            count += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"Выгружено фильмов: {count}", file=sys.stderr)
+
+
+def export_snapshot(args: argparse.Namespace) -> None:
+    """
+    Выгрузить фильмы в колоночный снимок для SEARCH_BACKEND=snapshot.
+    :param args: Аргументы командной строки
+    :return: None
+    """
+    meta = export_film_snapshot(args.output)
+    print(f"Снимок записан: {meta['films']} фильм(ов), {len(meta['categories'])} жанр(ов), "
+          f"{meta['export_seconds']} с")
+
+
+def ensure_indexes(args: argparse.Namespace) -> None:
+    """
+    Создать отсутствующие индексы MySQL и индексы MongoDB.
+    :param args: Аргументы командной строки
+    :return: None
+    """
+    import schema
+    with mysql_connection() as connection:
+        created = schema.ensure_mysql_indexes(connection)
+    print(f"MySQL: создано индексов: {len(created)}" + (f" ({', '.join(created)})" if created else ""))
+    print(f"MongoDB: индексы {', '.join(schema.ensure_mongo_indexes())}")
+
+
+def check_schema(args: argparse.Namespace) -> None:
+    """
+    Проверить наличие индексов и планы EXPLAIN всех запросов db.py.
+    Завершается с кодом 1, если индексов не хватает или есть неожиданные полные просмотры.
+    :param args: Аргументы командной строки
+    :return: None
+    """
+    import schema
+    with mysql_connection() as connection:
+        missing = schema.find_missing_mysql_indexes(connection)
+    statements = schema.capture_statements()
+    with mysql_connection() as connection:
+        report = schema.explain_statements(connection, statements)
+
+    for index in missing:
+        print(f"НЕТ ИНДЕКСА: {index['table']}.{index['name']} ({', '.join(index['columns'])}, {index['type']})")
+    problems = [row for row in report if not row['expected']]
+    for row in report:
+        status = 'ожидаемо' if row['expected'] else 'ПРОБЛЕМА'
+        details = row.get('error') or f"type={row['type']} key={row['key']} rows={row['rows']}"
+        print(f"[{status}] {row['function']}: {row['table']} {details}")
+        if not row['expected'] and args.verbose:
+            print(f"    {row['sql']}")
+    print(f"Проверено запросов: {len(statements)}; отсутствует индексов: {len(missing)}; "
+          f"неожиданных полных просмотров: {len(problems)}")
+    if missing or problems:
+        sys.exit(1)
+
+
+def main() -> None:
+    """
+    Разобрать аргументы командной строки и выполнить выбранную команду.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(description="Служебные команды проекта")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    backfill_parser = subparsers.add_parser(
+        'backfill-popular', help="перестроить счётчики популярных запросов по агрегатам и сырому логу"
+    )
+    backfill_parser.set_defaults(handler=backfill_popular)
+
+    compact_parser = subparsers.add_parser(
+        'compact-logs', help="свернуть сырые логи поиска в почасовые и посуточные агрегаты"
+    )
+    compact_parser.add_argument('--slice-hours', type=int, default=24, help="размер порции обработки в часах")
+    compact_parser.set_defaults(handler=compact_logs)
+
+    export_parser = subparsers.add_parser('export-films', help="потоковая выгрузка фильмов в CSV")
+    export_group = export_parser.add_mutually_exclusive_group(required=True)
+    export_group.add_argument('--keyword', help="ключевое слово в названии")
+    export_group.add_argument('--letter', help="первая буква названия")
+    export_group.add_argument('--genre', help="жанр (можно вместе с --year-from/--year-to)")
+    export_group.add_argument('--years', action='store_true', help="только диапазон годов")
+    export_parser.add_argument('--year-from', type=int)
+    export_parser.add_argument('--year-to', type=int)
+    export_parser.add_argument('--output', help="файл CSV (по умолчанию stdout)")
+    export_parser.set_defaults(handler=export_films)
+
+    snapshot_parser = subparsers.add_parser('export-snapshot', help="выгрузить колоночный снимок фильмов")
+    snapshot_parser.add_argument('--output', help="каталог снимка (по умолчанию SNAPSHOT_DIR)")
+    snapshot_parser.set_defaults(handler=export_snapshot)
+
+    indexes_parser = subparsers.add_parser('ensure-indexes', help="создать необходимые индексы MySQL и MongoDB")
+    indexes_parser.set_defaults(handler=ensure_indexes)
+
+    check_parser = subparsers.add_parser('check-schema', help="проверить индексы и EXPLAIN всех запросов")
+    check_parser.add_argument('--verbose', action='store_true', help="показывать SQL проблемных запросов")
+    check_parser.set_defaults(handler=check_schema)
+
+    args = parser.parse_args()
+    try:
+        args.handler(args)
+    finally:
+        close_all_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Модуль кэша справочных данных (жанры, диапазон годов)
+import threading
+import time
+
+
+class MetadataCache:
+    """
+    Кэш редко меняющихся справочных данных.
+    Актуальность проверяется дешёвым запросом версии (например, MAX(last_update))
+    не чаще refresh_interval секунд; полная перезагрузка — только при смене версии.
+    """
+
+    def __init__(self, load_version, load_data, refresh_interval: float = 60.0):
+        """
+        :param load_version: Функция без аргументов, возвращающая версию данных
+        :param load_data: Функция без аргументов, возвращающая словарь данных
+        :param refresh_interval: Как часто проверять версию, в секундах
+        """
+        self._load_version = load_version
+        self._load_data = load_data
+        self.refresh_interval = refresh_interval
+        self._data = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {'loads': 0, 'version_checks': 0}
+
+    def _reload(self, version=None) -> None:
+        """
+        Загрузить данные заново (вызывается под блокировкой).
+        :param version: Уже полученная версия данных или None
+        :return: None
+        """
+        if version is None:
+            version = self._load_version()
+        self._data = self._load_data()
+        self._version = version
+        self._checked_at = time.monotonic()
+        self._stats['loads'] += 1
+
+    def get(self) -> dict:
+        """
+        Получить актуальные данные, при необходимости проверив версию.
+        :return: dict
+        """
+        with self._lock:
+            if self._data is None:
+                self._reload()
+            elif time.monotonic() - self._checked_at >= self.refresh_interval:
+                self._checked_at = time.monotonic()
+                self._stats['version_checks'] += 1
+                version = self._load_version()
+                if version != self._version:
+                    self._reload(version)
+            return self._data
+
+    def invalidate(self) -> None:
+        """
+        Сбросить данные; при следующем обращении они будут загружены заново.
+        :return: None
+        """
+        with self._lock:
+            self._data = None
+            self._version = None
+
+    def stats(self) -> dict:
+        """
+        Счётчики загрузок и проверок версии.
+        :return: dict
+        """
+        with self._lock:
+            return dict(self._stats, loaded=self._data is not None, version=str(self._version))
@@ -0,0 +1,272 @@
+# Модуль метрик доступа к данным: гистограммы задержек, строки, ошибки, медленные запросы
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from logger import logger, slow_query_logger
+from settings import settings
+
+# Границы корзин гистограммы задержек, в миллисекундах
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Metrics:
+    """
+    Потокобезопасный реестр метрик по парам (функция, тип поиска):
+    количество вызовов, гистограмма задержек, суммарное число строк и ошибок.
+    """
+
+    def __init__(self, slow_query_threshold_ms: float = None):
+        """
+        :param slow_query_threshold_ms: Порог медленного SQL-запроса в миллисекундах
+                                        (None — SLOW_QUERY_THRESHOLD_MS из настроек)
+        """
+        self.slow_query_threshold_ms = slow_query_threshold_ms
+        self._lock = threading.Lock()
+        self._series = {}
+        self._local = threading.local()
+        self._slow_queries = 0
+
+    def _stack(self) -> list:
+        """
+        Стек выполняемых в текущем потоке инструментированных вызовов.
+        :return: list
+        """
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def mark_error(self) -> None:
+        """
+        Отметить ошибку во внутреннем выполняемом вызове текущего потока.
+        :return: None
+        """
+        stack = self._stack()
+        if stack:
+            stack[-1]['error'] = True
+
+    def observe(self, function: str, search_type: str, seconds: float, rows: int, error: bool) -> None:
+        """
+        Учесть один вызов функции.
+        :param function: Имя функции
+        :param search_type: Тип поиска ('' если не применимо)
+        :param seconds: Длительность в секундах
+        :param rows: Количество возвращённых строк
+        :param error: Признак ошибки
+        :return: None
+        """
+        elapsed_ms = seconds * 1000
+        with self._lock:
+            series = self._series.get((function, search_type))
+            if series is None:
+                series = {
+                    'count': 0, 'errors': 0, 'rows': 0, 'seconds_sum': 0.0, 'seconds_max': 0.0,
+                    'buckets': [0] * (len(BUCKETS_MS) + 1)
+                }
+                self._series[(function, search_type)] = series
+            series['count'] += 1
+            series['errors'] += int(error)
+            series['rows'] += rows
+            series['seconds_sum'] += seconds
+            series['seconds_max'] = max(series['seconds_max'], seconds)
+            for i, bound in enumerate(BUCKETS_MS):
+                if elapsed_ms <= bound:
+                    series['buckets'][i] += 1
+                    break
+            else:
+                series['buckets'][-1] += 1
+
+    def observe_sql(self, sql: str, params, seconds: float) -> None:
+        """
+        Записать SQL-запрос в журнал медленных запросов, если он дольше порога.
+        :param sql: Текст SQL-запроса
+        :param params: Параметры запроса
+        :param seconds: Длительность в секундах
+        :return: None
+        """
+        stack = self._stack()
+        function = stack[-1]['function'] if stack else '-'
+        captured = getattr(self._local, 'captured', None)
+        if captured is not None:
+            captured.append((function, sql, params))
+        elapsed_ms = seconds * 1000
+        threshold_ms = self.slow_query_threshold_ms
+        if threshold_ms is None:
+            threshold_ms = settings.SLOW_QUERY_THRESHOLD_MS
+        if elapsed_ms < threshold_ms:
+            return
+        with self._lock:
+            self._slow_queries += 1
+        compact_sql = ' '.join(sql.split())
+        slow_query_logger.warning(f"{elapsed_ms:.1f} ms [{function}] {compact_sql} params={params!r}")
+
+    @contextmanager
+    def capture_sql(self):
+        """
+        Собрать все SQL-запросы, выполненные в текущем потоке внутри блока with.
+        :return: Список кортежей (функция, SQL, параметры)
+        """
+        self._local.captured = []
+        try:
+            yield self._local.captured
+        finally:
+            del self._local.captured
+
+    def snapshot(self) -> dict:
+        """
+        Текущие значения метрик.
+        :return: Словарь {'functions': {...}, 'slow_queries': int}
+        """
+        with self._lock:
+            functions = {}
+            for (function, search_type), series in sorted(self._series.items()):
+                name = f"{function}[{search_type}]" if search_type else function
+                count = series['count']
+                functions[name] = {
+                    'count': count,
+                    'errors': series['errors'],
+                    'rows': series['rows'],
+                    'avg_ms': round(series['seconds_sum'] / count * 1000, 3) if count else 0.0,
+                    'max_ms': round(series['seconds_max'] * 1000, 3),
+                    'histogram_ms': dict(zip([*map(str, BUCKETS_MS), '+Inf'], series['buckets']))
+                }
+            return {'functions': functions, 'slow_queries': self._slow_queries}
+
+    def to_prometheus(self) -> str:
+        """
+        Метрики в текстовом формате Prometheus.
+        :return: str
+        """
+        lines = [
+            '# HELP film_search_call_seconds Data access call latency.',
+            '# TYPE film_search_call_seconds histogram',
+        ]
+        counters = []
+        with self._lock:
+            for (function, search_type), series in sorted(self._series.items()):
+                labels = f'function="{function}",search_type="{search_type}"'
+                cumulative = 0
+                for bound, bucket in zip(BUCKETS_MS, series['buckets']):
+                    cumulative += bucket
+                    lines.append(f'film_search_call_seconds_bucket{{{labels},le="{bound / 1000}"}} {cumulative}')
+                lines.append(f'film_search_call_seconds_bucket{{{labels},le="+Inf"}} {series["count"]}')
+                lines.append(f'film_search_call_seconds_sum{{{labels}}} {series["seconds_sum"]}')
+                lines.append(f'film_search_call_seconds_count{{{labels}}} {series["count"]}')
+                counters.append(f'film_search_rows_total{{{labels}}} {series["rows"]}')
+                counters.append(f'film_search_errors_total{{{labels}}} {series["errors"]}')
+            slow_queries = self._slow_queries
+        lines += ['# TYPE film_search_rows_total counter', '# TYPE film_search_errors_total counter']
+        lines += counters
+        lines += ['# TYPE film_search_slow_queries_total counter', f'film_search_slow_queries_total {slow_queries}']
+        return '\n'.join(lines) + '\n'
+
+    def dump_prometheus(self, path: str) -> None:
+        """
+        Записать метрики в файл в формате Prometheus (для node_exporter textfile).
+        :param path: Путь к файлу
+        :return: None
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def reset(self) -> None:
+        """
+        Сбросить все метрики.
+        :return: None
+        """
+        with self._lock:
+            self._series.clear()
+            self._slow_queries = 0
+
+
+def _count_rows(result) -> int:
+    """
+    Определить количество строк в результате функции доступа к данным.
+    :param result: Результат функции
+    :return: int
+    """
+    if result is None:
+        return 0
+    if isinstance(result, tuple) and result and isinstance(result[0], list):
+        return len(result[0])
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, int) and not isinstance(result, bool):
+        return result
+    return 1
+
+
+class _ErrorCountingHandler(logging.Handler):
+    """
+    Обработчик логгера проекта: каждое logger.error внутри инструментированного
+    вызова засчитывается этому вызову как ошибка (функции db.py перехватывают
+    исключения сами и только логируют их).
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        metrics.mark_error()
+
+
+def instrumented(search_type: str = ''):
+    """
+    Декоратор: замерить время вызова, число строк и ошибки функции.
+    :param search_type: Тип поиска для метки метрики
+    :return: декоратор
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            stack = metrics._stack()
+            frame = {'function': func.__name__, 'error': False}
+            stack.append(frame)
+            started = time.perf_counter()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            except Exception:
+                frame['error'] = True
+                raise
+            finally:
+                stack.pop()
+                metrics.observe(func.__name__, search_type, time.perf_counter() - started,
+                                _count_rows(result), frame['error'])
+                # Ошибка вложенного вызова — это и ошибка внешнего
+                if frame['error'] and stack:
+                    stack[-1]['error'] = True
+        return wrapper
+    return decorator
+
+
+def timed_execute(cursor, sql: str, params=None):
+    """
+    Выполнить SQL-запрос на курсоре с замером времени для журнала медленных запросов.
+    :param cursor: Курсор БД
+    :param sql: Текст SQL-запроса
+    :param params: Параметры запроса
+    :return: Результат cursor.execute
+    """
+    started = time.perf_counter()
+    try:
+        return cursor.execute(sql, params)
+    finally:
+        metrics.observe_sql(sql, params, time.perf_counter() - started)
+
+
+def get_metrics() -> dict:
+    """
+    Получить снимок метрик доступа к данным.
+    :return: dict
+    """
+    return metrics.snapshot()
+
+
+# Общий реестр метрик приложения
+metrics = Metrics()
+logger.addHandler(_ErrorCountingHandler(level=logging.ERROR))
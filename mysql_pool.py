@@ -0,0 +1,226 @@
+# Модуль потокобезопасного пула соединений с MySQL
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeoutError(Exception):
+    """
+    Не удалось получить соединение из пула за отведённое время.
+    """
+
+
+class ConnectionPool:
+    """
+    Пул соединений с ограничением минимального и максимального размера.
+    Простаивающие дольше idle_timeout соединения закрываются (сверх min_size),
+    а проверка ping выполняется только для соединений, простоявших
+    дольше health_check_after секунд.
+    """
+
+    def __init__(self, connect, min_size: int = 1, max_size: int = 5, idle_timeout: float = 300.0,
+                 health_check_after: float = 30.0, acquire_timeout: float = 10.0):
+        """
+        :param connect: Функция без аргументов, открывающая новое соединение
+        :param min_size: Минимальное количество удерживаемых соединений
+        :param max_size: Максимальное количество соединений
+        :param idle_timeout: Через сколько секунд простоя закрывать лишние соединения
+        :param health_check_after: После скольких секунд простоя проверять соединение ping
+        :param acquire_timeout: Максимальное время ожидания свободного соединения
+        """
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.acquire_timeout = acquire_timeout
+        self._idle = deque()
+        self._size = 0
+        self._active = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._stats = {
+            'created': 0, 'closed': 0, 'acquired': 0, 'health_checks': 0,
+            'waits': 0, 'wait_seconds_total': 0.0, 'wait_seconds_max': 0.0
+        }
+
+    def _open(self):
+        """
+        Открыть новое соединение; при ошибке освободить зарезервированное место.
+        :return: Соединение
+        """
+        try:
+            connection = self._connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._stats['created'] += 1
+        return connection
+
+    def _discard(self, connection) -> None:
+        """
+        Закрыть соединение и уменьшить размер пула (вызывается под блокировкой).
+        :param connection: Соединение
+        :return: None
+        """
+        try:
+            connection.close()
+        except Exception:
+            pass
+        self._size -= 1
+        self._stats['closed'] += 1
+
+    def _prune_idle(self, now: float) -> None:
+        """
+        Закрыть соединения, простаивающие дольше idle_timeout, сверх min_size.
+        Самые старые соединения лежат в начале очереди.
+        :param now: Текущее время (time.monotonic)
+        :return: None
+        """
+        while self._idle and self._size > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+            connection, _ = self._idle.popleft()
+            self._discard(connection)
+
+    def prefill(self) -> None:
+        """
+        Открыть соединения до min_size заранее.
+        :return: None
+        """
+        while True:
+            with self._condition:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            connection = self._open()
+            with self._condition:
+                self._idle.append((connection, time.monotonic()))
+                self._condition.notify()
+
+    def acquire(self):
+        """
+        Взять соединение из пула, при необходимости открыв новое или дождавшись свободного.
+        :return: Соединение
+        """
+        started = time.monotonic()
+        deadline = started + self.acquire_timeout
+        waited = False
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError("Пул соединений закрыт")
+                now = time.monotonic()
+                self._prune_idle(now)
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    connection, last_used = None, now
+                    break
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"Нет свободных соединений MySQL за {self.acquire_timeout} с"
+                    )
+                waited = True
+                self._condition.wait(remaining)
+            wait_seconds = time.monotonic() - started
+            if waited:
+                self._stats['waits'] += 1
+            self._stats['wait_seconds_total'] += wait_seconds
+            self._stats['wait_seconds_max'] = max(self._stats['wait_seconds_max'], wait_seconds)
+            self._stats['acquired'] += 1
+            self._active += 1
+        try:
+            if connection is None:
+                connection = self._open()
+            elif time.monotonic() - last_used >= self.health_check_after:
+                connection = self._check(connection)
+        except Exception:
+            with self._condition:
+                self._active -= 1
+            raise
+        return connection
+
+    def _check(self, connection):
+        """
+        Проверить давно простаивавшее соединение и заменить его, если оно разорвано.
+        :param connection: Соединение
+        :return: Рабочее соединение
+        """
+        with self._condition:
+            self._stats['health_checks'] += 1
+        try:
+            connection.ping(reconnect=True)
+            return connection
+        except Exception:
+            with self._condition:
+                self._discard(connection)
+                self._size += 1
+            return self._open()
+
+    def release(self, connection, broken: bool = False) -> None:
+        """
+        Вернуть соединение в пул (или закрыть его, если оно неисправно).
+        :param connection: Соединение
+        :param broken: Признак того, что соединение нельзя переиспользовать
+        :return: None
+        """
+        with self._condition:
+            self._active -= 1
+            if broken or self._closed:
+                self._discard(connection)
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Контекстный менеджер: взять соединение и гарантированно вернуть его в пул.
+        Соединение, закрывшееся из-за ошибки, в пул не возвращается.
+        :return: Соединение
+        """
+        connection = self.acquire()
+        broken = False
+        try:
+            yield connection
+        except Exception:
+            broken = not getattr(connection, 'open', True)
+            raise
+        finally:
+            self.release(connection, broken=broken)
+
+    def close(self) -> None:
+        """
+        Закрыть все простаивающие соединения; занятые закроются при возврате.
+        :return: None
+        """
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                connection, _ = self._idle.popleft()
+                self._discard(connection)
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        """
+        Статистика пула: размер, занятые и свободные соединения, время ожидания.
+        :return: dict
+        """
+        with self._condition:
+            acquired = self._stats['acquired']
+            average_wait = self._stats['wait_seconds_total'] / acquired if acquired else 0.0
+            return dict(
+                self._stats,
+                size=self._size,
+                active=self._active,
+                idle=len(self._idle),
+                min_size=self.min_size,
+                max_size=self.max_size,
+                wait_seconds_avg=round(average_wait, 6)
+            )
@@ -0,0 +1,95 @@
+# Модуль префиксного индекса по названиям фильмов (для поиска по началу названия и автодополнения)
+import bisect
+import sys
+import time
+
+
+class PrefixIndex:
+    """
+    Префиксное дерево над отсортированным массивом названий.
+    Каждый узел хранит диапазон [lo, hi) строк с этим префиксом, поэтому
+    поиск стоит O(длина префикса + k) и не требует обхода поддерева.
+    Глубже max_depth диапазон сужается бинарным поиском по отсортированным ключам.
+    """
+
+    def __init__(self, docs: list[tuple], fingerprint: str, max_depth: int = 12):
+        """
+        :param docs: Список кортежей (film_id, title, description)
+        :param fingerprint: Отпечаток состояния таблицы, по которому строился индекс
+        :param max_depth: Максимальная глубина дерева
+        """
+        started = time.perf_counter()
+        self.fingerprint = fingerprint
+        self.max_depth = max_depth
+        self.docs = sorted(docs, key=lambda doc: ((doc[1] or '').lower(), doc[0]))
+        self._keys = [((title or '').lower(), film_id) for film_id, title, _ in self.docs]
+        # Узел: [lo, hi, {символ: дочерний узел}]
+        self._root = [0, len(self.docs), {}]
+        self._nodes = 1
+        for i, (title, _) in enumerate(self._keys):
+            node = self._root
+            for char in title[:max_depth]:
+                child = node[2].get(char)
+                if child is None:
+                    child = [i, i, {}]
+                    node[2][char] = child
+                    self._nodes += 1
+                child[1] = i + 1
+                node = child
+        self.build_seconds = time.perf_counter() - started
+
+    def _range(self, prefix: str) -> tuple[int, int]:
+        """
+        Диапазон [lo, hi) строк, название которых начинается с префикса.
+        :param prefix: Префикс в нижнем регистре
+        :return: Кортеж (lo, hi)
+        """
+        node = self._root
+        for char in prefix[:self.max_depth]:
+            node = node[2].get(char)
+            if node is None:
+                return 0, 0
+        lo, hi = node[0], node[1]
+        if len(prefix) > self.max_depth:
+            lo = bisect.bisect_left(self._keys, (prefix,), lo, hi)
+            hi = bisect.bisect_left(self._keys, (prefix + '\uffff',), lo, hi)
+        return lo, hi
+
+    def count(self, prefix: str) -> int:
+        """
+        Количество фильмов с названием, начинающимся с префикса.
+        :param prefix: Префикс названия
+        :return: int
+        """
+        lo, hi = self._range(prefix.lower())
+        return hi - lo
+
+    def page(self, prefix: str, limit: int, after: tuple[str, int] | None = None) -> tuple[list[dict], bool]:
+        """
+        Страница фильмов с названием, начинающимся с префикса, в порядке (title, film_id).
+        :param prefix: Префикс названия
+        :param limit: Размер страницы
+        :param after: Ключ (title, film_id) последней строки предыдущей страницы
+        :return: Кортеж (строки с ключами film_id, title, description; есть ли продолжение)
+        """
+        lo, hi = self._range(prefix.lower())
+        if after is not None:
+            lo = bisect.bisect_right(self._keys, (after[0].lower(), after[1]), lo, hi)
+        end = min(lo + limit, hi)
+        rows = [
+            {'film_id': film_id, 'title': title, 'description': description}
+            for film_id, title, description in self.docs[lo:end]
+        ]
+        return rows, end < hi
+
+    def stats(self) -> dict:
+        """
+        Статистика индекса: число фильмов и узлов, примерный объём памяти и время построения.
+        :return: dict
+        """
+        return {
+            'documents': len(self.docs),
+            'nodes': self._nodes,
+            'memory_bytes': self._nodes * (sys.getsizeof([0, 0, {}]) + sys.getsizeof({})),
+            'build_seconds': round(self.build_seconds, 4),
+        }
@@ -0,0 +1,206 @@
+# Модуль проверки схемы: необходимые индексы MySQL/MongoDB и анализ планов EXPLAIN
+
+import pymysql
+
+import db
+from metrics import metrics
+from settings import Settings, settings
+
+# Индексы MySQL, на которые рассчитаны запросы db.py
+REQUIRED_MYSQL_INDEXES = [
+    # Префиксный LIKE 'A%' и сортировка ORDER BY title, film_id
+    {'table': 'film_text', 'name': 'idx_film_text_title', 'columns': ('title',), 'type': 'BTREE'},
+    # FULLTEXT не нужен: ключевое слово ищется как подстрока названия (LIKE '%слово%',
+    # как у снимка и in-memory индекса), а MATCH ... AGAINST ищет целые слова
+    # release_year BETWEEN ... в поиске по годам
+    {'table': 'film', 'name': 'idx_film_release_year', 'columns': ('release_year',), 'type': 'BTREE'},
+    # MAX(last_update) для проверки актуальности кэшей
+    {'table': 'film', 'name': 'idx_film_last_update', 'columns': ('last_update',), 'type': 'BTREE'},
+    # Фильмы жанра по category_id без JOIN category
+    {'table': 'film_category', 'name': 'idx_fk_category_id', 'columns': ('category_id',), 'type': 'BTREE'},
+]
+
+# Запросы, которые по своей природе читают таблицу целиком; выгрузка снимка не
+# выполняется при сборе (она пишет файлы), её запросы берутся из db
+STATIC_STATEMENTS = [
+    ('_build_search_index', "SELECT film_id, title, description FROM film_text", None),
+    *(('export_film_snapshot', sql, None) for sql in db.SNAPSHOT_EXPORT_QUERIES),
+]
+
+# Маленькие справочные таблицы, полный просмотр которых допустим
+SMALL_TABLES = {'category'}
+
+
+def _existing_mysql_indexes(connection) -> dict:
+    """
+    Получить существующие индексы базы: (таблица, тип) -> список кортежей колонок.
+    :param connection: Соединение MySQL
+    :return: dict
+    """
+    cursor = connection.cursor()
+    cursor.execute(
+        """
+        SELECT table_name, index_name, index_type, column_name
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE()
+        ORDER BY table_name, index_name, seq_in_index
+        """
+    )
+    columns_by_index = {}
+    for table, index_name, index_type, column in cursor.fetchall():
+        columns_by_index.setdefault((table, index_name, index_type), []).append(column)
+    cursor.close()
+    existing = {}
+    for (table, _, index_type), columns in columns_by_index.items():
+        existing.setdefault((table, index_type), []).append(tuple(columns))
+    return existing
+
+
+def find_missing_mysql_indexes(connection) -> list[dict]:
+    """
+    Найти необходимые индексы, которых нет в базе.
+    Индекс считается найденным, если есть индекс того же типа,
+    начинающийся с тех же колонок (имя не важно).
+    :param connection: Соединение MySQL
+    :return: Список описаний отсутствующих индексов
+    """
+    existing = _existing_mysql_indexes(connection)
+    missing = []
+    for index in REQUIRED_MYSQL_INDEXES:
+        candidates = existing.get((index['table'], index['type']), [])
+        width = len(index['columns'])
+        if not any(columns[:width] == index['columns'] for columns in candidates):
+            missing.append(index)
+    return missing
+
+
+def ensure_mysql_indexes(connection) -> list[str]:
+    """
+    Создать отсутствующие индексы MySQL.
+    :param connection: Соединение MySQL
+    :return: Список имён созданных индексов
+    """
+    created = []
+    cursor = connection.cursor()
+    for index in find_missing_mysql_indexes(connection):
+        kind = 'FULLTEXT INDEX' if index['type'] == 'FULLTEXT' else 'INDEX'
+        columns = ', '.join(index['columns'])
+        cursor.execute(f"CREATE {kind} {index['name']} ON {index['table']} ({columns})")
+        created.append(f"{index['table']}.{index['name']}")
+    cursor.close()
+    return created
+
+
+def ensure_mongo_indexes() -> list[str]:
+    """
+    Создать индексы MongoDB для логов поиска и счётчиков популярности.
+    create_index идемпотентен, поэтому существующие индексы не пересоздаются.
+    :return: Список имён индексов
+    """
+    mongo_db = db.initialize_mongo()
+    log_collection = mongo_db[settings.MONGO_COLLECTION_NAME]
+    popular_collection = mongo_db[settings.get_popular_collection_name()]
+    # Индекс по timestamp создаётся как TTL-индекс согласно LOG_RETENTION_DAYS
+    retention = db.ensure_log_retention()
+    return [
+        retention[log_collection.name] or 'timestamp_-1',
+        log_collection.create_index([('query', 1)]),
+        popular_collection.create_index([('count', -1)]),
+    ]
+
+
+def capture_statements() -> list[tuple]:
+    """
+    Выполнить все запросы db.py на примерных параметрах и собрать их SQL.
+    Кэш, in-memory индексы и снимок на время сбора отключаются, чтобы каждый
+    запрос шёл в MySQL; запросы не логируются.
+    :return: Список кортежей (функция, SQL, параметры)
+    """
+    overrides = {
+        'SEARCH_CACHE_ENABLED': False,
+        'SEARCH_INDEX_ENABLED': False,
+        'PREFIX_INDEX_ENABLED': False,
+        'SEARCH_BACKEND': 'mysql',
+    }
+    saved = {name: getattr(Settings, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(Settings, name, value)
+    try:
+        with metrics.capture_sql() as captured:
+            db._load_metadata_version()
+            genres = db.get_all_genres()
+            genre = genres[0] if genres else 'Action'
+            db._get_film_text_fingerprint()
+            db.find_film_by_key('1')
+            db._query_films_by_keyword('a', 10, 0)
+            db._query_films_by_first_letter('A', 20, 0)
+            criteria = (
+                (genre, 2000, 2010, None), (genre, None, None, None), (None, 2000, 2010, None),
+                (genres[:2] or [genre], None, None, [(2000, 2005), (2008, 2010)])
+            )
+            for genre_arg, year_from, year_to, year_ranges in criteria:
+                filters = db._criteria_filters(genre_arg, year_from, year_to, year_ranges)
+                db._query_films_by_criteria(*filters, 10, 0)
+                db._query_films_by_criteria_page(*filters, 10, None)
+                db._query_films_by_criteria_page(*filters, 10, db._encode_page_token({'film_id': 1}, ('film_id',)))
+            title_token = db._encode_page_token({'title': 'A', 'film_id': 1}, ('title', 'film_id'))
+            for token in (None, title_token):
+                db._query_films_by_keyword_page('a', 10, token)
+                db._query_films_by_first_letter_page('A', 20, token)
+        return list(captured) + STATIC_STATEMENTS
+    finally:
+        for name, value in saved.items():
+            setattr(Settings, name, value)
+
+
+def _is_expected_full_scan(sql: str, params, table: str) -> bool:
+    """
+    Проверить, является ли полный просмотр таблицы ожидаемым для запроса.
+    :param sql: Текст SQL-запроса
+    :param params: Параметры запроса
+    :param table: Таблица из плана EXPLAIN
+    :return: True, если полный просмотр допустим
+    """
+    if table in SMALL_TABLES:
+        return True
+    if ' WHERE ' not in f" {' '.join(sql.split()).upper()} ":
+        return True
+    # LIKE '%слово%' не может использовать B-tree индекс
+    return any(isinstance(param, str) and param.startswith('%') for param in (params or ()))
+
+
+def explain_statements(connection, statements: list[tuple]) -> list[dict]:
+    """
+    Выполнить EXPLAIN для каждого запроса и найти полные просмотры таблиц.
+    :param connection: Соединение MySQL
+    :param statements: Список кортежей (функция, SQL, параметры)
+    :return: Список строк отчёта с ключами function, table, type, key, rows, expected, sql
+    """
+    report = []
+    cursor = connection.cursor(pymysql.cursors.DictCursor)
+    seen = set()
+    for function, sql, params in statements:
+        signature = (' '.join(sql.split()), repr(params))
+        if signature in seen:
+            continue
+        seen.add(signature)
+        try:
+            cursor.execute(f"EXPLAIN {sql}", params)
+            plan = cursor.fetchall()
+        except Exception as e:
+            report.append({'function': function, 'table': '-', 'type': 'ERROR', 'key': None,
+                           'rows': None, 'expected': False, 'sql': signature[0], 'error': str(e)})
+            continue
+        for step in plan:
+            if step.get('type') in ('ALL', 'index') and step.get('table'):
+                report.append({
+                    'function': function,
+                    'table': step['table'],
+                    'type': step['type'],
+                    'key': step.get('key'),
+                    'rows': step.get('rows'),
+                    'expected': _is_expected_full_scan(sql, params, step['table']),
+                    'sql': signature[0]
+                })
+    cursor.close()
+    return report
@@ -0,0 +1,182 @@
+# Модуль in-memory поискового индекса по названиям фильмов
+import bisect
+import heapq
+import os
+import pickle
+import sys
+import time
+
+
+def _trigrams(text: str) -> set[str]:
+    """
+    Разбить текст на множество триграмм (с учётом границ строки).
+    :param text: Текст в нижнем регистре
+    :return: Множество триграмм
+    """
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    Инвертированный триграммный индекс по film_text.title.
+    Подстрочный поиск выполняется пересечением списков триграмм
+    с последующей проверкой кандидатов, без обращения к MySQL.
+    Семантика та же, что у снимка и у MySQL (title LIKE '%kw%'): подстрока
+    названия без учёта регистра, порядок (title, film_id).
+    """
+
+    def __init__(self, docs: list[tuple], fingerprint: str, build_seconds: float = 0.0):
+        """
+        :param docs: Список кортежей (film_id, title, description)
+        :param fingerprint: Отпечаток состояния таблицы, по которому строился индекс
+        :param build_seconds: Время построения индекса в секундах
+        """
+        self.docs = docs
+        self.fingerprint = fingerprint
+        self.build_seconds = build_seconds
+        self._titles = [(title or '').lower() for _, title, _ in docs]
+        # Номера документов в порядке (title, film_id) и ключи этого порядка
+        self._order = sorted(range(len(docs)), key=lambda doc_id: (self._titles[doc_id], docs[doc_id][0]))
+        self._order_keys = [(self._titles[doc_id], docs[doc_id][0]) for doc_id in self._order]
+        self._postings: dict[str, list[int]] = {}
+        for doc_id, title in enumerate(self._titles):
+            for gram in _trigrams(title):
+                self._postings.setdefault(gram, []).append(doc_id)
+
+    @classmethod
+    def build(cls, rows: list[tuple], fingerprint: str) -> 'SearchIndex':
+        """
+        Построить индекс по строкам film_text и замерить время построения.
+        :param rows: Строки (film_id, title, description)
+        :param fingerprint: Отпечаток состояния таблицы
+        :return: SearchIndex
+        """
+        started = time.perf_counter()
+        index = cls(list(rows), fingerprint)
+        index.build_seconds = time.perf_counter() - started
+        return index
+
+    def _candidates(self, needle: str) -> set[int]:
+        """
+        Получить номера документов, которые могут содержать подстроку.
+        :param needle: Подстрока в нижнем регистре (не короче 3 символов)
+        :return: Множество номеров документов
+        """
+        grams = {needle[i:i + 3] for i in range(len(needle) - 2)}
+        postings = sorted((self._postings.get(gram, []) for gram in grams), key=len)
+        if not postings[0]:
+            return set()
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result.intersection_update(posting)
+            if not result:
+                break
+        return result
+
+    def _matches(self, needle: str, count: int, after: tuple[str, int] | None = None) -> list[int]:
+        """
+        Первые count документов в порядке (title, film_id), название которых содержит подстроку.
+        Короткая подстрока (меньше 3 символов) не даёт триграмм и обычно встречается
+        часто, поэтому для неё названия просматриваются в отсортированном порядке
+        до count совпадений вместо полного перебора.
+        :param needle: Подстрока в нижнем регистре
+        :param count: Количество документов
+        :param after: (title, film_id) последней показанной строки или None
+        :return: Список номеров документов
+        """
+        last = (after[0].lower(), after[1]) if after is not None else None
+        if len(needle) < 3:
+            start = bisect.bisect_right(self._order_keys, last) if last is not None else 0
+            matches = []
+            for doc_id in self._order[start:]:
+                if needle in self._titles[doc_id]:
+                    matches.append(doc_id)
+                    if len(matches) == count:
+                        break
+            return matches
+        hits = (
+            (self._titles[doc_id], self.docs[doc_id][0], doc_id)
+            for doc_id in self._candidates(needle)
+            if needle in self._titles[doc_id]
+        )
+        if last is not None:
+            hits = (hit for hit in hits if hit[:2] > last)
+        return [doc_id for _, _, doc_id in heapq.nsmallest(count, hits)]
+
+    def search(self, keyword: str, limit: int = 10, skip: int = 0) -> list[dict]:
+        """
+        Найти фильмы, у которых ключевое слово входит в название.
+        :param keyword: Ключевое слово для поиска
+        :param limit: Максимальное количество результатов
+        :param skip: Количество результатов для пропуска
+        :return: Список словарей с ключами 'title' и 'description'
+        """
+        needle = keyword.strip().lower()
+        if not needle:
+            return []
+        return [
+            {'title': self.docs[doc_id][1], 'description': self.docs[doc_id][2]}
+            for doc_id in self._matches(needle, skip + limit)[skip:]
+        ]
+
+    def search_page(self, keyword: str, limit: int, after: tuple[str, int] | None = None) -> list[dict]:
+        """
+        Страница фильмов, у которых ключевое слово входит в название, в порядке
+        (title, film_id) без учёта регистра — как у seek-запроса к MySQL, поэтому
+        токены страниц взаимозаменяемы между индексом и MySQL.
+        :param keyword: Ключевое слово для поиска
+        :param limit: Максимальное количество результатов
+        :param after: (title, film_id) последней показанной строки или None
+        :return: Список словарей с ключами 'film_id', 'title' и 'description'
+        """
+        needle = keyword.strip().lower()
+        if not needle:
+            return []
+        return [
+            {'film_id': self.docs[doc_id][0], 'title': self.docs[doc_id][1], 'description': self.docs[doc_id][2]}
+            for doc_id in self._matches(needle, limit, after)
+        ]
+
+    def stats(self) -> dict:
+        """
+        Статистика индекса: размер, примерный объём памяти и время построения.
+        :return: dict
+        """
+        memory = sys.getsizeof(self._postings)
+        for gram, posting in self._postings.items():
+            memory += sys.getsizeof(gram) + sys.getsizeof(posting)
+        for title in self._titles:
+            memory += sys.getsizeof(title)
+        memory += sys.getsizeof(self._order) + sys.getsizeof(self._order_keys)
+        return {
+            'documents': len(self.docs),
+            'trigrams': len(self._postings),
+            'memory_bytes': memory,
+            'build_seconds': round(self.build_seconds, 4),
+        }
+
+    def save(self, path: str) -> None:
+        """
+        Сохранить исходные строки индекса на диск (индекс пересобирается при загрузке).
+        :param path: Путь к файлу индекса
+        :return: None
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'fingerprint': self.fingerprint, 'docs': self.docs}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'SearchIndex | None':
+        """
+        Загрузить индекс с диска.
+        :param path: Путь к файлу индекса
+        :return: SearchIndex или None, если файла нет
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        return cls.build(data['docs'], data['fingerprint'])
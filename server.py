@@ -0,0 +1,398 @@
+# HTTP/JSON сервис поиска фильмов поверх функций db.py
+#
+# Запуск из корня проекта:
+#     python server.py --port 8080
+#     python main.py --serve
+#
+# Каждое соединение обслуживается отдельным потоком (ThreadingHTTPServer),
+# соединения с MySQL берутся из общего пула db.py, поэтому число одновременных
+# запросов к базе ограничено MYSQL_POOL_MAX_SIZE. Поддерживаются keep-alive
+# (HTTP/1.1) и сжатие gzip для ответов больше HTTP_GZIP_MIN_BYTES.
+#
+# GET  /films/keyword?q=love&limit=10&page_token=...
+# GET  /films/criteria?genre=Comedy&year_from=2000&year_to=2010&limit=10&page_token=...
+# GET  /films/criteria?genre=Comedy,Drama&years=2000-2005,2010-2012   (любой из жанров и диапазонов)
+# GET  /films/prefix?prefix=ac&limit=20&page_token=...
+# GET  /films/fuzzy?q=acadmy&limit=10
+# GET  /genres
+# GET  /years
+# GET  /queries/popular?limit=5
+# GET  /queries/recent?limit=5
+# GET  /queries/trending?window=hour&limit=5
+# GET  /health
+# GET  /metrics                      (текстовый формат Prometheus)
+# POST /search/batch                 (JSON-список запросов, как у search_many)
+#
+# Ошибки: 400 — некорректные параметры, запрос пакета или page_token;
+# 503 — MySQL, MongoDB или снимок недоступны (вместо пустого результата).
+import argparse
+import gzip
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import db
+from logger import logger
+from metrics import metrics
+from settings import settings
+
+# Максимальный размер тела POST-запроса и количество запросов в пакете
+MAX_BODY_BYTES = 1024 * 1024
+MAX_BATCH_SIZE = 100
+
+
+class BadRequest(ValueError):
+    """
+    Некорректные параметры запроса (ответ 400).
+    """
+
+
+class ServiceUnavailable(RuntimeError):
+    """
+    MySQL, MongoDB или снимок недоступны (ответ 503).
+    """
+
+
+def _param(params: dict, name: str, default=None, cast=str, required: bool = False):
+    """
+    Получить параметр строки запроса.
+    :param params: Результат parse_qs
+    :param name: Имя параметра
+    :param default: Значение по умолчанию
+    :param cast: Функция преобразования (str, int)
+    :param required: Параметр обязателен
+    :return: Значение параметра
+    """
+    values = params.get(name)
+    if not values or values[0] == '':
+        if required:
+            raise BadRequest(f"не указан параметр '{name}'")
+        return default
+    try:
+        return cast(values[0])
+    except ValueError:
+        raise BadRequest(f"некорректное значение параметра '{name}'")
+
+
+def _check_int(value, name: str, low: int, high: int = None) -> int:
+    """
+    Проверить, что значение — целое число в допустимых границах.
+    :param value: Значение (bool не считается числом)
+    :param name: Имя параметра для сообщения об ошибке
+    :param low: Минимальное значение
+    :param high: Максимальное значение (None — без ограничения)
+    :return: int
+    """
+    if isinstance(value, bool) or not isinstance(value, int) or value < low or (high is not None and value > high):
+        bounds = f"от {low} до {high}" if high is not None else f"не меньше {low}"
+        raise BadRequest(f"{name} должен быть целым числом {bounds}")
+    return value
+
+
+def _limit(params: dict, default: int) -> int:
+    """
+    Размер страницы из параметра limit (от 1 до 100).
+    :param params: Результат parse_qs
+    :param default: Значение по умолчанию
+    :return: int
+    """
+    return _check_int(_param(params, 'limit', default, int), 'limit', 1, 100)
+
+
+def _page(rows: list[dict], next_token: str | None) -> dict:
+    """
+    Тело ответа для постраничного поиска.
+    :param rows: Строки страницы
+    :param next_token: Токен следующей страницы
+    :return: dict
+    """
+    return {'results': rows, 'count': len(rows), 'next_page_token': next_token}
+
+
+def _keyword(params: dict) -> dict:
+    return _page(*db.find_films_by_keyword_page(
+        _param(params, 'q', required=True), _limit(params, 10), _param(params, 'page_token'), raise_errors=True
+    ))
+
+
+def _year_ranges(params: dict) -> list[tuple[int, int]]:
+    """
+    Диапазоны годов из параметра years ("2000-2005,2010-2012").
+    :param params: Результат parse_qs
+    :return: Список кортежей (year_from, year_to)
+    """
+    ranges = []
+    for value in params.get('years', []):
+        for part in filter(None, value.split(',')):
+            try:
+                low, high = (int(year) for year in part.split('-'))
+            except ValueError:
+                raise BadRequest(f"некорректный диапазон годов '{part}'")
+            ranges.append((low, high))
+    return ranges
+
+
+def _criteria(params: dict) -> dict:
+    genres = [genre for value in params.get('genre', []) for genre in value.split(',') if genre.strip()]
+    year_from = _param(params, 'year_from', cast=int)
+    year_to = _param(params, 'year_to', cast=int)
+    year_ranges = _year_ranges(params)
+    if not (genres or (year_from and year_to) or year_ranges):
+        raise BadRequest("укажите genre и/или годы (year_from и year_to или years)")
+    return _page(*db.find_films_by_criteria_page(
+        genres, year_from, year_to, _limit(params, 10), _param(params, 'page_token'), year_ranges, raise_errors=True
+    ))
+
+
+def _prefix(params: dict) -> dict:
+    return _page(*db.find_films_by_prefix(
+        _param(params, 'prefix', required=True), _limit(params, 20), _param(params, 'page_token'), raise_errors=True
+    ))
+
+
+def _fuzzy(params: dict) -> dict:
+    rows = db.find_films_fuzzy(_param(params, 'q', required=True), _limit(params, 10), raise_errors=True)
+    return {'results': rows, 'count': len(rows)}
+
+
+def _trending(params: dict) -> dict:
+    window = _param(params, 'window', 'hour')
+    if window not in ('hour', 'day'):
+        raise BadRequest("window должен быть 'hour' или 'day'")
+    return db.get_trending_queries(window, _limit(params, 5))
+
+
+def _batch_spec(spec: dict) -> dict:
+    """
+    Проверить запрос пакета теми же правилами, что и параметры GET-маршрутов.
+    :param spec: Описание запроса для search_many
+    :return: Тот же spec
+    """
+    search_type = spec.get('type')
+    if search_type == 'keyword':
+        required = 'keyword'
+    elif search_type == 'first_letter':
+        required = 'letter'
+    elif search_type == 'criteria':
+        required = None
+    else:
+        raise BadRequest(f"неизвестный тип поиска {search_type!r}")
+    if required is not None and not (isinstance(spec.get(required), str) and spec[required].strip()):
+        raise BadRequest(f"не указан параметр '{required}' для поиска {search_type}")
+    if search_type == 'criteria':
+        genres = spec.get('genres') or spec.get('genre') or []
+        if isinstance(genres, str):
+            genres = [genres]
+        if not (isinstance(genres, list) and all(isinstance(genre, str) for genre in genres)):
+            raise BadRequest("genre/genres должен быть строкой или списком строк")
+        for name in ('year_from', 'year_to'):
+            if spec.get(name) is not None:
+                _check_int(spec[name], name, 0)
+        ranges = spec.get('year_ranges') or []
+        if not (isinstance(ranges, list) and all(isinstance(pair, list) and len(pair) == 2 for pair in ranges)):
+            raise BadRequest("year_ranges должен быть списком пар [year_from, year_to]")
+        for pair in ranges:
+            for year in pair:
+                _check_int(year, 'year_ranges', 0)
+        if not (genres or (spec.get('year_from') and spec.get('year_to')) or ranges):
+            raise BadRequest("укажите genre и/или годы (year_from и year_to или year_ranges)")
+    if 'limit' in spec:
+        _check_int(spec['limit'], 'limit', 1, 100)
+    if 'skip' in spec:
+        _check_int(spec['skip'], 'skip', 0)
+    return spec
+
+
+def _health(params: dict) -> dict:
+    backends = db.get_backend_status()
+    degraded = any(backend['state'] != 'closed' for backend in backends.values())
+    return {
+        'status': 'degraded' if degraded else 'ok',
+        'backends': backends,
+        'mysql_pool': db.get_mysql_pool_stats(),
+        'search_log': db.get_search_log_stats()
+    }
+
+
+# Маршруты GET: путь -> функция (параметры запроса) -> тело ответа
+GET_ROUTES = {
+    '/films/keyword': _keyword,
+    '/films/criteria': _criteria,
+    '/films/prefix': _prefix,
+    '/films/fuzzy': _fuzzy,
+    '/genres': lambda params: {'genres': db.get_all_genres(raise_errors=True)},
+    '/years': lambda params: db.get_year_range(raise_errors=True),
+    '/queries/popular': lambda params: {'results': db.get_popular_queries(_limit(params, 5), raise_errors=True)},
+    '/queries/recent': lambda params: {'results': db.get_recent_queries(_limit(params, 5), raise_errors=True)},
+    '/queries/trending': _trending,
+    '/health': _health,
+}
+
+
+class SearchRequestHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик HTTP-запросов: JSON-ответы, keep-alive и gzip.
+    """
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FilmSearch/1.0'
+    # Заголовки и тело уходят отдельными записями: без TCP_NODELAY на keep-alive
+    # соединении ответ ждёт отложенного ACK клиента (~40 мс)
+    disable_nagle_algorithm = True
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        """
+        Отправить ответ, сжав его gzip, если клиент это поддерживает.
+        :param status: HTTP-статус
+        :param body: Тело ответа
+        :param content_type: Значение Content-Type
+        :return: None
+        """
+        gzipped = (len(body) >= settings.HTTP_GZIP_MIN_BYTES
+                   and 'gzip' in self.headers.get('Accept-Encoding', ''))
+        if gzipped:
+            body = gzip.compress(body, compresslevel=5)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload) -> None:
+        """
+        Отправить JSON-ответ.
+        :param status: HTTP-статус
+        :param payload: Тело ответа (сериализуется в JSON)
+        :return: None
+        """
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        self._send(status, body, 'application/json; charset=utf-8')
+
+    def _handle(self, handler) -> None:
+        """
+        Выполнить обработчик маршрута и отправить результат или ошибку.
+        :param handler: Функция без аргументов, возвращающая тело ответа
+        :return: None
+        """
+        try:
+            self._send_json(200, handler())
+        except (BadRequest, db.InvalidPageToken) as e:
+            self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            logger.error(f"Ошибка обработки HTTP-запроса {self.path}: {e}")
+            if isinstance(e, ServiceUnavailable) or db.is_backend_error(e):
+                self._send_json(503, {'error': 'сервис поиска временно недоступен'})
+            else:
+                self._send_json(500, {'error': 'внутренняя ошибка сервера'})
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path == '/metrics':
+            self._send(200, metrics.to_prometheus().encode('utf-8'), 'text/plain; version=0.0.4')
+            return
+        route = GET_ROUTES.get(url.path)
+        if route is None:
+            self._send_json(404, {'error': f"неизвестный путь {url.path}"})
+            return
+        params = parse_qs(url.query)
+        self._handle(lambda: route(params))
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != '/search/batch':
+            self._send_json(404, {'error': f"неизвестный путь {url.path}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            # Тело нельзя дочитать до конца — соединение дальше не используется
+            self._send_json(400, {'error': 'некорректный заголовок Content-Length'})
+            self.close_connection = True
+            return
+        if length > MAX_BODY_BYTES:
+            self._send_json(413, {'error': 'слишком большой запрос'})
+            self.close_connection = True
+            return
+        raw = self.rfile.read(length)
+
+        def batch():
+            try:
+                specs = json.loads(raw or b'[]')
+            except ValueError:
+                raise BadRequest("тело запроса должно быть JSON-списком")
+            if not isinstance(specs, list) or not all(isinstance(spec, dict) for spec in specs):
+                raise BadRequest("тело запроса должно быть JSON-списком объектов")
+            if len(specs) > MAX_BATCH_SIZE:
+                raise BadRequest(f"не больше {MAX_BATCH_SIZE} запросов в пакете")
+            outcomes = db.search_many([_batch_spec(spec) for spec in specs])
+            # Запросы уже проверены, поэтому ошибка выполнения — это сбой сервера баз
+            errors = [outcome['error'] for outcome in outcomes if outcome['error']]
+            if errors:
+                raise ServiceUnavailable(f"ошибки пакетного поиска: {errors[0]}")
+            for outcome in outcomes:
+                outcome['ms'] = round(outcome.pop('seconds') * 1000, 3)
+            return {'results': outcomes}
+
+        self._handle(batch)
+
+    def log_message(self, format: str, *args) -> None:
+        # Журнал доступа выводится только в режиме отладки
+        if settings.DEBUG:
+            super().log_message(format, *args)
+
+
+class SearchServer(ThreadingHTTPServer):
+    """
+    Многопоточный HTTP-сервер: поток на соединение, потоки-демоны.
+    """
+    daemon_threads = True
+    # Очередь входящих соединений больше стандартной (5) для пиков нагрузки
+    request_queue_size = 128
+
+
+def create_server(host: str = None, port: int = None) -> SearchServer:
+    """
+    Создать сервер (порт 0 — выбрать свободный).
+    :param host: Адрес (по умолчанию HTTP_HOST)
+    :param port: Порт (по умолчанию HTTP_PORT)
+    :return: SearchServer
+    """
+    host = settings.HTTP_HOST if host is None else host
+    port = settings.HTTP_PORT if port is None else port
+    return SearchServer((host, port), SearchRequestHandler)
+
+
+def serve(host: str = None, port: int = None) -> None:
+    """
+    Запустить сервер и обслуживать запросы до Ctrl+C.
+    :param host: Адрес (по умолчанию HTTP_HOST)
+    :param port: Порт (по умолчанию HTTP_PORT)
+    :return: None
+    """
+    server = create_server(host, port)
+    db.warm_metadata_cache()
+    db.warm_search_index()
+    address, bound_port = server.server_address[:2]
+    print(f"Сервер поиска фильмов: http://{address}:{bound_port}/ (Ctrl+C — остановка)")
+    started = time.monotonic()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        db.close_all_connections()
+        print(f"Сервер остановлен, время работы {time.monotonic() - started:.0f} с")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP/JSON сервис поиска фильмов")
+    parser.add_argument('--host')
+    parser.add_argument('--port', type=int)
+    args = parser.parse_args()
+    serve(args.host, args.port)
@@ -1,29 +1,169 @@
 import os
-from dotenv import load_dotenv
+import threading
 
-# Загрузка переменных окружения из .env файла
-load_dotenv()
+_env_loaded = False
+_env_lock = threading.Lock()
+
+
+def _load_env() -> None:
+    """
+    Загрузить переменные окружения из .env файла (один раз, при первом чтении настройки).
+    :return: None
+    """
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _env_loaded = True
+
+
+def _flag(value: str) -> bool:
+    """
+    Преобразовать строку 'True'/'False' из окружения в bool.
+    :param value: Значение переменной окружения
+    :return: bool
+    """
+    return value.lower() == 'true'
+
+
+class _Env:
+    """
+    Настройка из переменной окружения с тем же именем.
+    Значение читается при первом обращении и сохраняется как обычный атрибут
+    класса, поэтому присваивание Settings.X = ... по-прежнему переопределяет его.
+    """
+
+    def __init__(self, default: str = None, cast=None):
+        """
+        :param default: Значение по умолчанию (строка, как в окружении)
+        :param cast: Функция преобразования строки (int, float, _flag, ...)
+        """
+        self.default = default
+        self.cast = cast
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance, owner):
+        _load_env()
+        value = os.getenv(self.name, self.default)
+        if value is not None and self.cast is not None:
+            value = self.cast(value)
+        setattr(owner, self.name, value)
+        return value
 
 
 class Settings:
     """
     Класс настроек приложения, загружает параметры из переменных окружения.
+    Окружение (и .env) читается при первом обращении к настройке, а не при импорте.
     """
     # Настройки MongoDB (для логов и статистики)
-    MONGO_URI = os.getenv('MONGO_URI')
-    MONGO_DB_NAME = os.getenv('MONGO_DB_NAME')
-    MONGO_COLLECTION_NAME = os.getenv('MONGO_COLLECTION_NAME')
+    MONGO_URI = _Env()
+    MONGO_DB_NAME = _Env()
+    MONGO_COLLECTION_NAME = _Env()
+    MONGO_POPULAR_COLLECTION_NAME = _Env()
+    MONGO_MAX_POOL_SIZE = _Env('10', int)
+    MONGO_MIN_POOL_SIZE = _Env('0', int)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = _Env('5000', int)
+    MONGO_CONNECT_TIMEOUT_MS = _Env('2000', int)
+    MONGO_SOCKET_TIMEOUT_MS = _Env('5000', int)
+    # Write concern для логов поиска: 1 — с подтверждением, 0 — без ожидания ответа
+    MONGO_LOG_WRITE_CONCERN = _Env('1', int)
 
     # Настройки MySQL (для фильмов)
-    MYSQL_HOST = os.getenv('MYSQL_HOST', 'localhost')
-    MYSQL_PORT = int(os.getenv('MYSQL_PORT', '3306'))
-    MYSQL_DB_NAME = os.getenv('MYSQL_DB_NAME', 'films_database')
-    MYSQL_USERNAME = os.getenv('MYSQL_USERNAME', 'root')
-    MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD', '')
+    MYSQL_HOST = _Env('localhost')
+    MYSQL_PORT = _Env('3306', int)
+    MYSQL_DB_NAME = _Env('films_database')
+    MYSQL_USERNAME = _Env('root')
+    MYSQL_PASSWORD = _Env('')
+
+    # Настройки пула соединений MySQL
+    MYSQL_POOL_MIN_SIZE = _Env('1', int)
+    MYSQL_POOL_MAX_SIZE = _Env('5', int)
+    MYSQL_POOL_IDLE_TIMEOUT = _Env('300', float)
+    MYSQL_POOL_HEALTH_CHECK_AFTER = _Env('30', float)
+    MYSQL_POOL_ACQUIRE_TIMEOUT = _Env('10', float)
+
+    # Таймауты MySQL (секунды): установка соединения, чтение и запись ответа
+    MYSQL_CONNECT_TIMEOUT = _Env('5', float)
+    MYSQL_READ_TIMEOUT = _Env('30', float)
+    MYSQL_WRITE_TIMEOUT = _Env('30', float)
+
+    # Автоматические выключатели: после BREAKER_FAILURE_THRESHOLD сбоев соединения подряд
+    # запросы к серверу отклоняются сразу, пробный запрос — через BREAKER_RESET_TIMEOUT секунд
+    BREAKER_FAILURE_THRESHOLD = _Env('3', int)
+    BREAKER_RESET_TIMEOUT = _Env('30', float)
+
+    # Настройки фоновой записи логов поиска в MongoDB
+    LOG_BUFFER_ENABLED = _Env('True', _flag)
+    LOG_QUEUE_MAX_SIZE = _Env('1000', int)
+    LOG_BATCH_SIZE = _Env('50', int)
+    LOG_FLUSH_INTERVAL = _Env('1.0', float)
+    LOG_PUT_TIMEOUT = _Env('0.05', float)
+    # Логи, которые не удалось записать в MongoDB, сохраняются локально и досылаются
+    # после восстановления ('' — не сохранять); LOG_SPILL_MAX_MB — предельный размер файла
+    LOG_SPILL_PATH = _Env('logs/search_log.spill.jsonl')
+    LOG_SPILL_MAX_MB = _Env('100', float)
+
+    # Как часто проверять актуальность кэша жанров и диапазона годов (секунды)
+    METADATA_REFRESH_INTERVAL = _Env('60', float)
+
+    # Количество потоков для пакетного поиска (search_many)
+    BATCH_MAX_WORKERS = _Env('4', int)
+
+    # Настройки кэша результатов поиска
+    SEARCH_CACHE_ENABLED = _Env('True', _flag)
+    SEARCH_CACHE_MAX_SIZE = _Env('256', int)
+    SEARCH_CACHE_TTL = _Env('300', float)
+
+    # Настройки in-memory поискового индекса (для поиска по ключевому слову)
+    SEARCH_INDEX_ENABLED = _Env('False', _flag)
+    SEARCH_INDEX_PATH = _Env('cache/search_index.pkl')
+    SEARCH_INDEX_CHECK_INTERVAL = _Env('60', float)
+
+    # Хранение логов поиска: сырые записи удаляются TTL-индексом, почасовые агрегаты
+    # хранятся дольше, посуточные — бессрочно (0 — не удалять)
+    LOG_RETENTION_DAYS = _Env('30', int)
+    LOG_HOURLY_RETENTION_DAYS = _Env('180', int)
+
+    # Тренды запросов за час/сутки: ёмкость сводки Space-Saving и период сохранения в MongoDB
+    TRENDING_CAPACITY = _Env('200', int)
+    TRENDING_SNAPSHOT_INTERVAL = _Env('60', float)
+
+    # Нечёткий поиск по названиям (предлагается, если точный поиск ничего не нашёл)
+    FUZZY_SEARCH_ENABLED = _Env('True', _flag)
+    FUZZY_MAX_DISTANCE = _Env('2', int)
+
+    # Префиксный индекс по названиям (поиск по началу названия и автодополнение без MySQL)
+    PREFIX_INDEX_ENABLED = _Env('True', _flag)
+
+    # Источник данных для поиска фильмов: 'mysql' или 'snapshot' (колоночный снимок на диске)
+    SEARCH_BACKEND = _Env('mysql', str.lower)
+    SNAPSHOT_DIR = _Env('cache/snapshot')
+    # Как часто проверять снимок (новая выгрузка, отставание от MySQL, повторное открытие после ошибки)
+    SNAPSHOT_CHECK_INTERVAL = _Env('60', float)
+
+    # Табличный вывод результатов: максимальная ширина ячейки и число строк на ячейку
+    # (1 — обрезать длинный текст, больше — переносить)
+    TABLE_MAX_CELL_WIDTH = _Env('60', int)
+    TABLE_WRAP_LINES = _Env('1', int)
+
+    # HTTP/JSON сервис (server.py): адрес, порт и минимальный размер ответа для сжатия gzip
+    HTTP_HOST = _Env('127.0.0.1')
+    HTTP_PORT = _Env('8080', int)
+    HTTP_GZIP_MIN_BYTES = _Env('1024', int)
+
+    # Метрики и журнал медленных запросов
+    SLOW_QUERY_THRESHOLD_MS = _Env('200', float)
+    METRICS_PROMETHEUS_FILE = _Env('')
 
     # Прочие настройки приложения
-    DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
-    SECRET_KEY = os.getenv('SECRET_KEY', 'default-secret-key')
+    DEBUG = _Env('False', _flag)
+    SECRET_KEY = _Env('default-secret-key')
 
     @classmethod
     def get_mongo_connection_string(cls) -> str:
@@ -33,6 +173,38 @@ class Settings:
         """
         return cls.MONGO_URI
 
+    @classmethod
+    def get_mongo_client_options(cls) -> dict:
+        """
+        Получить параметры клиента MongoDB (пул соединений и таймауты).
+        :return: dict
+        """
+        return {
+            'maxPoolSize': cls.MONGO_MAX_POOL_SIZE,
+            'minPoolSize': cls.MONGO_MIN_POOL_SIZE,
+            'serverSelectionTimeoutMS': cls.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            'connectTimeoutMS': cls.MONGO_CONNECT_TIMEOUT_MS,
+            'socketTimeoutMS': cls.MONGO_SOCKET_TIMEOUT_MS
+        }
+
+    @classmethod
+    def get_popular_collection_name(cls) -> str:
+        """
+        Имя коллекции со счётчиками популярных запросов.
+        По умолчанию — имя коллекции логов с суффиксом '_popular'.
+        :return: str
+        """
+        return cls.MONGO_POPULAR_COLLECTION_NAME or f"{cls.MONGO_COLLECTION_NAME}_popular"
+
+    @classmethod
+    def get_log_aggregate_collection_name(cls, granularity: str) -> str:
+        """
+        Имя коллекции агрегатов логов поиска.
+        :param granularity: 'hourly' или 'daily'
+        :return: str
+        """
+        return f"{cls.MONGO_COLLECTION_NAME}_{granularity}"
+
     @classmethod
     def get_mysql_config(cls) -> dict:
         """
@@ -46,7 +218,24 @@ class Settings:
             'password': cls.MYSQL_PASSWORD,
             'database': cls.MYSQL_DB_NAME,
             'charset': 'utf8mb4',
-            'autocommit': True
+            'autocommit': True,
+            'connect_timeout': cls.MYSQL_CONNECT_TIMEOUT,
+            'read_timeout': cls.MYSQL_READ_TIMEOUT,
+            'write_timeout': cls.MYSQL_WRITE_TIMEOUT
+        }
+
+    @classmethod
+    def get_mysql_pool_config(cls) -> dict:
+        """
+        Получить параметры пула соединений MySQL.
+        :return: dict
+        """
+        return {
+            'min_size': cls.MYSQL_POOL_MIN_SIZE,
+            'max_size': cls.MYSQL_POOL_MAX_SIZE,
+            'idle_timeout': cls.MYSQL_POOL_IDLE_TIMEOUT,
+            'health_check_after': cls.MYSQL_POOL_HEALTH_CHECK_AFTER,
+            'acquire_timeout': cls.MYSQL_POOL_ACQUIRE_TIMEOUT
         }
 
 # Экземпляр настроек
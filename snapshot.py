@@ -0,0 +1,281 @@
+# Модуль колоночного снимка фильмов на диске (NumPy, memory-mapped) и запросов к нему
+#
+# Формат каталога снимка:
+#   meta.json                 — версия формата, число фильмов, жанры {category_id: name} и их
+#                               список, диапазон годов выпуска, отпечаток состояния MySQL
+#   film_id.npy               — int32, строки отсортированы по (title_key, film_id)
+#   release_year.npy          — int16
+#   title.npy                 — S<N>, названия в UTF-8
+#   title_key.npy             — S<N>, названия в нижнем регистре (для поиска и сортировки)
+#   description.bin           — описания подряд в UTF-8
+#   description_offsets.npy   — int64, границы описаний (n + 1 значений)
+#   by_film_id.npy            — int32, номера строк в порядке film_id
+#   fc_category_id.npy        — int16, связи film_category, отсортированы по (category_id, film_id)
+#   fc_row.npy                — int32, номер строки фильма для каждой связи
+#   fc_film_id.npy            — int32, film_id для каждой связи
+#
+# Все массивы открываются через mmap: запуск почти мгновенный, а страницы
+# файлов разделяются между процессами через страничный кэш ОС.
+import json
+import os
+import time
+
+import numpy as np
+
+FORMAT_VERSION = 2
+
+
+def _encode(values: list[str]) -> np.ndarray:
+    """
+    Упаковать строки в массив байтовых строк фиксированной ширины.
+    :param values: Список строк
+    :return: np.ndarray dtype S<N>
+    """
+    encoded = [value.encode('utf-8') for value in values]
+    width = max((len(value) for value in encoded), default=1) or 1
+    return np.array(encoded, dtype=f'S{width}')
+
+
+def export_snapshot(rows: list[tuple], film_categories: list[tuple], categories: list[tuple], directory: str,
+                    fingerprint: str = '') -> dict:
+    """
+    Записать колоночный снимок фильмов в каталог (атомарно через временный каталог).
+    :param rows: Строки (film_id, title, description, release_year)
+    :param film_categories: Строки (film_id, category_id)
+    :param categories: Строки (category_id, name)
+    :param directory: Каталог снимка
+    :param fingerprint: Отпечаток состояния таблиц на момент выгрузки
+    :return: Содержимое meta.json
+    """
+    started = time.perf_counter()
+    rows = sorted(rows, key=lambda row: ((row[1] or '').lower(), row[0]))
+    years = [int(row[3]) for row in rows if row[3]]
+    tmp_dir = f"{directory}.tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    film_ids = np.array([row[0] for row in rows], dtype=np.int32)
+    np.save(os.path.join(tmp_dir, 'film_id.npy'), film_ids)
+    np.save(os.path.join(tmp_dir, 'by_film_id.npy'), np.argsort(film_ids, kind='stable').astype(np.int32))
+    np.save(os.path.join(tmp_dir, 'release_year.npy'),
+            np.array([row[3] or 0 for row in rows], dtype=np.int16))
+    np.save(os.path.join(tmp_dir, 'title.npy'), _encode([row[1] or '' for row in rows]))
+    np.save(os.path.join(tmp_dir, 'title_key.npy'), _encode([(row[1] or '').lower() for row in rows]))
+
+    offsets = [0]
+    with open(os.path.join(tmp_dir, 'description.bin'), 'wb') as f:
+        for row in rows:
+            data = (row[2] or '').encode('utf-8')
+            f.write(data)
+            offsets.append(offsets[-1] + len(data))
+    np.save(os.path.join(tmp_dir, 'description_offsets.npy'), np.array(offsets, dtype=np.int64))
+
+    row_by_film = {film_id: i for i, film_id in enumerate(film_ids.tolist())}
+    links = sorted((category_id, film_id) for film_id, category_id in film_categories if film_id in row_by_film)
+    np.save(os.path.join(tmp_dir, 'fc_category_id.npy'), np.array([link[0] for link in links], dtype=np.int16))
+    np.save(os.path.join(tmp_dir, 'fc_film_id.npy'), np.array([link[1] for link in links], dtype=np.int32))
+    np.save(os.path.join(tmp_dir, 'fc_row.npy'), np.array([row_by_film[link[1]] for link in links], dtype=np.int32))
+
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'films': len(rows),
+        'categories': {str(category_id): name for category_id, name in categories},
+        # Справочные данные для поиска по критериям без обращения к MySQL
+        'genres': sorted(name for _, name in categories),
+        'min_year': min(years, default=None),
+        'max_year': max(years, default=None),
+        'fingerprint': fingerprint,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'export_seconds': round(time.perf_counter() - started, 3),
+    }
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    # Подмена каталога целиком, чтобы читатели не увидели наполовину записанный снимок
+    if os.path.exists(directory):
+        old_dir = f"{directory}.old"
+        os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        for name in os.listdir(old_dir):
+            os.remove(os.path.join(old_dir, name))
+        os.rmdir(old_dir)
+    else:
+        os.replace(tmp_dir, directory)
+    return meta
+
+
+class SnapshotEngine:
+    """
+    Поиск по колоночному снимку векторными операциями NumPy.
+    Возвращает строки той же формы, что и запросы MySQL в db.py.
+    """
+
+    def __init__(self, directory: str):
+        """
+        :param directory: Каталог снимка
+        """
+        self.meta_path = os.path.join(directory, 'meta.json')
+        self.meta_mtime = os.path.getmtime(self.meta_path)
+        with open(self.meta_path, encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия снимка: {self.meta.get('format_version')}")
+
+        def load(name: str) -> np.ndarray:
+            return np.load(os.path.join(directory, name), mmap_mode='r')
+
+        self.film_id = load('film_id.npy')
+        self.by_film_id = load('by_film_id.npy')
+        self.release_year = load('release_year.npy')
+        self.title = load('title.npy')
+        self.title_key = load('title_key.npy')
+        self.description_offsets = load('description_offsets.npy')
+        description_path = os.path.join(directory, 'description.bin')
+        self.descriptions = (np.memmap(description_path, dtype=np.uint8, mode='r')
+                             if os.path.getsize(description_path) else np.zeros(0, dtype=np.uint8))
+        self.fc_category_id = load('fc_category_id.npy')
+        self.fc_film_id = load('fc_film_id.npy')
+        self.fc_row = load('fc_row.npy')
+        self.category_ids = {name: int(category_id) for category_id, name in self.meta['categories'].items()}
+        self.category_names = {category_id: name for name, category_id in self.category_ids.items()}
+        # Связи film_category в порядке строк фильмов (строятся при первом запросе жанров)
+        self._fc_rows_sorted = None
+        self._fc_categories_by_row = None
+
+    def _description(self, row: int) -> str:
+        """
+        Прочитать описание фильма из файла описаний.
+        :param row: Номер строки
+        :return: str
+        """
+        start, end = self.description_offsets[row], self.description_offsets[row + 1]
+        return self.descriptions[start:end].tobytes().decode('utf-8')
+
+    def changed_on_disk(self) -> bool:
+        """
+        Заменён ли снимок на диске новой выгрузкой после открытия.
+        :return: bool
+        """
+        try:
+            return os.path.getmtime(self.meta_path) != self.meta_mtime
+        except OSError:
+            return True
+
+    def title_rows(self, prefix: str = None, substring: str = None) -> np.ndarray:
+        """
+        Номера строк с названием, начинающимся с префикса или содержащим подстроку,
+        в порядке (title, film_id). Префикс ищется бинарным поиском по отсортированным названиям.
+        :param prefix: Префикс названия
+        :param substring: Подстрока названия
+        :return: np.ndarray номеров строк
+        """
+        if prefix is not None:
+            key = prefix.lower().encode('utf-8')
+            lo = int(np.searchsorted(self.title_key, key, side='left'))
+            hi = int(np.searchsorted(self.title_key, key + b'\xff', side='left'))
+            return np.arange(lo, hi)
+        key = (substring or '').lower().encode('utf-8')
+        return np.nonzero(np.char.find(self.title_key, key) >= 0)[0]
+
+    def criteria_rows(self, genres: tuple[str, ...], year_ranges: tuple[tuple[int, int], ...]) -> np.ndarray | None:
+        """
+        Номера строк фильмов любого из жанров и любого из диапазонов годов в порядке film_id.
+        :param genres: Канонические названия жанров (пусто — без фильтра по жанру)
+        :param year_ranges: Диапазоны годов (year_from, year_to) (пусто — без фильтра по годам)
+        :return: np.ndarray номеров строк или None, если ни один жанр не известен
+        """
+        if genres:
+            parts = []
+            for genre in genres:
+                category_id = self.category_ids.get(genre)
+                if category_id is None:
+                    continue
+                lo = int(np.searchsorted(self.fc_category_id, category_id, side='left'))
+                hi = int(np.searchsorted(self.fc_category_id, category_id, side='right'))
+                parts.append(np.asarray(self.fc_row[lo:hi]))
+            if not parts:
+                return None
+            rows = parts[0]
+            if len(parts) > 1:
+                # Фильм из нескольких жанров попадает в результат один раз, порядок — по film_id
+                rows = np.unique(np.concatenate(parts))
+                rows = rows[np.argsort(self.film_id[rows], kind='stable')]
+        else:
+            rows = np.asarray(self.by_film_id)
+        if year_ranges:
+            years = self.release_year[rows]
+            mask = np.zeros(len(rows), dtype=bool)
+            for year_from, year_to in year_ranges:
+                mask |= (years >= year_from) & (years <= year_to)
+            rows = rows[mask]
+        return rows
+
+    def _genres(self, row: int) -> str | None:
+        """
+        Жанры фильма через запятую в алфавитном порядке (как GROUP_CONCAT в MySQL).
+        :param row: Номер строки
+        :return: str или None, если у фильма нет жанров
+        """
+        if self._fc_rows_sorted is None:
+            order = np.argsort(self.fc_row, kind='stable')
+            # Жанры присваиваются первыми: другой поток проверяет только _fc_rows_sorted
+            self._fc_categories_by_row = np.asarray(self.fc_category_id)[order]
+            self._fc_rows_sorted = np.asarray(self.fc_row)[order]
+        lo = int(np.searchsorted(self._fc_rows_sorted, row, side='left'))
+        hi = int(np.searchsorted(self._fc_rows_sorted, row, side='right'))
+        if lo == hi:
+            return None
+        return ', '.join(sorted(self.category_names[int(c)] for c in self._fc_categories_by_row[lo:hi]))
+
+    def seek_title(self, rows: np.ndarray, last_title: str, last_id: int) -> np.ndarray:
+        """
+        Отбросить строки до (last_title, last_id) включительно (строки в порядке названий).
+        :param rows: Номера строк в порядке (title, film_id)
+        :param last_title: Название последней показанной строки
+        :param last_id: film_id последней показанной строки
+        :return: np.ndarray оставшихся строк
+        """
+        key = last_title.lower().encode('utf-8')
+        keys = self.title_key[rows]
+        after = (keys > key) | ((keys == key) & (self.film_id[rows] > last_id))
+        return rows[after]
+
+    def seek_film_id(self, rows: np.ndarray, last_id: int) -> np.ndarray:
+        """
+        Отбросить строки с film_id не больше last_id (строки в порядке film_id).
+        :param rows: Номера строк
+        :param last_id: film_id последней показанной строки
+        :return: np.ndarray оставшихся строк
+        """
+        return rows[self.film_id[rows] > last_id]
+
+    def text_rows(self, rows: np.ndarray, with_id: bool = False) -> list[dict]:
+        """
+        Сформировать строки вида {'title', 'description'}.
+        :param rows: Номера строк
+        :param with_id: Добавить film_id (для постраничного поиска)
+        :return: Список словарей
+        """
+        result = []
+        for row in rows.tolist():
+            item = {'title': self.title[row].decode('utf-8'), 'description': self._description(row)}
+            if with_id:
+                item = {'film_id': int(self.film_id[row]), **item}
+            result.append(item)
+        return result
+
+    def criteria_result(self, rows: np.ndarray) -> list[dict]:
+        """
+        Сформировать строки вида {'film_id', 'title', 'release_year', 'genre'},
+        где genre — все жанры фильма через запятую.
+        :param rows: Номера строк
+        :return: Список словарей
+        """
+        return [
+            {
+                'film_id': int(self.film_id[row]),
+                'title': self.title[row].decode('utf-8'),
+                'release_year': int(self.release_year[row]),
+                'genre': self._genres(row)
+            }
+            for row in rows.tolist()
+        ]
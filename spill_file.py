@@ -0,0 +1,151 @@
+# Модуль локального журнала (spill-файла) для логов поиска, которые не удалось записать в MongoDB
+#
+# Записи дописываются в конец файла JSONL (datetime сохраняется как {"$date": ISO}).
+# При повторной отправке файл атомарно переименовывается в *.replay, поэтому новые
+# записи во время отправки идут в новый spill-файл. Если отправка прервалась,
+# неотправленный остаток возвращается в spill-файл; при сбое процесса между отправкой
+# пачки и удалением *.replay пачка может быть отправлена повторно (at-least-once).
+import json
+import os
+import threading
+from datetime import datetime
+from itertools import islice
+
+
+def _encode(value):
+    """
+    Сериализовать значение, которое json не умеет сохранять.
+    :param value: Значение
+    :return: JSON-совместимое значение
+    """
+    if isinstance(value, datetime):
+        return {'$date': value.isoformat()}
+    return str(value)
+
+
+def _decode(document: dict):
+    """
+    Восстановить datetime из {"$date": ISO}.
+    :param document: Объект JSON
+    :return: datetime или исходный объект
+    """
+    if len(document) == 1 and '$date' in document:
+        return datetime.fromisoformat(document['$date'])
+    return document
+
+
+class SpillFile:
+    """
+    Потокобезопасный append-only файл записей с повторной отправкой в хранилище.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 0):
+        """
+        :param path: Путь к spill-файлу
+        :param max_bytes: Максимальный размер файла (0 — без ограничения); сверх него записи отбрасываются
+        """
+        self.path = path
+        self.replay_path = f"{path}.replay"
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._stats = {'spilled': 0, 'replayed': 0, 'dropped': 0}
+
+    def append(self, entries: list[dict]) -> int:
+        """
+        Дописать записи в конец файла.
+        :param entries: Список записей (поле _id не сохраняется — его назначит MongoDB)
+        :return: Количество сохранённых записей
+        """
+        lines = ''.join(
+            json.dumps({key: value for key, value in entry.items() if key != '_id'},
+                       ensure_ascii=False, default=_encode) + '\n'
+            for entry in entries
+        )
+        with self._lock:
+            size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            if self.max_bytes and size + len(lines.encode('utf-8')) > self.max_bytes:
+                self._stats['dropped'] += len(entries)
+                return 0
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            self._stats['spilled'] += len(entries)
+        return len(entries)
+
+    def pending(self) -> bool:
+        """
+        Есть ли записи, ожидающие повторной отправки.
+        :return: bool
+        """
+        return os.path.exists(self.replay_path) or (
+            os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        )
+
+    def replay(self, sink, batch_size: int = 500) -> int:
+        """
+        Отправить сохранённые записи в sink пачками и удалить отправленное.
+        Одновременно выполняется только одна отправка.
+        :param sink: Функция, принимающая список записей (бросает исключение при сбое)
+        :param batch_size: Размер пачки
+        :return: Количество отправленных записей
+        """
+        if not self._replay_lock.acquire(blocking=False):
+            return 0
+        try:
+            with self._lock:
+                # *.replay остаётся от прерванной отправки — сначала дослать его
+                if not os.path.exists(self.replay_path):
+                    if not os.path.exists(self.path):
+                        return 0
+                    os.replace(self.path, self.replay_path)
+            sent = 0
+            unsent, error = None, None
+            with open(self.replay_path, encoding='utf-8') as f:
+                lines = (line for line in f if line.strip())
+                while True:
+                    chunk = list(islice(lines, batch_size))
+                    if not chunk:
+                        break
+                    try:
+                        sink([json.loads(line, object_hook=_decode) for line in chunk])
+                    except Exception as e:
+                        unsent, error = chunk + list(lines), e
+                        break
+                    sent += len(chunk)
+                    self._stats['replayed'] += len(chunk)
+            if unsent is not None:
+                self._return_unsent(unsent)
+                raise error
+            os.remove(self.replay_path)
+            return sent
+        finally:
+            self._replay_lock.release()
+
+    def _return_unsent(self, lines: list[str]) -> None:
+        """
+        Вернуть неотправленные строки в spill-файл и удалить *.replay.
+        :param lines: Строки, которые не удалось отправить
+        :return: None
+        """
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            os.remove(self.replay_path)
+
+    def stats(self) -> dict:
+        """
+        Счётчики: сохранено, отправлено повторно, отброшено, размер файла в байтах.
+        :return: dict
+        """
+        size = 0
+        for path in (self.path, self.replay_path):
+            if os.path.exists(path):
+                size += os.path.getsize(path)
+        return dict(self._stats, pending_bytes=size)
@@ -0,0 +1,180 @@
+# Модуль быстрого табличного вывода результатов поиска в терминал
+#
+# В отличие от PrettyTable, таблица не накапливается целиком: колонки и их ширина
+# определяются один раз для схемы результата (набора ключей строки) по первой
+# порции строк, а затем строки форматируются и выводятся постранично по мере
+# чтения итератора. Длинный текст обрезается или переносится (не больше
+# TABLE_WRAP_LINES строк на ячейку).
+import shutil
+import sys
+from itertools import chain, islice, zip_longest
+
+from settings import settings
+
+# Ширина колонки с номером строки
+NUMBER_WIDTH = 6
+# Минимальная ширина «резиновой» колонки (описание)
+MIN_FLEX_WIDTH = 20
+
+
+def _columns_for(sample: dict) -> list[tuple[str, str, int]]:
+    """
+    Колонки таблицы по первой строке результата.
+    Ширина 0 — «резиновая» колонка, занимающая остаток ширины терминала.
+    :param sample: Первая строка результата
+    :return: Список кортежей (ключ, заголовок, максимальная ширина)
+    """
+    if 'title' in sample and 'description' in sample:
+        return [('title', 'Название', 30), ('description', 'Описание', 0)]
+    if 'title' in sample and 'release_year' in sample and 'genre' in sample:
+        return [('title', 'Название', 30), ('release_year', 'Год', 4), ('genre', 'Жанр', 0)]
+    return [(key, str(key), None) for key in sample.keys()]
+
+
+def _text(value) -> str:
+    """
+    Текст ячейки в одну строку.
+    :param value: Значение
+    :return: str
+    """
+    if value is None:
+        return '-'
+    text = str(value)
+    if '\n' in text or '\r' in text:
+        text = ' '.join(text.split())
+    return text
+
+
+class TableRenderer:
+    """
+    Постраничный вывод строк-словарей в виде таблицы с фиксированной шириной колонок.
+    """
+
+    def __init__(self, out=None, max_cell_width: int = None, wrap_lines: int = None,
+                 terminal_width: int = None, sample_size: int = 100):
+        """
+        :param out: Поток вывода (по умолчанию sys.stdout в момент вывода)
+        :param max_cell_width: Максимальная ширина ячейки (по умолчанию TABLE_MAX_CELL_WIDTH)
+        :param wrap_lines: Строк на ячейку: 1 — обрезать, больше — переносить (по умолчанию TABLE_WRAP_LINES)
+        :param terminal_width: Ширина терминала (по умолчанию определяется автоматически)
+        :param sample_size: Сколько строк просматривать для расчёта ширины колонок
+        """
+        self.out = out
+        self.max_cell_width = max_cell_width
+        self.wrap_lines = wrap_lines
+        self.terminal_width = terminal_width
+        self.sample_size = sample_size
+        # Схема (ключи строки, ширина терминала) -> раскладка колонок
+        self._layouts: dict[tuple, tuple] = {}
+
+    def _layout(self, sample_rows: list[dict]) -> tuple:
+        """
+        Раскладка колонок для схемы первой строки: вычисляется один раз и кэшируется,
+        поэтому все страницы одного результата выводятся с одинаковой шириной.
+        :param sample_rows: Первая порция строк
+        :return: Кортеж (колонки [(ключ, заголовок, ширина)], разделитель, строка заголовка)
+        """
+        terminal_width = self.terminal_width or shutil.get_terminal_size((120, 24)).columns
+        schema = (tuple(sample_rows[0].keys()), terminal_width)
+        layout = self._layouts.get(schema)
+        if layout is not None:
+            return layout
+
+        limit = self.max_cell_width or settings.TABLE_MAX_CELL_WIDTH
+        columns = []
+        for key, title, width in _columns_for(sample_rows[0]):
+            if width is None:
+                # Ширина по содержимому первой порции, но не больше предела
+                content = max(len(_text(row.get(key))) for row in sample_rows)
+                width = max(len(title), min(content, limit))
+            elif width:
+                width = max(len(title), min(width, limit))
+            columns.append([key, title, width])
+        flex = [column for column in columns if column[2] == 0]
+        if flex:
+            # Рамка: "| " + ячейки через " | " + " |"
+            used = NUMBER_WIDTH + sum(column[2] for column in columns) + 3 * len(columns) + 4
+            share = max(MIN_FLEX_WIDTH, (terminal_width - used) // len(flex))
+            for column in flex:
+                column[2] = max(len(column[1]), min(share, limit))
+
+        columns = [tuple(column) for column in columns]
+        border = '+' + '+'.join('-' * (width + 2) for width in (NUMBER_WIDTH, *[c[2] for c in columns])) + '+'
+        header = '| ' + ' | '.join(
+            [('№').ljust(NUMBER_WIDTH)] + [title.ljust(width) for _, title, width in columns]
+        ) + ' |'
+        layout = (columns, border, header)
+        self._layouts[schema] = layout
+        return layout
+
+    def _cell(self, text: str, width: int, lines: int) -> list[str]:
+        """
+        Строки ячейки: текст, обрезанный или перенесённый по ширине.
+        :param text: Текст ячейки
+        :param width: Ширина колонки
+        :param lines: Максимальное количество строк
+        :return: Список строк (каждая ровно width символов)
+        """
+        if len(text) <= width:
+            return [text.ljust(width)]
+        if lines <= 1:
+            return [text[:width - 1] + '…']
+        import textwrap
+        wrapped = textwrap.wrap(text, width, max_lines=lines, placeholder=' …')
+        return [line.ljust(width) for line in wrapped]
+
+    def render(self, rows, start: int = 1, page_size: int = None, confirm=None) -> int:
+        """
+        Вывести строки таблицей. Итератор читается лениво: страница форматируется
+        и выводится одной записью, следующая читается только после подтверждения.
+        :param rows: Итерируемый набор словарей
+        :param start: Номер первой строки
+        :param page_size: Строк на страницу (None — без остановок)
+        :param confirm: Функция без аргументов: продолжать ли вывод после страницы
+        :return: Количество выведенных строк
+        """
+        rows = iter(rows)
+        sample_rows = list(islice(rows, self.sample_size))
+        if not sample_rows:
+            return 0
+        out = self.out or sys.stdout
+        columns, border, header = self._layout(sample_rows)
+        wrap_lines = self.wrap_lines or settings.TABLE_WRAP_LINES
+        blank = [' ' * width for _, _, width in columns]
+
+        def flush(page: list[str]) -> None:
+            # Каждая страница выводится одной записью со своим заголовком
+            out.write('\n'.join([border, header, border, *page, border]) + '\n')
+            out.flush()
+
+        page = []
+        count = 0
+        for number, row in enumerate(chain(sample_rows, rows), start):
+            cells = [self._cell(_text(row.get(key)), width, wrap_lines) for key, _, width in columns]
+            if all(len(cell) == 1 for cell in cells):
+                page.append(f"| {number:>{NUMBER_WIDTH}} | " + ' | '.join(cell[0] for cell in cells) + ' |')
+            else:
+                for i, parts in enumerate(zip_longest(*cells)):
+                    label = f"{number:>{NUMBER_WIDTH}}" if i == 0 else ' ' * NUMBER_WIDTH
+                    page.append(f"| {label} | " + ' | '.join(
+                        part if part is not None else blank[j] for j, part in enumerate(parts)
+                    ) + ' |')
+            count += 1
+            if page_size and count % page_size == 0:
+                flush(page)
+                page = []
+                if confirm is not None and not confirm():
+                    return count
+        if page:
+            flush(page)
+        return count
+
+
+def page_size_for_terminal() -> int | None:
+    """
+    Размер страницы по высоте терминала (None, если вывод не в терминал).
+    :return: int | None
+    """
+    if not sys.stdout.isatty():
+        return None
+    return max(5, shutil.get_terminal_size((120, 24)).lines - 6)
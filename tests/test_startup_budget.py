@@ -0,0 +1,30 @@
+# Бюджет времени запуска (benchmarks/startup_budget.py) как тест pytest
+#
+# Запуск из корня проекта:
+#     python -m pytest tests
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.startup_budget import (  # noqa: E402
+    IMPORT_BUDGET_MS, MENU_BUDGET_MS, eagerly_loaded_modules, measure_import_ms, measure_menu_ms
+)
+
+# Медиана нескольких запусков сглаживает единичные выбросы
+RUNS = 3
+
+
+def test_import_within_budget():
+    elapsed = statistics.median(measure_import_ms() for _ in range(RUNS))
+    assert elapsed <= IMPORT_BUDGET_MS, f"импорт main: {elapsed:.1f} мс > {IMPORT_BUDGET_MS} мс"
+
+
+def test_menu_within_budget():
+    elapsed = statistics.median(measure_menu_ms() for _ in range(RUNS))
+    assert elapsed <= MENU_BUDGET_MS, f"старт до меню: {elapsed:.1f} мс > {MENU_BUDGET_MS} мс"
+
+
+def test_no_eager_imports():
+    assert eagerly_loaded_modules() == []
@@ -0,0 +1,194 @@
+# Модуль приближённого подсчёта популярных запросов в скользящем окне (алгоритм Space-Saving)
+#
+# Space-Saving с ёмкостью m на потоке из N запросов гарантирует:
+#   * оценка частоты любого отслеживаемого запроса завышена не больше чем на N / m
+#     (для каждого запроса хранится своя граница ошибки error <= N / m);
+#   * любой запрос с истинной частотой больше N / m обязательно отслеживается.
+# Окно «час» собирается из 12 корзин по 5 минут, окно «сутки» — из 24 часовых корзин;
+# при объединении корзин границы ошибок складываются. Память фиксирована:
+# не больше (12 + 24) * m счётчиков.
+import threading
+import time
+from collections import deque
+
+# Окна: имя -> (длительность корзины в секундах, количество корзин)
+WINDOWS = {
+    'hour': (300, 12),
+    'day': (3600, 24),
+}
+
+
+class SpaceSaving:
+    """
+    Сводка Space-Saving: не больше capacity счётчиков вида запрос -> [оценка, ошибка].
+    """
+
+    def __init__(self, capacity: int):
+        """
+        :param capacity: Максимальное количество отслеживаемых запросов
+        """
+        self.capacity = capacity
+        self.counters: dict[str, list[int]] = {}
+        self.total = 0
+
+    def offer(self, item: str, weight: int = 1) -> None:
+        """
+        Учесть появление запроса в потоке.
+        Если мест нет, вытесняется запрос с минимальной оценкой, а новый наследует
+        её как нижнюю границу (и как ошибку).
+        :param item: Запрос
+        :param weight: Вес (количество появлений)
+        :return: None
+        """
+        self.total += weight
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += weight
+            return
+        if len(self.counters) < self.capacity:
+            self.counters[item] = [weight, 0]
+            return
+        victim = min(self.counters, key=lambda key: self.counters[key][0])
+        floor = self.counters.pop(victim)[0]
+        self.counters[item] = [floor + weight, floor]
+
+    def min_count(self) -> int:
+        """
+        Верхняя граница частоты любого неотслеживаемого запроса.
+        :return: int (0, если сводка ещё не заполнена)
+        """
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(counter[0] for counter in self.counters.values())
+
+
+class TrendingTracker:
+    """
+    Потокобезопасный подсчёт популярных запросов за последний час и сутки
+    в фиксированном объёме памяти.
+    """
+
+    def __init__(self, capacity: int = 200):
+        """
+        :param capacity: Ёмкость сводки Space-Saving одной корзины
+        """
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        # Для каждого окна — очередь корзин (начало корзины, SpaceSaving)
+        self._buckets = {window: deque() for window in WINDOWS}
+
+    def _current_bucket(self, window: str, now: float) -> SpaceSaving:
+        """
+        Получить корзину окна для момента now, удалив вышедшие из окна корзины.
+        Вызывать под блокировкой.
+        :param window: Имя окна
+        :param now: Время (unix timestamp)
+        :return: SpaceSaving
+        """
+        width, count = WINDOWS[window]
+        start = int(now // width * width)
+        buckets = self._buckets[window]
+        while buckets and buckets[0][0] <= start - width * count:
+            buckets.popleft()
+        if not buckets or buckets[-1][0] != start:
+            buckets.append((start, SpaceSaving(self.capacity)))
+        return buckets[-1][1]
+
+    def offer(self, query: str, now: float = None, weight: int = 1) -> None:
+        """
+        Учесть поисковый запрос во всех окнах.
+        :param query: Поисковый запрос
+        :param now: Время запроса (unix timestamp), по умолчанию — текущее
+        :param weight: Количество появлений
+        :return: None
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            for window in WINDOWS:
+                self._current_bucket(window, now).offer(query, weight)
+
+    def top(self, window: str = 'hour', limit: int = 5, now: float = None) -> dict:
+        """
+        Приближённые самые частые запросы окна.
+        Для каждого запроса истинная частота лежит в [count - error, count + error];
+        count — сумма оценок по корзинам, где запрос отслеживался.
+        :param window: 'hour' или 'day'
+        :param limit: Количество запросов
+        :param now: Текущее время (unix timestamp)
+        :return: Словарь {'window', 'total', 'error_bound', 'items': [{'query', 'count', 'error'}]}
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._current_bucket(window, now)
+            buckets = [summary for _, summary in self._buckets[window]]
+            merged = {}
+            for summary in buckets:
+                for query, (count, error) in summary.counters.items():
+                    item = merged.setdefault(query, [0, 0])
+                    item[0] += count
+                    item[1] += error
+            floors = [summary.min_count() for summary in buckets]
+            total = sum(summary.total for summary in buckets)
+        items = []
+        for query, (count, error) in merged.items():
+            # В корзинах, где запроса нет, он мог встречаться не чаще min_count корзины
+            missing = sum(floor for summary, floor in zip(buckets, floors) if query not in summary.counters)
+            items.append({'query': query, 'count': count, 'error': error + missing})
+        items.sort(key=lambda item: (-item['count'], item['query']))
+        return {
+            'window': window,
+            'total': total,
+            'error_bound': round(total / self.capacity, 2),
+            'items': items[:limit]
+        }
+
+    def to_document(self) -> dict:
+        """
+        Состояние для сохранения в MongoDB.
+        :return: dict
+        """
+        with self._lock:
+            return {
+                'capacity': self.capacity,
+                'saved_at': time.time(),
+                'windows': {
+                    window: [
+                        {
+                            'start': start,
+                            'total': summary.total,
+                            'counters': [[query, count, error] for query, (count, error) in summary.counters.items()]
+                        }
+                        for start, summary in buckets
+                    ]
+                    for window, buckets in self._buckets.items()
+                }
+            }
+
+    def merge_document(self, document: dict, now: float = None) -> None:
+        """
+        Восстановить сохранённое состояние, объединив его с текущими корзинами.
+        Корзины, вышедшие из окна, пропускаются.
+        :param document: Результат to_document
+        :param now: Текущее время (unix timestamp)
+        :return: None
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            for window, saved_buckets in document.get('windows', {}).items():
+                if window not in WINDOWS:
+                    continue
+                width, count = WINDOWS[window]
+                for saved in saved_buckets:
+                    if saved['start'] <= now - width * count:
+                        continue
+                    buckets = self._buckets[window]
+                    summary = next((s for start, s in buckets if start == saved['start']), None)
+                    if summary is None:
+                        summary = SpaceSaving(self.capacity)
+                        buckets.append((saved['start'], summary))
+                    for query, query_count, error in saved['counters']:
+                        summary.offer(query, query_count)
+                        summary.counters[query][1] += error
+                    # offer уже учёл отслеживаемые запросы, добавляем остаток потока
+                    summary.total += saved['total'] - sum(c for _, c, _ in saved['counters'])
+                self._buckets[window] = deque(sorted(self._buckets[window], key=lambda bucket: bucket[0]))
@@ -1,14 +1,21 @@
 # Модуль пользовательского интерфейса (UI)
-from prettytable import PrettyTable
+import sys
+from metrics import instrumented
+from table_renderer import TableRenderer, page_size_for_terminal
 
 menu = {
     "1": "Поиск по ключевому слову",
     "2": "Поиск по жанру и диапазону годов",
     "3": "Посмотреть популярные запросы",
     "4": "Поиск по первой букве названия",
+    "5": "Показать все фильмы по ключевому слову",
+    "6": "Автодополнение названий",
     "9": "Выход"
 }
 
+# Ширина колонок вычисляется один раз для схемы результата и сохраняется между страницами
+renderer = TableRenderer()
+
 
 def show_menu() -> None:
     """
@@ -52,11 +59,11 @@ def get_search_keyword() -> str:
 def get_genre_and_year_range() -> dict:
     """
     Запрашивает у пользователя жанр и диапазон годов для поиска фильмов.
-    Возвращает словарь с ключами 'genre', 'year_from', 'year_to'.
+    Возвращает словарь с ключами 'genre' (список жанров), 'year_from', 'year_to'.
     :return: dict
     """
     print("\nПоиск по жанру и диапазону годов:")
-    genre = input("Введите жанр (или нажмите Enter для пропуска): ").strip()
+    genre = input("Введите жанр, несколько — через запятую (или нажмите Enter для пропуска): ").strip()
     year_from = input("Введите начальный год (или нажмите Enter для пропуска): ").strip()
     year_to = input("Введите конечный год (или нажмите Enter для пропуска): ").strip()
 
@@ -65,7 +72,7 @@ def get_genre_and_year_range() -> dict:
     year_to = _parse_year(year_to, "конечный")
 
     return {
-        'genre': genre if genre else None,
+        'genre': [name.strip() for name in genre.split(',') if name.strip()] or None,
         'year_from': year_from,
         'year_to': year_to
     }
@@ -106,38 +113,37 @@ def display_film(film: dict) -> None:
     print("=" * 50)
 
 
-def display_films(films: list[dict]) -> None:
+@instrumented('render')
+def display_films(films: list[dict], start: int = 1) -> None:
     """
     Выводит список фильмов в виде таблицы.
     Если фильмов нет — сообщает об этом.
     :param films: список фильмов
+    :param start: номер первой строки (для постраничного вывода)
     :return: None
     """
     if not films:
         print("\nФильмы не найдены.")
         return
     print(f"\nНайдено {len(films)} фильм(ов):")
-    table = PrettyTable()
-    # Определяем заголовки по ключам первого фильма
-    headers = []
-    if films:
-        sample = films[0]
-        # Для совместимости с разными структурами
-        if 'title' in sample and 'description' in sample:
-            headers = ['№', 'Название', 'Описание']
-        elif 'title' in sample and 'release_year' in sample and 'genre' in sample:
-            headers = ['№', 'Название', 'Год', 'Жанр']
-        else:
-            headers = ['№'] + list(sample.keys())
-    table.field_names = headers
-    for i, film in enumerate(films, 1):
-        if 'title' in film and 'description' in film:
-            table.add_row([i, film.get('title', 'Не указано'), film.get('description', 'Не указано')])
-        elif 'title' in film and 'release_year' in film and 'genre' in film:
-            table.add_row([i, film.get('title', 'Не указано'), film.get('release_year', 'Не указан'), film.get('genre', 'Не указан')])
-        else:
-            table.add_row([i] + [film.get(k, 'Не указано') for k in film.keys()])
-    print(table)
+    renderer.render(films, start=start)
+
+
+@instrumented('render')
+def display_films_stream(films) -> int:
+    """
+    Выводит фильмы по мере поступления строк, не накапливая их в памяти.
+    В терминале вывод останавливается после каждой страницы, и следующие
+    строки читаются только если пользователь хочет продолжить.
+    :param films: итератор словарей с фильмами
+    :return: количество выведенных фильмов
+    """
+    count = renderer.render(films, page_size=page_size_for_terminal(), confirm=ask_continue)
+    if count == 0:
+        print("\nФильмы не найдены.")
+    else:
+        print(f"\nВсего выведено {count} фильм(ов).")
+    return count
 
 
 def display_popular_queries() -> None:
@@ -146,7 +152,8 @@ def display_popular_queries() -> None:
     Если данных нет — сообщает об этом.
     :return: None
     """
-    from db import get_popular_queries, get_recent_queries
+    from prettytable import PrettyTable
+    from db import get_popular_queries, get_recent_queries, get_trending_queries
     print("\n" + "=" * 60)
     print("СТАТИСТИКА ПОИСКОВЫХ ЗАПРОСОВ")
     print("=" * 60)
@@ -168,6 +175,17 @@ def display_popular_queries() -> None:
         print(table)
     else:
         print("   Нет данных о популярных запросах")
+    for window, title in (('hour', 'за последний час'), ('day', 'за последние сутки')):
+        trending = get_trending_queries(window, 5)
+        print(f"\nПопулярно {title} (приблизительно, ± ошибка; всего запросов: {trending['total']}):")
+        if trending['items']:
+            table = PrettyTable()
+            table.field_names = ["№", "Запрос", "Кол-во", "± ошибка"]
+            for i, item in enumerate(trending['items'], 1):
+                table.add_row([i, item['query'], item['count'], item['error']])
+            print(table)
+        else:
+            print("   Нет данных за этот период")
     print("\nПоследние 5 запросов:")
     recent = get_recent_queries(5)
     if recent:
@@ -207,7 +225,42 @@ def ask_continue() -> bool:
     """
     choice = input("\nПоказать больше результатов? (y/n): ")
 
-    return choice in ['y', 'yes', 'да', 'д']
+    return choice.strip().lower() in ['y', 'yes', 'да', 'д']
+
+
+def show_paged(fetch_page) -> int:
+    """
+    Выводит результаты поиска страница за страницей, пока пользователь
+    просит продолжить и пока есть следующая страница.
+    :param fetch_page: функция (page_token) -> (список фильмов, токен следующей страницы)
+    :return: количество показанных фильмов
+    """
+    page_token = None
+    shown = 0
+    while True:
+        films, page_token = fetch_page(page_token)
+        display_films(films, start=shown + 1)
+        shown += len(films)
+        if page_token is None or not ask_continue():
+            break
+    return shown
+
+
+def display_fuzzy_suggestions(films: list[dict]) -> None:
+    """
+    Выводит похожие названия, если точный поиск ничего не нашёл.
+    :param films: список фильмов с ключом 'distance' (число опечаток)
+    :return: None
+    """
+    from prettytable import PrettyTable
+    if not films:
+        return
+    print("\nВозможно, вы имели в виду:")
+    table = PrettyTable()
+    table.field_names = ['№', 'Название', 'Опечаток', 'Описание']
+    for i, film in enumerate(films, 1):
+        table.add_row([i, film.get('title', 'Не указано'), film.get('distance', '-'), film.get('description', 'Не указано')])
+    print(table)
 
 
 def get_first_letter() -> str:
@@ -222,3 +275,81 @@ def get_first_letter() -> str:
         if len(letter) == 1 and letter.isalpha():
             return letter
         print("Введите одну английскую букву!")
+
+
+def _read_key() -> str:
+    """
+    Считывает одно нажатие клавиши без ожидания Enter (POSIX-терминал).
+    :return: символ нажатой клавиши
+    """
+    import termios
+    import tty
+    fd = sys.stdin.fileno()
+    old_settings = termios.tcgetattr(fd)
+    try:
+        tty.setraw(fd)
+        return sys.stdin.read(1)
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
+
+
+def _show_suggestions(prefix: str, titles: list[str]) -> None:
+    """
+    Перерисовывает строку ввода и список подсказок автодополнения.
+    :param prefix: введённое начало названия
+    :param titles: подсказанные названия
+    :return: None
+    """
+    print("\x1b[2J\x1b[H", end='')
+    print("Начните вводить название (Enter — показать все, Esc — выход)\n")
+    print(f"> {prefix}\n")
+    for title in titles:
+        print(f"  {title}")
+    if prefix and not titles:
+        print("  (нет совпадений)")
+    sys.stdout.flush()
+
+
+def autocomplete_title(lookup, limit: int = 10) -> str | None:
+    """
+    Интерактивное автодополнение названий: подсказки обновляются на каждое нажатие клавиши.
+    Если терминал не поддерживает посимвольный ввод (Windows, перенаправленный stdin),
+    подсказки показываются после ввода каждой строки.
+    :param lookup: функция (prefix, limit) -> список названий
+    :param limit: количество подсказок
+    :return: выбранное начало названия или None, если пользователь вышел
+    """
+    try:
+        import termios  # noqa: F401
+        interactive = sys.stdin.isatty()
+    except ImportError:
+        interactive = False
+
+    if not interactive:
+        while True:
+            prefix = input("Начало названия (пустая строка — выход, '!' в конце — показать все): ").strip()
+            if not prefix:
+                return None
+            if prefix.endswith('!'):
+                return prefix[:-1].strip() or None
+            titles = lookup(prefix, limit)
+            for title in titles:
+                print(f"  {title}")
+            if not titles:
+                print("  (нет совпадений)")
+
+    prefix = ''
+    _show_suggestions(prefix, [])
+    while True:
+        key = _read_key()
+        if key in ('\r', '\n'):
+            return prefix or None
+        if key in ('\x1b', '\x03', '\x04'):
+            return None
+        if key in ('\x7f', '\x08'):
+            prefix = prefix[:-1]
+        elif key.isprintable():
+            prefix += key
+        else:
+            continue
+        _show_suggestions(prefix, lookup(prefix, limit) if prefix else [])